@@ -0,0 +1,472 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Benchmark für MediDEPOT
+#Beschreibung: Erzeugt künstliche Lager mit z.B. 1.000, 100.000 und 1.000.000 Artikeln,
+#              misst die wichtigsten Arbeiten (Laden, Suchen, Buchen, Import, Export,
+#              Tabelle scrollen) und speichert die Zeiten als JSON-Datei.
+#              Mit --vergleich werden zwei JSON-Dateien verglichen (z.B. alte und neue Version).
+#
+# Beispiele:
+#   python benchmark.py                                  # 1k, 100k und 1M Artikel
+#   python benchmark.py --groessen 1000 100000 --ordner benchmark_daten
+#   xvfb-run python benchmark.py                         # mit Tabelle (Treeview) auf einem Server
+#   python benchmark.py --vergleich alt.json neu.json
+#
+# Die Tabelle (Treeview) wird nur gemessen, wenn ein Bildschirm da ist - auf einem Server
+# ohne Bildschirm mit xvfb-run starten, sonst wird dieser Teil übersprungen.
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import datenbank
+import lager
+import prognose
+import sammelimport
+import scannen
+import vorschlaege
+
+
+# Bausteine für die künstlichen Artikel (immer mit demselben Zufall -> gleiche Daten bei jedem Lauf)
+PRODUKTE = ["Latexhandschuhe", "Nitrilhandschuhe", "Mullbinde", "Desinfektionsmittel", "Einmalspritzen",
+            "Kanüle", "Kompresse", "Pflaster", "Skalpell", "Lanzette", "Fixiermull", "Wundauflage",
+            "Elastische Binde", "Tupfer", "Spatel", "Urinbecher", "Blutröhrchen", "Verbandschere"]
+ZUSAETZE = ["S", "M", "L", "XL", "5ml", "10ml", "6cm", "8cm", "10x10", "5cmx5m", "steril", "unsteril"]
+EINHEITEN = ["Stück", "Packung", "Liter", "Karton", "Rolle"]
+LAGERORTE = [f"Schrank {i}" for i in range(1, 41)] + ["Labor", "Lager A", "Lager B", "Medikamentenschrank"]
+KUERZEL = ["EG", "MS", "AB", "TK", "JR", "LM", "SK", "PW"]
+ERSTES_DATUM = date(2023, 1, 1)
+
+# Suchbegriffe wie im Suchfeld (Teilwort, Lagerort, Tippfehler, kurzes Wort, nichts gefunden)
+SUCHBEGRIFFE = ["pflas", "handschuhe m", "schrank 3", "Kompresee", "Sk", "xyzq"]
+
+# Eingaben im Feld "Artikelname", Buchstabe für Buchstabe (Vorschläge beim Tippen)
+TIPPEN = "Pflaster M"
+
+# Prognose: so viele Artikel bekommen ein Jahr lang jeden Tag einen Abgang ins Journal
+PROGNOSE_ARTIKEL = 1000
+PROGNOSE_TAGE = 365
+
+# Mehr Artikel werden für daten_aus_db_laden() (alles auf einmal) nicht gemessen - zu viel Speicher
+ALLES_LADEN_BIS = 200_000
+
+# Programmstart bis zum benutzbaren Fenster: läuft jedes Mal in einem neuen Python-Prozess
+# (mit allen Imports), gemessen bis die ersten Zeilen der Tabelle angezeigt werden
+START_SKRIPT = """
+import sys, time
+start = time.perf_counter()
+import datenbank, medidepot
+datenbank.DB_DATEI = sys.argv[1]
+medidepot.wenn_sichtbar = lambda *_: None   # Meldungen (z.B. Bestandswarnung) würden das Messen anhalten
+medidepot.vorbereiten()
+medidepot.anzeigen()
+while not medidepot.ansicht._vollstaendig or medidepot.arbeiter._offen:
+    medidepot.fenster.update()
+print((time.perf_counter() - start) * 1000)
+"""
+# So oft wird der Programmstart höchstens gemessen (jeder Start ist ein neuer Prozess)
+MAX_STARTS = 5
+
+# Ab wie viel Prozent langsamer eine Messung beim Vergleich als Verschlechterung gilt
+GRENZE_PROZENT = 20
+# ... und nur wenn sie auch mindestens so viele Millisekunden langsamer ist (Messrauschen)
+GRENZE_MS = 1.0
+
+
+# KÜNSTLICHES LAGER ERZEUGEN
+
+
+def artikel_erzeugen(anzahl, zufall):
+    """Liefert anzahl künstliche Artikel (ohne ID) in der Reihenfolge der Spalten von ARTIKEL_SPALTEN."""
+    for nummer in range(1, anzahl + 1):
+        name = f"{zufall.choice(PRODUKTE)} {zufall.choice(ZUSAETZE)} {nummer}"
+        mindest = zufall.randint(1, 20)
+        bestand = zufall.randint(0, 200)
+        datum = (ERSTES_DATUM + timedelta(days=zufall.randint(0, 729))).isoformat()
+        yield (name, bestand, mindest, zufall.choice(EINHEITEN), zufall.choice(LAGERORTE),
+               zufall.choice(KUERZEL), datum)
+
+def lager_erzeugen(pfad, anzahl):
+    """
+    Legt eine Datenbank mit anzahl künstlichen Artikeln an.
+    Zuerst kommen nur die Artikel in eine leere Tabelle, danach bauen die normalen
+    Migrations-Schritte (wie bei einer älteren Datenbank) Indexe, Journal und Suchindex
+    auf einmal auf - das ist viel schneller als jeden Artikel einzeln zu buchen.
+    Gibt die Dauer in Sekunden zurück.
+    """
+    start = time.perf_counter()
+    verbindung = sqlite3.connect(pfad)
+    verbindung.execute(lager.ARTIKEL_TABELLE_SQL)
+    verbindung.executemany("INSERT INTO artikel (produktname, aktuellerbestand, mindestbestand, einheit, "
+                           "lagerort, Kürzel, datum) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           artikel_erzeugen(anzahl, random.Random(anzahl)))
+    verbindung.commit()
+    verbindung.close()
+
+    datenbank_oeffnen(pfad)
+    lager.erstelle_datenbank_falls_nicht_vorhanden()
+    datenbank.schliessen()
+    return time.perf_counter() - start
+
+def datenbank_oeffnen(pfad):
+    """Stellt die gemeinsame Verbindung auf die Datenbank pfad um."""
+    datenbank.schliessen()
+    datenbank.DB_DATEI = pfad
+
+
+# MESSEN
+
+
+def messen(funktion, wiederholungen):
+    """Ruft funktion wiederholungen mal auf und gibt die Zeiten in Millisekunden zurück."""
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return zeiten
+
+def zusammenfassen(zeiten, einheit_pro=None):
+    """Median und Minimum (in ms) einer Messreihe für die JSON-Datei."""
+    ergebnis = {"median_ms": round(statistics.median(zeiten), 3),
+                "min_ms": round(min(zeiten), 3),
+                "anzahl": len(zeiten)}
+    if einheit_pro:
+        ergebnis["pro"] = einheit_pro
+    return ergebnis
+
+def ausgeben(name, ergebnis):
+    print(f"  {name:<44} {ergebnis['median_ms']:>10.2f} ms  (min {ergebnis['min_ms']:.2f} ms, n={ergebnis['anzahl']})")
+
+def csv_schreiben(pfad, zeilen):
+    """Schreibt eine Import-Datei im Format des Inventur-Exports."""
+    with open(pfad, "w", newline="", encoding="utf-8") as datei:
+        writer = csv.writer(datei, delimiter=";")
+        writer.writerow(lager.EXPORT_UEBERSCHRIFTEN)
+        writer.writerows(zeilen)
+
+def lager_messen(anzahl, ordner, wiederholungen):
+    """Misst alle Arbeiten ohne Fenster (über lager.py). Gibt {name: ergebnis} zurück."""
+    ergebnisse = {}
+    zufall = random.Random(1)
+
+    def eintragen(name, zeiten, einheit_pro=None):
+        ergebnisse[name] = zusammenfassen(zeiten, einheit_pro)
+        ausgeben(name, ergebnisse[name])
+
+    # Programmstart mit aktueller Datenbank (neue Verbindung + Versions-Prüfung)
+    def start():
+        datenbank.schliessen()
+        lager.erstelle_datenbank_falls_nicht_vorhanden()
+    eintragen("start", messen(start, wiederholungen))
+
+    if anzahl <= ALLES_LADEN_BIS:
+        eintragen("alles_laden", messen(lager.daten_aus_db_laden, wiederholungen))
+    eintragen("zaehlen", messen(lager.artikel_zaehlen, wiederholungen))
+    eintragen("nachbestellliste", messen(lager.niedrige_bestaende_laden, wiederholungen))
+
+    # Suchen: Abfrage vorbereiten und Treffer zählen (wie das Suchfeld)
+    for begriff in SUCHBEGRIFFE:
+        def suchen():
+            tabelle, _, bedingung, parameter = lager.suche_vorbereiten(begriff)
+            datenbank.abfrage_eins(f"SELECT COUNT(*) FROM {tabelle} WHERE {bedingung}", parameter)
+        eintragen(f"suche[{begriff}]", messen(suchen, wiederholungen))
+
+    # Vorschläge beim Tippen: Namensindex einmal aufbauen, dann pro Tastendruck nur im Speicher suchen
+    index = []
+    eintragen("namensindex_laden", messen(lambda: index.append(vorschlaege.NamensIndex.laden()), 1))
+    eintragen("vorschlaege_pro_taste", [messen(lambda: index[0].vorschlaege(TIPPEN[:laenge]), 1)[0]
+                                        for laenge in range(1, len(TIPPEN) + 1)
+                                        for _ in range(wiederholungen)], "Tastendruck")
+
+    # Namen von zufälligen vorhandenen Artikeln für Abgänge und Änderungen
+    groesste_id = datenbank.abfrage_eins("SELECT MAX(artikel_id) FROM artikel")[0]
+    zufalls_ids = [zufall.randint(1, groesste_id) for _ in range(200)]
+    zeilen = lager.artikel_zeilen_laden(zufalls_ids)
+    namen = [zeile[1] for zeile in zeilen.values() if zeile[2] > 0]  # nur Artikel mit Bestand
+
+    eintragen("zugang", messen(lambda: lager.zugang_speichern(
+        "Benchmark Artikel", 500, "Stück", "Labor", "EG", "2025-06-01"), 200), "Buchung")
+    eintragen("abgang", [messen(lambda: lager.abgang_buchen(name, 1, "EG", "2025-06-02"), 1)[0]
+                         for name in namen], "Buchung")
+
+    def aendern(zeile):
+        lager.artikel_aendern(zeile[0], zeile[1], zeile[2] + 1, zeile[3], zeile[4], zeile[5], zeile[6], alt=zeile)
+    eintragen("aendern", [messen(lambda: aendern(zeile), 1)[0]
+                          for zeile in lager.artikel_zeilen_laden(zufalls_ids[:100]).values()], "Artikel")
+
+    # Scannen: Barcodes für die Artikel mit Bestand, dann ein Paket Scans pro Transaktion
+    # (wie die Scan-Warteschlange) im Vergleich zu einer Transaktion pro Scan
+    with datenbank.transaktion() as cursor:
+        cursor.executemany("UPDATE artikel SET gtin = ? WHERE artikel_id = ?",
+                           [(f"BENCHMARK{artikel_id}", artikel_id) for artikel_id in zeilen])
+    codes = [f"BENCHMARK{artikel_id}" for artikel_id, zeile in zeilen.items() if zeile[2] >= 100]
+    paket = [(codes[nummer % len(codes)], "EG", "2025-06-02") for nummer in range(scannen.MAX_PRO_PAKET)]
+    eintragen("scans_paket", messen(lambda: lager.scans_buchen(paket), 20), f"{len(paket)} Scans")
+    eintragen("scan_einzeln", [messen(lambda: lager.scans_buchen([scan]), 1)[0] for scan in paket], "Scan")
+
+    eintragen("aenderungen_pruefen", messen(lambda: lager.aenderungen_pruefen((datenbank.datenversion(), 0)),
+                                            wiederholungen))
+
+    # Sammel-Import: 1000 Zugänge, danach 1000 Abgänge von diesen Artikeln
+    import_anzahl = 1000
+    zugaenge = os.path.join(ordner, "zugaenge.csv")
+    abgaenge = os.path.join(ordner, "abgaenge.csv")
+    csv_schreiben(zugaenge, [("", f"Import {i}", 10, 2, "Stück", "Labor", "EG", "01.06.2025")
+                             for i in range(import_anzahl)])
+    csv_schreiben(abgaenge, [("", f"Import {i}", 1, "", "Stück", "Labor", "EG", "02.06.2025")
+                             for i in range(import_anzahl)])
+    eintragen("import_zugaenge_1000", messen(lambda: sammelimport.zugaenge_importieren(zugaenge), 1), "Datei")
+    eintragen("import_abgaenge_1000", messen(lambda: sammelimport.abgaenge_importieren(abgaenge), 1), "Datei")
+
+    # Prognose: ein Jahr Verbrauch ins Journal, alles neu berechnen, danach jeden Tag nur die
+    # Abgänge dieses Tages dazurechnen (wie beim Öffnen des Bestellvorschlags)
+    prognose_ids = zufall.sample(range(1, groesste_id + 1), min(PROGNOSE_ARTIKEL, groesste_id))
+    prognose_ids = [artikel_id for artikel_id in prognose_ids if lager.artikel_zeilen_laden([artikel_id])]
+
+    def verbrauch_buchen(tag):
+        datum = (date(2024, 1, 1) + timedelta(days=tag)).isoformat()
+        with datenbank.transaktion() as cursor:
+            cursor.executemany("INSERT INTO buchungen (artikel_id, menge, art, Kürzel, datum) "
+                               "VALUES (?, ?, 'Abgang', 'EG', ?)",
+                               [(artikel_id, -zufall.randint(1, 5), datum) for artikel_id in prognose_ids])
+        return datum
+
+    with datenbank.transaktion() as cursor:
+        cursor.executemany("INSERT INTO buchungen (artikel_id, menge, art, Kürzel, datum) "
+                           "VALUES (?, 10000, 'Zugang', 'EG', '2024-01-01')", [(i,) for i in prognose_ids])
+    for tag in range(PROGNOSE_TAGE):
+        heute = verbrauch_buchen(tag)
+    eintragen("prognose_neu_berechnen", messen(lambda: prognose.neu_berechnen(heute), 1),
+              f"{len(prognose_ids) * PROGNOSE_TAGE} Abgänge")
+    zeiten = []
+    for tag in range(PROGNOSE_TAGE, PROGNOSE_TAGE + wiederholungen):
+        heute = verbrauch_buchen(tag)
+        zeiten += messen(lambda: prognose.aktualisieren(heute), 1)
+    eintragen("prognose_aktualisieren", zeiten, "Tag")
+    eintragen("bestellvorschlaege", messen(lambda: prognose.bestellvorschlaege(heute=heute), wiederholungen))
+
+    # Export: alles, und nur ein Monat (Zeitraum über den Datums-Index)
+    export = os.path.join(ordner, "export.csv")
+    eintragen("export_alles", messen(lambda: lager.inventur_schreiben(export), 1), "Datei")
+    eintragen("export_ein_monat", messen(lambda: lager.inventur_schreiben(
+        export, von="2024-05-01", bis="2024-05-31"), wiederholungen), "Datei")
+    os.remove(export)
+
+    return ergebnisse
+
+
+# TABELLE (TREEVIEW) MESSEN - braucht einen Bildschirm (oder xvfb-run)
+
+
+def tabelle_messen(wiederholungen):
+    """
+    Misst die virtuelle Tabelle in einem echten Tk-Fenster: neu laden, scrollen,
+    springen, sortieren und filtern. Gemessen wird, bis die Zeilen im Treeview stehen.
+    Gibt None zurück, wenn es keinen Bildschirm gibt.
+    """
+    try:
+        import tkinter
+        from tkinter import ttk
+        fenster = tkinter.Tk()
+    except Exception as e:  # kein tkinter oder kein Bildschirm (TclError)
+        print(f"  Tabelle übersprungen ({e}) - mit xvfb-run starten")
+        return None
+
+    import medidepot
+    from hintergrund import DatenbankArbeiter
+    from tabellenansicht import VirtuelleTabelle
+
+    spalten = lager.EXPORT_UEBERSCHRIFTEN
+    treeview = ttk.Treeview(fenster, columns=spalten, show="headings", height=30)
+    scrollbar = ttk.Scrollbar(fenster, orient="vertical")
+    treeview.pack(side="left")
+    scrollbar.pack(side="right", fill="y")
+
+    # intervall=1: gemessen wird die Arbeit, nicht die Wartezeit bis zur nächsten Abholung
+    arbeiter = DatenbankArbeiter(fenster, intervall=1)
+    ansicht = VirtuelleTabelle(treeview, scrollbar, medidepot.zeile_darstellen, arbeiter)
+
+    def warten(aktion):
+        """Führt aktion aus und wartet, bis die Tabelle alles angezeigt hat und nichts mehr lädt."""
+        def ablauf():
+            aktion()
+            while not ansicht._vollstaendig or arbeiter._offen:
+                fenster.update()
+        return ablauf
+
+    def blaettern():
+        """Eine Seite weiter nach unten - am Ende wieder von oben (sonst passiert nichts mehr)."""
+        if ansicht.erste + ansicht.sichtbar >= ansicht.gesamt:
+            ansicht._springen(0)
+        else:
+            ansicht._scrollen(ansicht.sichtbar)
+
+    ergebnisse = {}
+
+    def eintragen(name, zeiten, einheit_pro=None):
+        ergebnisse[name] = zusammenfassen(zeiten, einheit_pro)
+        ausgeben(name, ergebnisse[name])
+
+    eintragen("tabelle_neu_laden", messen(warten(ansicht.neu_laden), wiederholungen))
+    eintragen("tabelle_scrollen", messen(warten(blaettern), 100), "Seite")
+
+    zufall = random.Random(2)
+    eintragen("tabelle_springen", messen(warten(lambda: ansicht._springen(zufall.randint(0, ansicht.gesamt))),
+                                         wiederholungen))
+    for spalte in (1, 2, 7):
+        eintragen(f"tabelle_sortieren[{spalten[spalte]}]", messen(warten(lambda: ansicht.sortieren(spalte)),
+                                                                  wiederholungen))
+        eintragen(f"tabelle_scrollen_sortiert[{spalten[spalte]}]",
+                  messen(warten(blaettern), 50), "Seite")
+    eintragen("tabelle_filtern[pflas]", messen(warten(lambda: ansicht.filtern(lager.suche_vorbereiten("pflas"))),
+                                               wiederholungen))
+
+    fenster.destroy()
+
+    # Programmstart bis zum benutzbaren Fenster (eigener Prozess, siehe START_SKRIPT)
+    ordner = os.path.dirname(os.path.abspath(__file__))
+    zeiten = []
+    for _ in range(min(wiederholungen, MAX_STARTS)):
+        datenbank.schliessen()
+        ausgabe = subprocess.run([sys.executable, "-c", START_SKRIPT, os.path.abspath(datenbank.DB_DATEI)],
+                                 cwd=ordner, capture_output=True, text=True, check=True).stdout
+        zeiten.append(float(ausgabe.split()[-1]))
+    eintragen("fenster_start", zeiten)
+    return ergebnisse
+
+
+# VERGLEICHEN
+
+
+def vergleichen(alt_pfad, neu_pfad):
+    """
+    Zeigt alle Messungen aus zwei JSON-Dateien nebeneinander.
+    Gibt 1 zurück, wenn etwas deutlich langsamer geworden ist (sonst 0).
+    """
+    with open(alt_pfad, encoding="utf-8") as datei:
+        alt = json.load(datei)
+    with open(neu_pfad, encoding="utf-8") as datei:
+        neu = json.load(datei)
+
+    print(f"Vergleich {alt['version']} ({alt['zeitpunkt']}) -> {neu['version']} ({neu['zeitpunkt']})")
+    langsamer = 0
+    for groesse, werte in neu["groessen"].items():
+        if groesse not in alt["groessen"]:
+            continue
+        print(f"\n{int(groesse):,} Artikel".replace(",", "."))
+        alte_messungen = alt["groessen"][groesse]["messungen"]
+        for name, ergebnis in werte["messungen"].items():
+            if name not in alte_messungen:
+                continue
+            vorher = alte_messungen[name]["median_ms"]
+            jetzt = ergebnis["median_ms"]
+            prozent = (jetzt - vorher) / vorher * 100 if vorher else 0
+            markierung = ""
+            if prozent > GRENZE_PROZENT and jetzt - vorher > GRENZE_MS:
+                markierung = "  <-- LANGSAMER"
+                langsamer += 1
+            print(f"  {name:<36} {vorher:>10.2f} -> {jetzt:>10.2f} ms  {prozent:+6.0f}%{markierung}")
+
+    print(f"\n{langsamer} Messung(en) mehr als {GRENZE_PROZENT}% langsamer")
+    return 1 if langsamer else 0
+
+
+# HAUPTPROGRAMM
+
+
+def programm_version():
+    """Git-Commit der gemessenen Version (oder "unbekannt", z.B. in der gepackten App)."""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unbekannt"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="Zeiten von MediDEPOT messen")
+    parser.add_argument("--groessen", type=int, nargs="+", default=[1_000, 100_000, 1_000_000],
+                        help="Anzahl Artikel der künstlichen Lager (Standard: 1000 100000 1000000)")
+    parser.add_argument("--wiederholungen", type=int, default=20, help="Wiederholungen pro Messung")
+    parser.add_argument("--ordner", help="Ordner für die Datenbanken (sonst ein Temp-Ordner). "
+                                         "Vorhandene Lager werden wiederverwendet.")
+    parser.add_argument("--ausgabe", help="JSON-Datei für die Ergebnisse (Standard: benchmark_<version>.json)")
+    parser.add_argument("--ohne-tabelle", action="store_true", help="Treeview nicht messen")
+    parser.add_argument("--vergleich", nargs=2, metavar=("ALT", "NEU"), help="zwei Ergebnis-Dateien vergleichen")
+    argumente = parser.parse_args(argv)
+
+    if argumente.vergleich:
+        return vergleichen(*argumente.vergleich)
+
+    version = programm_version()
+    ergebnis = {
+        "version": version,
+        "zeitpunkt": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "journal": datenbank.JOURNAL_MODUS,
+        "system": platform.platform(),
+        "groessen": {},
+    }
+
+    temp = None
+    ordner = argumente.ordner
+    if ordner is None:
+        temp = tempfile.TemporaryDirectory()
+        ordner = temp.name
+    os.makedirs(ordner, exist_ok=True)
+
+    try:
+        for anzahl in argumente.groessen:
+            print(f"\n{anzahl:,} Artikel".replace(",", "."))
+            vorlage = os.path.join(ordner, f"lager_{anzahl}.db")
+            if os.path.exists(vorlage):
+                erzeugen_s = None
+                print("  Lager vorhanden, wird wiederverwendet")
+            else:
+                erzeugen_s = lager_erzeugen(vorlage, anzahl)
+                print(f"  Lager erzeugt in {erzeugen_s:.1f} s")
+
+            # Gemessen wird auf einer Kopie - die Buchungen verändern das Lager
+            pfad = os.path.join(ordner, "messung.db")
+            datenbank.schliessen()
+            quelle = sqlite3.connect(vorlage)
+            ziel = sqlite3.connect(pfad)
+            quelle.backup(ziel)
+            quelle.close()
+            ziel.close()
+
+            datenbank_oeffnen(pfad)
+            messungen = lager_messen(anzahl, ordner, argumente.wiederholungen)
+            if not argumente.ohne_tabelle:
+                messungen.update(tabelle_messen(argumente.wiederholungen) or {})
+            datenbank.schliessen()
+            for endung in ("", "-wal", "-shm"):
+                if os.path.exists(pfad + endung):
+                    os.remove(pfad + endung)
+
+            ergebnis["groessen"][str(anzahl)] = {"erzeugen_s": erzeugen_s, "messungen": messungen}
+    finally:
+        datenbank.schliessen()
+        if temp is not None:
+            temp.cleanup()
+
+    ausgabe = argumente.ausgabe or f"benchmark_{version}.json"
+    with open(ausgabe, "w", encoding="utf-8") as datei:
+        json.dump(ergebnis, datei, ensure_ascii=False, indent=2)
+    print(f"\nErgebnisse gespeichert in {ausgabe}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Benutzer und Passwörter für MediDEPOT (ohne Fenster)
+#Beschreibung: Jede Praxis hat ihre eigenen Benutzer (mit Kürzel) in der Tabelle "benutzer".
+#              Passwörter werden nie im Klartext gespeichert, sondern nur als Hash mit
+#              eigenem Zufalls-Salz. Der Hash wird absichtlich langsam berechnet (scrypt),
+#              damit niemand mit einer gestohlenen Datenbank schnell Passwörter durchprobieren kann.
+#
+# Die Kosten stehen in VERFAHREN (z.B. "scrypt:32768:8:1") und können mit der Umgebungsvariable
+# MEDIDEPOT_KDF geändert werden. "python kommandozeile.py kdf-messen" zeigt, wie lange die
+# Berechnung auf diesem Rechner dauert. Ältere Hashes werden beim nächsten Login auf das
+# aktuelle Verfahren umgestellt.
+
+import hashlib
+import hmac
+import os
+import sqlite3
+import time
+
+import datenbank
+
+
+# Verfahren und Kosten für neue Passwort-Hashes:
+# - scrypt:N:r:p       N = Rechen- und Speicheraufwand (Zweierpotenz), r = Blockgröße, p = parallel
+# - pbkdf2_sha256:R    R = Anzahl Runden (falls Python ohne scrypt gebaut ist)
+# Ziel: Login unter ZIEL_MS auf den Praxis-Rechnern, aber so teuer wie möglich für Angreifer
+if hasattr(hashlib, "scrypt"):
+    STANDARD_VERFAHREN = "scrypt:32768:8:1"
+else:
+    STANDARD_VERFAHREN = "pbkdf2_sha256:600000"
+VERFAHREN = os.environ.get("MEDIDEPOT_KDF", STANDARD_VERFAHREN)
+
+# So lange darf die Anmeldung höchstens dauern (Millisekunden, siehe kdf_messen)
+ZIEL_MS = 250
+
+# Länge von Salz und Hash in Bytes
+SALZ_LAENGE = 16
+HASH_LAENGE = 32
+
+# Neue Passwörter müssen mindestens so lang sein
+MINDESTLAENGE_PASSWORT = 8
+
+# Salz für unbekannte Benutzernamen (siehe anmelden)
+_LEERES_SALZ = bytes(SALZ_LAENGE)
+
+
+class BenutzerFehler(Exception):
+    """Ein Benutzer kann nicht angelegt oder geändert werden (z.B. Name schon vergeben)."""
+
+
+def _ableiten(passwort, salz, verfahren):
+    """Berechnet den Hash von passwort mit salz nach dem Verfahren (z.B. "scrypt:32768:8:1")."""
+    name, *werte = verfahren.split(":")
+    if name == "scrypt":
+        n, r, p = (int(wert) for wert in werte)
+        # maxmem: scrypt braucht 128 * r * n Bytes - etwas Luft lassen (Standard wäre nur 32 MB)
+        return hashlib.scrypt(passwort.encode("utf-8"), salt=salz, n=n, r=r, p=p,
+                              maxmem=256 * r * n, dklen=HASH_LAENGE)
+    if name == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", passwort.encode("utf-8"), salz, int(werte[0]), HASH_LAENGE)
+    raise ValueError(f"Unbekanntes Verfahren: {verfahren}")
+
+def eintragen(cursor, benutzername, passwort, kuerzel):
+    """
+    Speichert einen Benutzer (neu oder mit neuem Passwort) mit frischem Salz.
+    Muss innerhalb einer transaktion() aufgerufen werden.
+    """
+    salz = os.urandom(SALZ_LAENGE)
+    cursor.execute("INSERT OR REPLACE INTO benutzer (benutzername, Kürzel, verfahren, salz, hash) "
+                   "VALUES (?, ?, ?, ?, ?)",
+                   (benutzername, kuerzel, VERFAHREN, salz, _ableiten(passwort, salz, VERFAHREN)))
+
+
+# ANMELDEN
+
+
+def anmelden(benutzername, passwort):
+    """
+    Prüft Benutzername und Passwort.
+    Gibt das Kürzel des Benutzers zurück (kann auch "" sein) - oder None, wenn es nicht stimmt.
+    Der Vergleich dauert immer gleich lang (hmac.compare_digest), und auch für unbekannte
+    Benutzernamen wird ein Hash berechnet - so verrät die Antwortzeit nichts.
+    """
+    benutzername = benutzername.strip()
+    if not benutzername or not passwort:
+        return None
+
+    zeile = datenbank.abfrage_eins("SELECT verfahren, salz, hash, Kürzel FROM benutzer WHERE benutzername = ?",
+                                   (benutzername,))
+    if zeile is None:
+        _ableiten(passwort, _LEERES_SALZ, VERFAHREN)
+        return None
+
+    verfahren, salz, gespeichert, kuerzel = zeile
+    if not hmac.compare_digest(_ableiten(passwort, salz, verfahren), gespeichert):
+        return None
+
+    # Alter Hash (z.B. mit geringeren Kosten)? Jetzt, wo das Passwort bekannt ist, neu berechnen
+    if verfahren != VERFAHREN:
+        try:
+            passwort_aendern(benutzername, passwort, pruefen=False)
+        except sqlite3.OperationalError:
+            pass  # Datenbank gerade gesperrt - beim nächsten Login nochmal
+    return kuerzel
+
+
+# BENUTZER VERWALTEN (z.B. über die Kommandozeile)
+
+
+def benutzer_liste():
+    """Alle Benutzer als Liste von (benutzername, kürzel), nach Namen sortiert."""
+    return datenbank.abfrage("SELECT benutzername, Kürzel FROM benutzer ORDER BY benutzername COLLATE NOCASE")
+
+def _passwort_pruefen(passwort):
+    if len(passwort) < MINDESTLAENGE_PASSWORT:
+        raise BenutzerFehler(f"Das Passwort muss mindestens {MINDESTLAENGE_PASSWORT} Zeichen lang sein")
+
+@datenbank.bei_sperre_wiederholen
+def benutzer_anlegen(benutzername, passwort, kuerzel):
+    """Legt einen neuen Benutzer an. Wirft BenutzerFehler, wenn der Name schon vergeben ist."""
+    benutzername = benutzername.strip()
+    if not benutzername:
+        raise BenutzerFehler("Bitte einen Benutzernamen angeben")
+    _passwort_pruefen(passwort)
+
+    with datenbank.transaktion() as cursor:
+        cursor.execute("SELECT 1 FROM benutzer WHERE benutzername = ?", (benutzername,))
+        if cursor.fetchone() is not None:
+            raise BenutzerFehler(f"Benutzer '{benutzername}' gibt es schon")
+        eintragen(cursor, benutzername, passwort, kuerzel.strip())
+
+@datenbank.bei_sperre_wiederholen
+def passwort_aendern(benutzername, passwort, pruefen=True):
+    """
+    Setzt ein neues Passwort (mit neuem Salz und dem aktuellen Verfahren).
+    pruefen=False: Mindestlänge nicht prüfen (beim Umstellen eines vorhandenen Passworts in anmelden).
+    """
+    if pruefen:
+        _passwort_pruefen(passwort)
+    with datenbank.transaktion() as cursor:
+        cursor.execute("SELECT benutzername, Kürzel FROM benutzer WHERE benutzername = ?", (benutzername.strip(),))
+        zeile = cursor.fetchone()
+        if zeile is None:
+            raise BenutzerFehler(f"Benutzer '{benutzername}' nicht gefunden")
+        eintragen(cursor, zeile[0], passwort, zeile[1])
+
+@datenbank.bei_sperre_wiederholen
+def benutzer_loeschen(benutzername):
+    """Löscht einen Benutzer (z.B. das Demo-Konto, sobald eigene Benutzer angelegt sind)."""
+    with datenbank.transaktion() as cursor:
+        cursor.execute("DELETE FROM benutzer WHERE benutzername = ?", (benutzername.strip(),))
+        if cursor.rowcount == 0:
+            raise BenutzerFehler(f"Benutzer '{benutzername}' nicht gefunden")
+
+
+# KOSTEN MESSEN
+
+
+def kdf_messen(ziel_ms=ZIEL_MS):
+    """
+    Misst, wie lange ein Passwort-Hash auf diesem Rechner dauert (scrypt mit steigendem N,
+    sonst PBKDF2 mit steigenden Runden). Gibt (messungen, empfehlung) zurück:
+    messungen = [(verfahren, millisekunden)], empfehlung = das teuerste Verfahren unter ziel_ms.
+    """
+    if hasattr(hashlib, "scrypt"):
+        kandidaten = [f"scrypt:{2 ** stufe}:8:1" for stufe in range(13, 19)]
+    else:
+        kandidaten = [f"pbkdf2_sha256:{runden}" for runden in (200_000, 400_000, 600_000, 1_000_000, 2_000_000)]
+
+    messungen = []
+    empfehlung = kandidaten[0]
+    for verfahren in kandidaten:
+        start = time.perf_counter()
+        _ableiten("Beispiel-Passwort", os.urandom(SALZ_LAENGE), verfahren)
+        dauer_ms = (time.perf_counter() - start) * 1000
+        messungen.append((verfahren, dauer_ms))
+        if dauer_ms > ziel_ms:
+            break  # noch teurere Stufen sind sicher auch zu langsam
+        empfehlung = verfahren
+    return messungen, empfehlung
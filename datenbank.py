@@ -0,0 +1,443 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Datenbank-Zugriff für MediDEPOT
+#Beschreibung: Eine gemeinsame, dauerhaft offene Verbindung zur praxislager.db,
+#              die von allen Funktionen des Hauptprogramms benutzt wird.
+
+import sqlite3
+import os, sys
+import math
+import threading
+import atexit
+import functools
+import random
+import time
+from contextlib import contextmanager
+
+import diagnose
+
+
+# Name der Datenbank-Datei
+DB_DATEI = "praxislager.db"
+
+# Journal-Modus der Datenbank-Datei, einstellbar mit der Umgebungsvariable MEDIDEPOT_JOURNAL:
+# - DELETE (Standard): funktioniert auch, wenn mehrere Rechner dieselbe Datei auf einem
+#   Netzlaufwerk benutzen. synchronous=FULL, damit ein Stromausfall nichts kaputt macht.
+# - WAL: Lesen und Schreiben blockieren sich nicht gegenseitig, weniger fsyncs, synchronous=NORMAL
+#   reicht. ABER nur für eine Datei auf der Festplatte dieses Rechners: WAL braucht gemeinsamen
+#   Speicher (-shm-Datei), den es über ein Netzlaufwerk nicht gibt - die Datenbank kann kaputtgehen.
+# Ein unbekannter Wert zählt wie DELETE.
+JOURNAL_MODI = {"DELETE": "FULL", "WAL": "NORMAL"}   # Modus -> passendes synchronous
+JOURNAL_MODUS = os.environ.get("MEDIDEPOT_JOURNAL", "DELETE").upper()
+
+# Weitere Einstellungen für SQLite (werden einmal beim Öffnen gesetzt)
+# - cache_size: negativ = Größe in KiB (hier 16 MB Seiten-Cache)
+# - mmap_size: Datenbank bis 256 MB direkt in den Speicher abbilden
+PRAGMAS = [
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+]
+
+# Anzahl vorbereiteter SQL-Befehle, die sqlite3 pro Verbindung zwischenspeichert
+GESPEICHERTE_BEFEHLE = 256
+
+# Mehrere Arbeitsplätze können dieselbe praxislager.db benutzen. Schreibt gerade ein anderer,
+# wartet SQLite bis zu WARTEZEIT_SPERRE Sekunden (busy timeout). Ist die Datenbank danach immer
+# noch gesperrt, wird die ganze Aktion bis zu WIEDERHOLUNGEN mal neu versucht.
+WARTEZEIT_SPERRE = 10
+WIEDERHOLUNGEN = 3
+
+# Die eine gemeinsame Verbindung (wird beim ersten Zugriff geöffnet)
+_verbindung = None
+# Sperre, damit nie zwei Programmteile gleichzeitig dieselbe Verbindung benutzen
+_sperre = threading.RLock()
+
+
+# WICHTIGE FUNKTION: Findet den richtigen Ort für die Datenbank
+def get_writable_path(filename):
+    """
+    Diese Funktion sorgt dafür, dass die Datenbank immer am richtigen Ort gespeichert wird.
+    - Beim Programmieren: im aktuellen Ordner
+    - Als App: im Application Support Ordner (wo Apps ihre Daten speichern dürfen)
+    """
+    if getattr(sys, 'frozen', False):  # Prüft ob es eine gepackte App ist
+        # App-Version: Spezialordner für App-Daten verwenden
+        app_support = os.path.expanduser("~/Library/Application Support/MediDepot")
+        if not os.path.exists(app_support):  # Ordner erstellen falls er nicht existiert
+            os.makedirs(app_support)
+        return os.path.join(app_support, filename)
+    else:
+        # Entwicklungsversion: aktueller Ordner
+        return filename
+
+def verbindung():
+    """
+    Gibt die gemeinsame Datenbank-Verbindung zurück.
+    Beim ersten Aufruf wird sie geöffnet und mit JOURNAL_MODUS und den PRAGMAS eingestellt.
+    Danach wird immer dieselbe Verbindung wiederverwendet.
+    """
+    global _verbindung
+    with _sperre:
+        if _verbindung is None:
+            conn = sqlite3.connect(get_writable_path(DB_DATEI),
+                                   timeout=WARTEZEIT_SPERRE,
+                                   check_same_thread=False,
+                                   cached_statements=GESPEICHERTE_BEFEHLE)
+            modus = JOURNAL_MODUS if JOURNAL_MODUS in JOURNAL_MODI else "DELETE"
+            conn.execute(f"PRAGMA journal_mode = {modus}")   # bleibt in der Datei gespeichert
+            conn.execute(f"PRAGMA synchronous = {JOURNAL_MODI[modus]}")
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            # pow() ist erst in neueren SQLite-Versionen eingebaut (gebraucht in prognose.py)
+            try:
+                conn.execute("SELECT pow(2, 2)")
+            except sqlite3.OperationalError:
+                conn.create_function("pow", 2, math.pow)
+            _verbindung = conn
+        return _verbindung
+
+def schliessen():
+    """Schließt die gemeinsame Verbindung (z.B. beim Beenden des Programms)."""
+    global _verbindung
+    with _sperre:
+        if _verbindung is not None:
+            _verbindung.close()
+            _verbindung = None
+
+# Verbindung beim Beenden automatisch sauber schließen
+atexit.register(schliessen)
+
+def abfrage(sql, parameter=()):
+    """Führt einen SELECT-Befehl aus und gibt alle Ergebnis-Zeilen zurück."""
+    with _sperre, diagnose.messen("SQL", sql) as messung:
+        zeilen = verbindung().execute(sql, parameter).fetchall()
+        messung.zeilen = len(zeilen)
+        return zeilen
+
+def abfrage_eins(sql, parameter=()):
+    """Führt einen SELECT-Befehl aus und gibt nur die erste Zeile zurück (oder None)."""
+    with _sperre, diagnose.messen("SQL", sql):
+        return verbindung().execute(sql, parameter).fetchone()
+
+def abfrage_stueckweise(sql, parameter=(), groesse=1000):
+    """
+    Führt einen SELECT-Befehl aus und liefert die Ergebnisse in Stücken
+    von höchstens groesse Zeilen (über fetchmany).
+    So ist nie die ganze Tabelle gleichzeitig im Speicher.
+    """
+    with _sperre, diagnose.messen("SQL", sql) as messung:
+        cursor = verbindung().execute(sql, parameter)
+        messung.zeilen = 0
+        try:
+            while True:
+                stueck = cursor.fetchmany(groesse)
+                if not stueck:
+                    break
+                messung.zeilen += len(stueck)
+                yield stueck
+        finally:
+            cursor.close()
+
+@contextmanager
+def transaktion():
+    """
+    Führt mehrere Befehle als eine Transaktion aus.
+    Alles wird zusammen gespeichert - oder bei einem Fehler komplett rückgängig gemacht.
+    Die Transaktion beginnt mit BEGIN IMMEDIATE: Sie reserviert das Schreiben sofort, deshalb
+    kann kein anderer Arbeitsplatz zwischen dem Lesen (z.B. Bestand prüfen) und dem Schreiben
+    etwas ändern. Auch CREATE/DROP laufen so in der Transaktion mit.
+
+    Beispiel:
+        with transaktion() as cursor:
+            cursor.execute("UPDATE ...")
+    """
+    with _sperre:
+        conn = verbindung()
+        # Mit eingeschalteter Diagnose wird jeder Befehl in der Transaktion gemessen
+        cursor = conn.cursor(diagnose.MessCursor) if diagnose.AKTIV else conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            yield cursor
+            with diagnose.messen("SQL", "COMMIT"):
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def gesperrt(fehler):
+    """True, wenn der Fehler bedeutet: ein anderer Arbeitsplatz schreibt gerade (SQLITE_BUSY)."""
+    return isinstance(fehler, sqlite3.OperationalError) and "locked" in str(fehler)
+
+def bei_sperre_wiederholen(funktion):
+    """
+    Decorator für Schreib-Aktionen: ist die Datenbank auch nach der Wartezeit noch
+    gesperrt, wird die ganze Funktion nach einer kurzen, zufälligen Pause neu ausgeführt.
+    Die Funktion muss ihre Arbeit in EINER transaktion() machen - dann ist beim Fehler
+    nichts gespeichert und ein neuer Versuch bucht nichts doppelt.
+    """
+    @functools.wraps(funktion)
+    def mit_wiederholung(*args, **kwargs):
+        for versuch in range(1, WIEDERHOLUNGEN + 1):
+            try:
+                return funktion(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not gesperrt(e) or versuch == WIEDERHOLUNGEN:
+                    raise
+            # Zufällige Pause, damit zwei wartende Arbeitsplätze nicht wieder gleichzeitig kommen
+            time.sleep(random.uniform(0.05, 0.2) * versuch)
+    return mit_wiederholung
+
+def ausfuehren(sql, parameter=()):
+    """
+    Führt einen einzelnen INSERT/UPDATE/DELETE-Befehl aus und speichert sofort.
+    Gibt die neue Zeilen-ID (bei INSERT) zurück.
+    """
+    with transaktion() as cursor:
+        cursor.execute(sql, parameter)
+        return cursor.lastrowid
+
+def kompaktieren():
+    """
+    Verkleinert die Datenbank-Datei (VACUUM): der Platz von gelöschten Zeilen wird freigegeben
+    und (im WAL-Modus) die WAL-Datei geleert. Braucht kurz die alleinige Sperre - am besten, wenn niemand arbeitet.
+    """
+    with _sperre:
+        conn = verbindung()
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+# BUCHUNGSJOURNAL
+# Jede Bestandsänderung wird als eigene Zeile in "buchungen" gespeichert (nur anhängen).
+# Der aktuelle Bestand in "artikel" wird von einem Trigger in derselben Transaktion
+# fortgeschrieben - er ist also immer die Summe aller Buchungen eines Artikels.
+
+BUCHUNGEN_SQL = [
+    "CREATE TABLE buchungen("
+    "buchung_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "artikel_id INTEGER NOT NULL, "
+    "menge INTEGER NOT NULL, "          # positiv = Zugang, negativ = Abgang
+    "art TEXT NOT NULL, "               # Zugang, Abgang, Korrektur, Löschung, Anfangsbestand
+    "Kürzel TEXT, "
+    "datum TEXT)",
+    "CREATE INDEX idx_buchungen_artikel ON buchungen(artikel_id, buchung_id)",
+]
+
+TRIGGER_SQL = [
+    # Kein Abgang unter 0 - bricht die ganze Transaktion ab
+    "CREATE TRIGGER buchungen_bestand_pruefen BEFORE INSERT ON buchungen "
+    "WHEN NEW.menge < 0 AND "
+    "(SELECT aktuellerbestand FROM artikel WHERE artikel_id = NEW.artikel_id) + NEW.menge < 0 "
+    "BEGIN SELECT RAISE(ABORT, 'Nicht genug Bestand'); END",
+    # Bestand als Summe der Buchungen fortschreiben
+    "CREATE TRIGGER buchungen_bestand_fortschreiben AFTER INSERT ON buchungen "
+    "BEGIN UPDATE artikel SET aktuellerbestand = aktuellerbestand + NEW.menge "
+    "WHERE artikel_id = NEW.artikel_id; END",
+    # Das Journal darf nur ergänzt, nie geändert oder gelöscht werden
+    "CREATE TRIGGER buchungen_nicht_aendern BEFORE UPDATE ON buchungen "
+    "BEGIN SELECT RAISE(ABORT, 'Buchungen können nicht geändert werden'); END",
+    "CREATE TRIGGER buchungen_nicht_loeschen BEFORE DELETE ON buchungen "
+    "BEGIN SELECT RAISE(ABORT, 'Buchungen können nicht gelöscht werden'); END",
+]
+
+def buchungsjournal_anlegen(cursor):
+    """
+    Legt die Tabelle "buchungen" samt Triggern an, falls sie noch fehlt.
+    Für schon vorhandene Artikel wird der jetzige Bestand als "Anfangsbestand" gebucht
+    (vor dem Anlegen der Trigger, damit er nicht doppelt gezählt wird).
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='buchungen'")
+    if cursor.fetchone() is not None:
+        return
+
+    for sql in BUCHUNGEN_SQL:
+        cursor.execute(sql)
+    cursor.execute("INSERT INTO buchungen (artikel_id, menge, art, Kürzel, datum) "
+                   "SELECT artikel_id, aktuellerbestand, 'Anfangsbestand', Kürzel, datum FROM artikel")
+    for sql in TRIGGER_SQL:
+        cursor.execute(sql)
+
+def buchen(cursor, artikel_id, menge, art, kuerzel, datum):
+    """
+    Schreibt eine Buchung ins Journal. Der Bestand wird dabei vom Trigger angepasst.
+    Muss innerhalb einer transaktion() aufgerufen werden.
+    """
+    cursor.execute("INSERT INTO buchungen (artikel_id, menge, art, Kürzel, datum) VALUES (?, ?, ?, ?, ?)",
+                   (artikel_id, menge, art, kuerzel, datum))
+
+# SUCHINDEX
+# Volltext-Index (FTS5) über Artikelname, Lagerort und Kürzel für die Suche über der Tabelle.
+# Der "trigram"-Tokenizer zerlegt die Texte in Stücke aus 3 Zeichen - so findet die Suche
+# auch Teile eines Wortes ("flast" findet "Pflaster"). Die Texte selbst stehen nur in
+# "artikel" (content=...), der Index wird von Triggern mitgepflegt.
+
+SUCHE_SQL = [
+    "CREATE VIRTUAL TABLE artikel_suche USING fts5("
+    "produktname, lagerort, Kürzel, "
+    "content='artikel', content_rowid='artikel_id', tokenize='trigram')",
+    "CREATE TRIGGER artikel_suche_einfuegen AFTER INSERT ON artikel BEGIN "
+    "INSERT INTO artikel_suche(rowid, produktname, lagerort, Kürzel) "
+    "VALUES (NEW.artikel_id, NEW.produktname, NEW.lagerort, NEW.Kürzel); END",
+    "CREATE TRIGGER artikel_suche_loeschen AFTER DELETE ON artikel BEGIN "
+    "INSERT INTO artikel_suche(artikel_suche, rowid, produktname, lagerort, Kürzel) "
+    "VALUES ('delete', OLD.artikel_id, OLD.produktname, OLD.lagerort, OLD.Kürzel); END",
+    # Nur bei geänderten Texten - Bestandsbuchungen lassen den Index in Ruhe
+    "CREATE TRIGGER artikel_suche_aendern AFTER UPDATE OF produktname, lagerort, Kürzel ON artikel BEGIN "
+    "INSERT INTO artikel_suche(artikel_suche, rowid, produktname, lagerort, Kürzel) "
+    "VALUES ('delete', OLD.artikel_id, OLD.produktname, OLD.lagerort, OLD.Kürzel); "
+    "INSERT INTO artikel_suche(rowid, produktname, lagerort, Kürzel) "
+    "VALUES (NEW.artikel_id, NEW.produktname, NEW.lagerort, NEW.Kürzel); END",
+]
+
+def artikelsuche_anlegen(cursor):
+    """
+    Legt den Suchindex "artikel_suche" samt Triggern an, falls er noch fehlt,
+    und füllt ihn einmal mit allen vorhandenen Artikeln.
+    Gibt False zurück, wenn SQLite kein FTS5/trigram kann (dann sucht das Programm ohne Index).
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='artikel_suche'")
+    if cursor.fetchone() is not None:
+        return True
+
+    try:
+        cursor.execute(SUCHE_SQL[0])
+    except sqlite3.OperationalError:
+        return False  # z.B. sehr alte SQLite-Version ohne trigram-Tokenizer
+    for sql in SUCHE_SQL[1:]:
+        cursor.execute(sql)
+    cursor.execute("INSERT INTO artikel_suche(artikel_suche) VALUES ('rebuild')")
+    return True
+
+# ÄNDERUNGSPROTOKOLL
+# Damit ein Arbeitsplatz sieht, was andere geändert haben, bekommt jeder Artikel bei jeder
+# Änderung (neu, geändert, gelöscht) eine fortlaufende Nummer in "aenderungen".
+# Pro Artikel gibt es nur eine Zeile - die Tabelle wächst also nicht mit jeder Buchung.
+
+# Neue Nummer = höchste Nummer + 1 (über den Index, also ohne die Tabelle zu lesen).
+# Ein "INSERT ... ON CONFLICT DO UPDATE" statt "INSERT OR REPLACE": ein OR REPLACE im Trigger
+# würde von einem äußeren Upsert (lager.ARTIKEL_UPSERT_SQL) mit ABORT überstimmt.
+_AENDERUNG_MERKEN = ("INSERT INTO aenderungen(artikel_id, nummer) "
+                     "SELECT {}.artikel_id, IFNULL(MAX(nummer), 0) + 1 FROM aenderungen WHERE true "
+                     "ON CONFLICT(artikel_id) DO UPDATE SET nummer = excluded.nummer; END")
+
+AENDERUNGEN_TRIGGER_SQL = [
+    "CREATE TRIGGER artikel_geaendert_einfuegen AFTER INSERT ON artikel BEGIN "
+    + _AENDERUNG_MERKEN.format("NEW"),
+    # Auch jede Buchung ändert den Artikel (aktuellerbestand) und landet damit hier
+    "CREATE TRIGGER artikel_geaendert_aendern AFTER UPDATE ON artikel BEGIN "
+    + _AENDERUNG_MERKEN.format("NEW"),
+    "CREATE TRIGGER artikel_geaendert_loeschen AFTER DELETE ON artikel BEGIN "
+    + _AENDERUNG_MERKEN.format("OLD"),
+]
+
+AENDERUNGEN_SQL = [
+    "CREATE TABLE aenderungen("
+    "artikel_id INTEGER PRIMARY KEY, "
+    "nummer INTEGER NOT NULL)",
+    "CREATE INDEX idx_aenderungen_nummer ON aenderungen(nummer)",
+] + AENDERUNGEN_TRIGGER_SQL
+
+def aenderungsprotokoll_anlegen(cursor):
+    """Legt die Tabelle "aenderungen" samt Triggern an, falls sie noch fehlt."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='aenderungen'")
+    if cursor.fetchone() is not None:
+        return
+    for sql in AENDERUNGEN_SQL:
+        cursor.execute(sql)
+
+def aenderungen_trigger_erneuern(cursor):
+    """Legt die Trigger des Änderungsprotokolls neu an (ältere Datenbanken hatten INSERT OR REPLACE)."""
+    for sql in AENDERUNGEN_TRIGGER_SQL:
+        name = sql.split()[2]
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(sql)
+
+def datenversion():
+    """
+    Zahl, die sich ändert, sobald eine ANDERE Verbindung (z.B. ein anderer Arbeitsplatz)
+    etwas in der Datenbank gespeichert hat. Eigene Änderungen zählen nicht mit.
+    """
+    return abfrage_eins("PRAGMA data_version")[0]
+
+# BENUTZER
+# Anmeldung mit eigenen Benutzern pro Praxis. Gespeichert wird nur ein Hash des Passworts
+# (mit Salz und Verfahren, siehe benutzer.py), nie das Passwort selbst.
+
+BENUTZER_SQL = (
+    "CREATE TABLE benutzer("
+    "benutzername TEXT PRIMARY KEY COLLATE NOCASE, "
+    "Kürzel TEXT NOT NULL DEFAULT '', "
+    "verfahren TEXT NOT NULL, "         # z.B. scrypt:32768:8:1
+    "salz BLOB NOT NULL, "
+    "hash BLOB NOT NULL)"
+)
+
+def benutzertabelle_anlegen(cursor):
+    """Legt die Tabelle "benutzer" an, falls sie noch fehlt. Gibt True zurück, wenn sie neu ist."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='benutzer'")
+    if cursor.fetchone() is not None:
+        return False
+    cursor.execute(BENUTZER_SQL)
+    return True
+
+# VERBRAUCH (für die Prognose, siehe prognose.py)
+# Pro Artikel der geglättete Verbrauch pro Tag. Er wird nur mit den neuen Buchungen seit dem
+# letzten Mal fortgeschrieben - bis zu welcher Buchung, steht in der einzigen Zeile von
+# "verbrauch_stand".
+
+VERBRAUCH_SQL = [
+    "CREATE TABLE verbrauch("
+    "artikel_id INTEGER PRIMARY KEY, "
+    "rate REAL NOT NULL, "              # geglätteter Verbrauch pro Tag am Tag "stand"
+    "stand TEXT NOT NULL, "             # ISO-Datum, bis zu dem gerechnet ist
+    "erster TEXT NOT NULL)",            # erster Tag mit Verbrauch
+    "CREATE TABLE verbrauch_stand("
+    "nur_eine INTEGER PRIMARY KEY CHECK (nur_eine = 1), "
+    "buchung_id INTEGER NOT NULL)",     # bis hierher sind die Buchungen eingerechnet
+    "INSERT INTO verbrauch_stand VALUES (1, 0)",
+]
+
+def verbrauchstabelle_anlegen(cursor):
+    """Legt die Tabellen "verbrauch" und "verbrauch_stand" an, falls sie noch fehlen."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='verbrauch'")
+    if cursor.fetchone() is not None:
+        return
+    for sql in VERBRAUCH_SQL:
+        cursor.execute(sql)
+
+# MIGRATIONEN
+# Der Stand des Schemas steht in der Datenbank-Datei selbst (PRAGMA user_version).
+# Jeder Migrations-Schritt hebt ihn um 1. Neue Tabellen, Spalten oder Indexe kommen als
+# neuer Schritt ans Ende der Liste (lager.MIGRATIONEN) - vorhandene Daten bleiben erhalten.
+
+def schema_version():
+    """Gibt den Stand des Schemas zurück (0 = neue oder sehr alte Datenbank)."""
+    return abfrage_eins("PRAGMA user_version")[0]
+
+def migrieren(schritte):
+    """
+    Bringt die Datenbank auf den neuesten Stand. schritte ist eine Liste von
+    Funktionen(cursor); Schritt Nr. 1 ist schritte[0] usw.
+    Jeder fehlende Schritt läuft zusammen mit dem Hochzählen von user_version in einer
+    eigenen Transaktion - bricht er ab, bleibt die Datenbank auf dem letzten Stand.
+    Ist die Datenbank schon aktuell, kostet das nur ein einziges PRAGMA-Lesen.
+    Gibt die Anzahl der ausgeführten Schritte zurück.
+    """
+    if schema_version() >= len(schritte):
+        return 0  # aktuell (oder von einer neueren Programmversion - dann nichts anfassen)
+
+    ausgefuehrt = 0
+    with _sperre:
+        while True:
+            with transaktion() as cursor:
+                # Startet ein zweiter Rechner gleichzeitig, wartet er hier (BEGIN IMMEDIATE)
+                # und sieht danach schon den neuen Stand
+                version = cursor.execute("PRAGMA user_version").fetchone()[0]
+                if version >= len(schritte):
+                    break
+                schritte[version](cursor)
+                cursor.execute(f"PRAGMA user_version = {version + 1}")
+            ausgefuehrt += 1
+    return ausgefuehrt
@@ -2,7 +2,11 @@
 #Datum:28.05.25
 #Inhalt: Datenbank von Lagerverwaltung (PyInstaller-kompatibel)
 
-import os, sys, sqlite3
+import os, sys
+
+import benutzer
+import datenbank
+import lager
 
 def get_resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -29,78 +33,75 @@ def get_writable_path(filename):
 # Datenbankpfad festlegen
 db_path = get_writable_path("praxislager.db")
 
-# Datenbank löschen falls vorhanden (für Neustart)
-if os.path.exists(db_path):
+# Nur mit "--neu" wird eine vorhandene Datenbank gelöscht (alle Daten sind dann weg!).
+# Ohne "--neu" wird sie behalten und nur auf den neuesten Stand gebracht.
+if "--neu" in sys.argv and os.path.exists(db_path):
     print("Alte Datenbank wird gelöscht...")
-    os.remove(db_path)
+    for endung in ("", "-wal", "-shm"):  # -wal / -shm: Hilfsdateien vom WAL-Modus
+        if os.path.exists(db_path + endung):
+            os.remove(db_path + endung)
 
-print("Neue Datenbank wird erstellt...")
 print(f"Datenbankpfad: {db_path}")
 
-# Neue Datenbank erstellen
-connection = sqlite3.connect(db_path)
-cursor = connection.cursor()
-
-# Tabelle erstellen
-sql = "CREATE TABLE artikel(" \
-      "artikel_id INTEGER PRIMARY KEY AUTOINCREMENT, " \
-      "produktname TEXT, " \
-      "aktuellerbestand INTEGER, " \
-      "mindestbestand INTEGER, " \
-      "einheit TEXT, " \
-      "lagerort TEXT, " \
-      "datum TEXT, " \
-      "Kürzel TEXT)"
-cursor.execute(sql)
-
-print("Tabelle 'artikel' erstellt...")
-
-# Liste mit Artikeln für die Praxis
+# Tabellen, Indexe usw. kommen aus den Migrations-Schritten in lager.py (gleich wie beim Programmstart)
+lager.erstelle_datenbank_falls_nicht_vorhanden()
+print(f"Schema-Version: {datenbank.schema_version()}")
+
+# Liste mit Artikeln für die Praxis (Datum im ISO-Format JJJJ-MM-TT, angezeigt wird TT.MM.JJJJ)
 artikel = [
-    ('Latexhandschuhe', 60, 10, 'Packung', 'Labor', '28.05.2025', 'MS'),
-    ('Mullbinde 6cm', 18, 8, 'Packung', 'Labor', '29.05.2025', 'AB'),
-    ('Desinfektionsmittel', 25, 5, 'Liter', 'Lager A', '30.05.2025', 'TK'),
-    ('Einmalspritzen 5ml', 120, 20, 'Packung', 'Labor', '31.05.2025', 'MS'),
-    ('Gelbe Kanüle', 6, 5, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('Urbason 1000mg', 3, 2, 'Stück', 'Medikamentenschrank', '01.06.2025', 'EG'),
-    ('Xyclocain Pump', 1, 1, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('Mullkompresse 10x10', 2, 3, 'Packung', 'Labor', '01.06.2025', 'EG'),
-    ('Optiskin', 2, 1, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('Leukase Puder', 1, 1, 'Stück', 'Medikamentenschrank', '01.06.2025', 'EG'),
-    ('Skalpell 15 REF', 3, 2, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('ES-Kompressen 5cmx5cm', 2, 3, 'Packung', 'Labor', '01.06.2025', 'EG'),
-    ('ALK Lancet', 2, 2, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('DracoFixiermull', 1, 1, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('Fixomull 10cmx10cm', 8, 3, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('Fucidine Creme 100g', 8, 2, 'Stück', 'Medikamentenschrank', '01.06.2025', 'EG'),
-    ('Fucicort Creme 60g', 11, 3, 'Stück', 'Medikamentenschrank', '01.06.2025', 'EG'),
-    ('BetaGalen Creme 100g', 6, 2, 'Stück', 'Medikamentenschrank', '01.06.2025', 'EG'),
-    ('Leukoplast Pflaster 8cmx5m', 4, 2, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('Leukoplast Pflaster 4cmx5m', 5, 2, 'Stück', 'Labor', '01.06.2025', 'EG'),
-    ('Leukoplast Pflaster 6cmx5m', 3, 2, 'Stück', 'Labor', '01.06.2025', 'EG')
+    ('Latexhandschuhe', 60, 10, 'Packung', 'Labor', '2025-05-28', 'MS'),
+    ('Mullbinde 6cm', 18, 8, 'Packung', 'Labor', '2025-05-29', 'AB'),
+    ('Desinfektionsmittel', 25, 5, 'Liter', 'Lager A', '2025-05-30', 'TK'),
+    ('Einmalspritzen 5ml', 120, 20, 'Packung', 'Labor', '2025-05-31', 'MS'),
+    ('Gelbe Kanüle', 6, 5, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('Urbason 1000mg', 3, 2, 'Stück', 'Medikamentenschrank', '2025-06-01', 'EG'),
+    ('Xyclocain Pump', 1, 1, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('Mullkompresse 10x10', 2, 3, 'Packung', 'Labor', '2025-06-01', 'EG'),
+    ('Optiskin', 2, 1, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('Leukase Puder', 1, 1, 'Stück', 'Medikamentenschrank', '2025-06-01', 'EG'),
+    ('Skalpell 15 REF', 3, 2, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('ES-Kompressen 5cmx5cm', 2, 3, 'Packung', 'Labor', '2025-06-01', 'EG'),
+    ('ALK Lancet', 2, 2, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('DracoFixiermull', 1, 1, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('Fixomull 10cmx10cm', 8, 3, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('Fucidine Creme 100g', 8, 2, 'Stück', 'Medikamentenschrank', '2025-06-01', 'EG'),
+    ('Fucicort Creme 60g', 11, 3, 'Stück', 'Medikamentenschrank', '2025-06-01', 'EG'),
+    ('BetaGalen Creme 100g', 6, 2, 'Stück', 'Medikamentenschrank', '2025-06-01', 'EG'),
+    ('Leukoplast Pflaster 8cmx5m', 4, 2, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('Leukoplast Pflaster 4cmx5m', 5, 2, 'Stück', 'Labor', '2025-06-01', 'EG'),
+    ('Leukoplast Pflaster 6cmx5m', 3, 2, 'Stück', 'Labor', '2025-06-01', 'EG')
 ]
 
-print("Artikel werden eingefügt...")
+# Beispieldaten nur in eine leere Datenbank einfügen - vorhandene Artikel bleiben unberührt
+if datenbank.abfrage_eins("SELECT COUNT(*) FROM artikel")[0] == 0:
+    print("Artikel werden eingefügt...")
 
-# Alle Artikel auf einmal einfügen
-cursor.executemany("""
-INSERT INTO artikel (produktname, aktuellerbestand, mindestbestand, einheit, lagerort, datum, Kürzel)
-VALUES (?, ?, ?, ?, ?, ?, ?)
-""", artikel)
+    # Alle Artikel in einer Transaktion einfügen, der Bestand wird als "Anfangsbestand" gebucht
+    with datenbank.transaktion() as cursor:
+        for name, bestand, mindest, einheit, ort, datum, kuerzel in artikel:
+            cursor.execute("""
+            INSERT INTO artikel (produktname, aktuellerbestand, mindestbestand, einheit, lagerort, datum, Kürzel)
+            VALUES (?, 0, ?, ?, ?, ?, ?)
+            """, (name, mindest, einheit, ort, datum, kuerzel))
+            datenbank.buchen(cursor, cursor.lastrowid, bestand, "Anfangsbestand", kuerzel, datum)
+else:
+    print("Datenbank enthält schon Artikel - es werden keine Beispieldaten eingefügt.")
 
-# Änderungen speichern
-connection.commit()
+# Kontrolle: Anzahl der Artikel anzeigen
+anzahl = datenbank.abfrage_eins("SELECT COUNT(*) FROM artikel")[0]
+print(f" {anzahl} Artikel in der Datenbank!")
 
-# Kontrolle: Anzahl eingefügter Artikel anzeigen
-cursor.execute("SELECT COUNT(*) FROM artikel")
-anzahl = cursor.fetchone()[0]
-print(f" {anzahl} Artikel erfolgreich eingefuegt!")
+# Gibt es nur das Demo-Konto? Dann daran erinnern, eigene Benutzer anzulegen
+nur_demo = [name for name, _ in benutzer.benutzer_liste()] == ["demo"]
 
 # Verbindung schließen
-connection.close()
+datenbank.schliessen()
 
 print(" Datenbank erfolgreich erstellt: praxislager.db")
 print(" Jetzt kannst du dein Hauptprogramm starten!")
+if nur_demo:
+    print(" Anmelden mit Benutzer demo / Passwort demo123 - eigene Benutzer anlegen mit")
+    print("   python kommandozeile.py benutzer-anlegen NAME KÜRZEL")
 
 # Funktion zum Exportieren des Datenbankpfads (für andere Module)
 def get_database_path():
@@ -0,0 +1,191 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Diagnose (Zeitmessung) für MediDEPOT
+#Beschreibung: Misst, wo die Zeit bleibt, wenn das Programm "hängt": SQL-Befehle (mit Zeilenanzahl),
+#              Aufträge im Hintergrund-Thread, Wartezeit in der Warteschlange, Aufbau der Tabelle
+#              und blockierte Fenster. Die Messungen landen in einem Ringpuffer (die letzten
+#              MAX_EINTRAEGE), der im Fenster "Diagnose" angezeigt oder in eine Datei geschrieben wird.
+#
+# Einschalten mit der Umgebungsvariable MEDIDEPOT_DIAGNOSE=1, z.B.
+#   MEDIDEPOT_DIAGNOSE=1 python medidepot.py
+#   MEDIDEPOT_DIAGNOSE=1 MEDIDEPOT_DIAGNOSE_DATEI=diagnose.log python medidepot.py   # beim Beenden speichern
+#
+# Ausgeschaltet kostet es (fast) nichts: gemessen() gibt die Funktion unverändert zurück
+# und messen() ein leeres Objekt, das nichts misst.
+
+import atexit
+import functools
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+# Zeitpunkt, ab dem die Startzeit gezählt wird (erster Import, also Programmstart)
+START = time.perf_counter()
+
+# Eingeschaltet? (wird einmal beim Programmstart gelesen)
+AKTIV = os.environ.get("MEDIDEPOT_DIAGNOSE", "") not in ("", "0")
+# Optional: Datei, in die beim Beenden alle Messungen geschrieben werden
+LOG_DATEI = os.environ.get("MEDIDEPOT_DIAGNOSE_DATEI", "")
+
+# Größe des Ringpuffers - ältere Messungen fallen automatisch heraus
+MAX_EINTRAEGE = 5000
+
+# Ab so vielen Millisekunden gilt das Fenster als blockiert (siehe medidepot.diagnose_herzschlag)
+BLOCKIERT_MS = 50
+
+# Ein Eintrag: (Uhrzeit, Thread, Art, Name, Dauer in ms, Zeilen oder None)
+# deque.append ist thread-sicher, deshalb braucht der Puffer keine eigene Sperre
+_eintraege = deque(maxlen=MAX_EINTRAEGE)
+
+
+def eintragen(art, name, dauer_ms, zeilen=None):
+    """
+    Speichert eine Messung im Ringpuffer. art z.B. "SQL", "Auftrag", "Tk", "Export".
+    name ist ein Text (z.B. der SQL-Befehl) oder eine Funktion - dann wird ihr Name gespeichert.
+    """
+    if callable(name):
+        name = f"{getattr(name, '__module__', '')}.{getattr(name, '__qualname__', name)}"
+    _eintraege.append((time.time(), threading.current_thread().name, art, name, dauer_ms, zeilen))
+
+
+def seit_start(name):
+    """Merkt sich, wie viele Millisekunden seit dem Programmstart vergangen sind (Art "Start")."""
+    if AKTIV:
+        eintragen("Start", name, (time.perf_counter() - START) * 1000)
+
+
+class _Messung:
+    """
+    Misst die Zeit in einem with-Block. Die Zeilenanzahl kann im Block gesetzt werden:
+        with messen("SQL", sql) as messung:
+            messung.zeilen = len(ergebnis)
+    """
+    __slots__ = ("art", "name", "zeilen", "_start")
+
+    def __init__(self, art, name):
+        self.art = art
+        self.name = name
+        self.zeilen = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *fehler):
+        eintragen(self.art, self.name, (time.perf_counter() - self._start) * 1000, self.zeilen)
+        return False
+
+
+class _KeineMessung:
+    """Steht für _Messung, wenn die Diagnose aus ist - macht gar nichts."""
+    zeilen = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *fehler):
+        return False
+
+
+_AUS = _KeineMessung()
+
+
+def messen(art, name):
+    """Für einen with-Block: misst die Zeit bis zum Ende des Blocks (nur wenn AKTIV)."""
+    if not AKTIV:
+        return _AUS
+    return _Messung(art, name)
+
+
+def gemessen(art, name=None):
+    """
+    Decorator: misst jeden Aufruf der Funktion. Ohne name wird der Funktionsname benutzt.
+    Wichtig: Ist die Diagnose beim Start aus, bleibt die Funktion ganz unverändert.
+    """
+    def decorator(funktion):
+        if not AKTIV:
+            return funktion
+        @functools.wraps(funktion)
+        def mit_messung(*args, **kwargs):
+            with _Messung(art, name or funktion):
+                return funktion(*args, **kwargs)
+        return mit_messung
+    return decorator
+
+
+class MessCursor(sqlite3.Cursor):
+    """
+    Cursor, der jeden SQL-Befehl misst (wird von datenbank.transaktion() nur bei AKTIV benutzt).
+    Die Zeilenanzahl ist bei INSERT/UPDATE/DELETE die Zahl der geänderten Zeilen.
+    """
+
+    def execute(self, sql, parameter=()):
+        with _Messung("SQL", sql) as messung:
+            super().execute(sql, parameter)
+            if self.rowcount >= 0:
+                messung.zeilen = self.rowcount
+        return self
+
+    def executemany(self, sql, parameter):
+        with _Messung("SQL", sql) as messung:
+            super().executemany(sql, parameter)
+            if self.rowcount >= 0:
+                messung.zeilen = self.rowcount
+        return self
+
+
+# AUSWERTEN
+
+
+def eintraege():
+    """Kopie aller gespeicherten Messungen (älteste zuerst)."""
+    return list(_eintraege)
+
+def leeren():
+    _eintraege.clear()
+
+def kurzname(name, laenge=120):
+    """SQL-Befehle auf eine Zeile ohne doppelte Leerzeichen kürzen (für Anzeige und Datei)."""
+    name = " ".join(str(name).split())
+    return name if len(name) <= laenge else name[:laenge - 1] + "…"
+
+def zusammenfassung():
+    """
+    Fasst die Messungen pro (Art, Name) zusammen, die teuersten zuerst.
+    Gibt eine Liste von (art, name, anzahl, gesamt_ms, max_ms, zeilen) zurück.
+    """
+    gruppen = {}
+    for _, _, art, name, dauer_ms, zeilen in eintraege():
+        gruppe = gruppen.setdefault((art, name), [0, 0.0, 0.0, 0])
+        gruppe[0] += 1
+        gruppe[1] += dauer_ms
+        gruppe[2] = max(gruppe[2], dauer_ms)
+        gruppe[3] += zeilen or 0
+    ergebnis = [(art, name, anzahl, gesamt, maximum, zeilen)
+                for (art, name), (anzahl, gesamt, maximum, zeilen) in gruppen.items()]
+    ergebnis.sort(key=lambda eintrag: eintrag[3], reverse=True)
+    return ergebnis
+
+def speichern(pfad):
+    """Schreibt Zusammenfassung und alle Messungen als Textdatei (z.B. zum Mitschicken an den Support)."""
+    with open(pfad, "w", encoding="utf-8") as datei:
+        datei.write(f"MediDEPOT Diagnose vom {datetime.now():%d.%m.%Y %H:%M:%S}\n\n")
+        datei.write("ZUSAMMENFASSUNG (teuerste zuerst)\n")
+        datei.write(f"{'Art':<8} {'Anzahl':>7} {'Gesamt ms':>11} {'Max ms':>9} {'Zeilen':>9}  Name\n")
+        for art, name, anzahl, gesamt, maximum, zeilen in zusammenfassung():
+            datei.write(f"{art:<8} {anzahl:>7} {gesamt:>11.1f} {maximum:>9.1f} {zeilen:>9}  {kurzname(name)}\n")
+
+        datei.write("\nALLE MESSUNGEN (älteste zuerst)\n")
+        for zeitpunkt, thread, art, name, dauer_ms, zeilen in eintraege():
+            uhrzeit = datetime.fromtimestamp(zeitpunkt).strftime("%H:%M:%S.%f")[:-3]
+            datei.write(f"{uhrzeit} {thread:<18} {art:<8} {dauer_ms:>9.2f} ms "
+                        f"{'' if zeilen is None else zeilen:>7}  {kurzname(name, 300)}\n")
+
+
+# Beim Beenden automatisch speichern, wenn eine Datei angegeben ist
+if AKTIV and LOG_DATEI:
+    atexit.register(speichern, LOG_DATEI)
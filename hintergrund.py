@@ -0,0 +1,107 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Hintergrund-Arbeiter für MediDEPOT
+#Beschreibung: Führt Datenbank- und Datei-Arbeiten in einem eigenen Thread aus,
+#              damit das Fenster währenddessen nicht einfriert.
+
+import threading
+import queue
+import time
+
+import diagnose
+
+
+class DatenbankArbeiter:
+    """
+    Ein einzelner Hintergrund-Thread mit einer Warteschlange für Aufträge.
+
+    - auftrag() legt eine Funktion in die Warteschlange (wird sofort zurückgegeben).
+    - Der Thread arbeitet die Aufträge nacheinander ab (Reihenfolge bleibt erhalten).
+    - Die Ergebnisse werden über fenster.after() im Tk-Thread abgeholt und dort an
+      die Rückruf-Funktionen (fertig / fehler) übergeben. Nur dort darf Tk benutzt werden.
+    - Solange ein Auftrag läuft, zeigt besetzt(True) das an - außer bei Aufträgen mit
+      anzeigen=False (z.B. regelmäßige Abfragen, die sonst ständig blinken würden).
+    """
+
+    def __init__(self, fenster, besetzt=None, fehler_standard=None, intervall=20):
+        self.fenster = fenster
+        self.besetzt = besetzt                  # Funktion(True/False) für die Besetzt-Anzeige
+        self.fehler_standard = fehler_standard  # Funktion(fehler) falls kein eigener Rückruf
+        self.intervall = intervall              # Millisekunden zwischen zwei Abholungen
+
+        self._auftraege = queue.Queue()
+        self._ergebnisse = queue.Queue()
+        self._offen = 0                         # Aufträge, deren Ergebnis noch nicht abgeholt wurde
+        self._angezeigt = 0                     # davon die, die in der Besetzt-Anzeige zählen
+        self._abholen_geplant = False
+
+        self._thread = threading.Thread(target=self._arbeiten, name="DatenbankArbeiter", daemon=True)
+        self._thread.start()
+
+    def auftrag(self, funktion, *argumente, fertig=None, fehler=None, anzeigen=True):
+        """
+        Führt funktion(*argumente) im Hintergrund aus.
+        Danach wird im Tk-Thread fertig(ergebnis) bzw. fehler(exception) aufgerufen.
+        anzeigen=False: der Auftrag schaltet die Besetzt-Anzeige nicht ein.
+        """
+        self._offen += 1
+        if anzeigen:
+            self._angezeigt += 1
+            if self._angezeigt == 1 and self.besetzt:
+                self.besetzt(True)
+        self._auftraege.put((funktion, argumente, fertig, fehler, anzeigen, time.perf_counter()))
+        self._abholen_planen()
+
+    def _arbeiten(self):
+        """Läuft im Hintergrund-Thread: Aufträge nacheinander ausführen."""
+        while True:
+            funktion, argumente, fertig, fehler, anzeigen, eingereiht = self._auftraege.get()
+            if diagnose.AKTIV:
+                # Wie lange der Auftrag hinter anderen warten musste (z.B. hinter einem Export)
+                diagnose.eintragen("Warten", funktion, (time.perf_counter() - eingereiht) * 1000)
+            try:
+                with diagnose.messen("Auftrag", funktion):
+                    ergebnis = funktion(*argumente)
+            except Exception as e:
+                self._ergebnisse.put((fehler or self.fehler_standard, e, True, anzeigen))
+            else:
+                self._ergebnisse.put((fertig, ergebnis, True, anzeigen))
+
+    def melden(self, rueckruf, wert):
+        """
+        Darf aus dem Hintergrund-Thread aufgerufen werden, während ein Auftrag läuft
+        (z.B. für einen Fortschrittsbalken). rueckruf(wert) läuft dann im Tk-Thread.
+        """
+        self._ergebnisse.put((rueckruf, wert, False, False))
+
+    def _abholen_planen(self):
+        # Nur abfragen solange noch Aufträge offen sind
+        if not self._abholen_geplant:
+            self._abholen_geplant = True
+            self.fenster.after(self.intervall, self._abholen)
+
+    def _abholen(self):
+        """Läuft im Tk-Thread: fertige Ergebnisse an die Rückruf-Funktionen übergeben."""
+        self._abholen_geplant = False
+        while True:
+            try:
+                rueckruf, wert, erledigt, angezeigt = self._ergebnisse.get_nowait()
+            except queue.Empty:
+                break
+            if erledigt:
+                self._offen -= 1
+            if angezeigt:
+                self._angezeigt -= 1
+                if self._angezeigt == 0 and self.besetzt:
+                    self.besetzt(False)
+            try:
+                if rueckruf:
+                    with diagnose.messen("Tk", rueckruf):
+                        rueckruf(wert)
+            except Exception as e:
+                # Fehler im Rückruf dürfen die Abholung nicht stoppen
+                if self.fehler_standard:
+                    self.fehler_standard(e)
+
+        if self._offen > 0:
+            self._abholen_planen()
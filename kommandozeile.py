@@ -0,0 +1,309 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Kommandozeile für MediDEPOT
+#Beschreibung: Lager-Arbeiten ohne Fenster ausführen, z.B. für nächtliche Jobs
+#              auf einem Server ohne Bildschirm. Benutzt dieselben Funktionen
+#              wie das Hauptprogramm (lager.py).
+#
+# Beispiele:
+#   python kommandozeile.py liste --niedrig
+#   python kommandozeile.py zugang "Einmalhandschuhe M" 100 Packung Schrank1 EG
+#   python kommandozeile.py abgang "Einmalhandschuhe M" 3 EG
+#   python kommandozeile.py export inventur.csv --lagerort Schrank1
+#   python kommandozeile.py liste --von 01.05.2025 --bis 31.05.2025
+#   python kommandozeile.py aendern 17 --code -04114918      # Barcode (PZN) für den Scanner
+#   python kommandozeile.py import-zugaenge lieferung.csv
+#   python kommandozeile.py bestellvorschlag --lieferzeit 14   # was sollte bestellt werden?
+#   python kommandozeile.py kompaktieren                      # Datenbank-Datei verkleinern
+#   python kommandozeile.py benutzer-anlegen mueller EM       # fragt nach dem Passwort
+#   python kommandozeile.py kdf-messen                        # Kosten für Passwort-Hashes prüfen
+
+import argparse
+import getpass
+import os
+import sys
+
+import benutzer
+import datenbank
+import lager
+import prognose
+import sammelimport
+
+
+# BEFEHLE (jeder Befehl bekommt die gelesenen Argumente und gibt den Exit-Code zurück)
+
+
+def liste(argumente):
+    """Gibt die Artikel als CSV (Semikolon getrennt) auf dem Bildschirm aus."""
+    lager.inventur_csv_schreiben(sys.stdout, argumente.niedrig, argumente.lagerort,
+                                 von=argumente.von, bis=argumente.bis)
+    return 0
+
+def nachbestellliste(argumente):
+    """Gibt alle Artikel mit niedrigem Bestand aus."""
+    for artikel_id, name, bestand, mindest, einheit, lagerort in lager.niedrige_bestaende_laden():
+        print(f"{artikel_id}: {name}: {bestand} {einheit} (Minimum: {mindest}, Lagerort: {lagerort})")
+    return 0
+
+def bestellvorschlag(argumente):
+    """Gibt die Bestellvorschläge aus der Verbrauchsprognose aus (die dringendsten zuerst)."""
+    if argumente.neu:
+        prognose.neu_berechnen()
+    for (artikel_id, name, bestand, mindest, einheit, lagerort,
+         pro_tag, tage_bis_leer, menge) in prognose.bestellvorschlaege(argumente.lieferzeit, argumente.reichweite,
+                                                                      alle=argumente.alle):
+        reicht = f"reicht {tage_bis_leer:.0f} Tage" if tage_bis_leer is not None else "kein Verbrauch"
+        print(f"{artikel_id}: {name}: {bestand} {einheit} (Minimum: {mindest}, Lagerort: {lagerort}) - "
+              f"{pro_tag:g} pro Tag, {reicht} - Vorschlag: {menge} {einheit}")
+    return 0
+
+def zugang(argumente):
+    neue_id = lager.zugang_speichern(argumente.name, argumente.anzahl, argumente.einheit,
+                                     argumente.lagerort, argumente.kuerzel, argumente.datum)
+    print(f"Zugang gebucht (ID {neue_id})")
+    return 0
+
+def abgang(argumente):
+    artikel_id = lager.abgang_buchen(argumente.name, argumente.anzahl, argumente.kuerzel, argumente.datum,
+                                     argumente.einheit, argumente.lagerort)
+    print(f"Abgang gebucht (ID {artikel_id})")
+    return 0
+
+def aendern(argumente):
+    """
+    Ändert einzelne Felder eines Artikels. Nicht angegebene Felder bleiben wie sie sind -
+    auch wenn ein anderer Arbeitsplatz sie gerade ändert (alt = gelesene Zeile).
+    """
+    zeile = lager.artikel_zeilen_laden([argumente.id]).get(argumente.id)
+    if zeile is None:
+        raise lager.BuchungsFehler(f"Artikel mit ID {argumente.id} nicht gefunden!")
+
+    _, name, bestand, mindest, einheit, lagerort, kuerzel, _ = zeile
+    lager.artikel_aendern(argumente.id,
+                          argumente.name if argumente.name is not None else name,
+                          argumente.bestand if argumente.bestand is not None else bestand,
+                          argumente.mindestbestand if argumente.mindestbestand is not None else mindest,
+                          argumente.einheit if argumente.einheit is not None else einheit,
+                          argumente.lagerort if argumente.lagerort is not None else lagerort,
+                          argumente.kuerzel if argumente.kuerzel is not None else kuerzel,
+                          alt=zeile, code=argumente.code)
+    print(f"Artikel {argumente.id} geändert")
+    return 0
+
+def loeschen(argumente):
+    lager.artikel_loeschen(argumente.id, argumente.kuerzel)
+    print(f"Artikel {argumente.id} gelöscht")
+    return 0
+
+def export(argumente):
+    anzahl = lager.inventur_schreiben(argumente.datei, argumente.niedrig, argumente.lagerort,
+                                      von=argumente.von, bis=argumente.bis)
+    print(f"{anzahl} Artikel exportiert nach {argumente.datei}")
+    return 0
+
+def import_zugaenge(argumente):
+    print(f"{sammelimport.zugaenge_importieren(argumente.datei)} Zugänge gebucht")
+    return 0
+
+def import_abgaenge(argumente):
+    print(f"{sammelimport.abgaenge_importieren(argumente.datei)} Abgänge gebucht")
+    return 0
+
+
+def kompaktieren(argumente):
+    """
+    Verkleinert die Datenbank-Datei. Doppelte Artikel (gleicher Name, Einheit und Lagerort) sind
+    dann schon zusammengeführt - das macht main() beim Aktualisieren der Datenbank (Schema-Version 4).
+    """
+    pfad = datenbank.get_writable_path(datenbank.DB_DATEI)
+    vorher = os.path.getsize(pfad)
+    datenbank.kompaktieren()
+    print(f"Datenbank verkleinert: {vorher / 1e6:.1f} MB -> {os.path.getsize(pfad) / 1e6:.1f} MB")
+    return 0
+
+def benutzer_liste(argumente):
+    for name, kuerzel in benutzer.benutzer_liste():
+        print(f"{name} ({kuerzel or 'ohne Kürzel'})")
+    return 0
+
+def passwort_abfragen():
+    """Fragt ein neues Passwort zweimal ab, ohne es anzuzeigen."""
+    passwort = getpass.getpass("Neues Passwort: ")
+    if getpass.getpass("Passwort wiederholen: ") != passwort:
+        raise benutzer.BenutzerFehler("Die Passwörter stimmen nicht überein")
+    return passwort
+
+def benutzer_anlegen(argumente):
+    benutzer.benutzer_anlegen(argumente.name, passwort_abfragen(), argumente.kuerzel)
+    print(f"Benutzer {argumente.name} angelegt")
+    return 0
+
+def passwort_aendern(argumente):
+    benutzer.passwort_aendern(argumente.name, passwort_abfragen())
+    print(f"Passwort von {argumente.name} geändert")
+    return 0
+
+def benutzer_loeschen(argumente):
+    benutzer.benutzer_loeschen(argumente.name)
+    print(f"Benutzer {argumente.name} gelöscht")
+    return 0
+
+def kdf_messen(argumente):
+    """Zeigt, wie lange ein Passwort-Hash hier dauert, und empfiehlt ein Verfahren für MEDIDEPOT_KDF."""
+    messungen, empfehlung = benutzer.kdf_messen(argumente.ziel_ms)
+    for verfahren, dauer_ms in messungen:
+        print(f"{verfahren:<24} {dauer_ms:8.1f} ms")
+    print(f"Aktuell: {benutzer.VERFAHREN}")
+    print(f"Empfehlung (unter {argumente.ziel_ms} ms): MEDIDEPOT_KDF={empfehlung}")
+    return 0
+
+
+def positive_zahl(text):
+    """Für argparse: nur ganze Zahlen größer als 0 (wie im Formular)."""
+    try:
+        zahl = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Anzahl muss eine Zahl sein")
+    if zahl <= 0:
+        raise argparse.ArgumentTypeError("Anzahl muss größer als 0 sein")
+    return zahl
+
+def nicht_negativ(text):
+    """Für argparse: ganze Zahlen ab 0 (Bestand und Mindestbestand)."""
+    try:
+        zahl = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("muss eine Zahl sein")
+    if zahl < 0:
+        raise argparse.ArgumentTypeError("darf nicht negativ sein")
+    return zahl
+
+def datum(text):
+    """Für argparse: Datum als TT.MM.JJJJ (oder JJJJ-MM-TT), wird als ISO-Datum weitergegeben."""
+    iso = lager.datum_nach_iso(text)
+    if iso is None:
+        raise argparse.ArgumentTypeError("Datum muss im Format TT.MM.JJJJ sein")
+    return iso
+
+def zeitraum_argumente(p):
+    """Fügt --von / --bis für das Datum "Hinzugefügt am" hinzu (beide inklusive)."""
+    p.add_argument("--von", type=datum, help="nur Artikel ab diesem Datum (TT.MM.JJJJ)")
+    p.add_argument("--bis", type=datum, help="nur Artikel bis zu diesem Datum (TT.MM.JJJJ)")
+
+def parser_erstellen():
+    """Beschreibt alle Befehle und ihre Argumente."""
+    parser = argparse.ArgumentParser(prog="kommandozeile.py", description="MediDEPOT ohne Fenster benutzen")
+    parser.add_argument("--datenbank", help=f"Pfad zur Datenbank (Standard: {datenbank.DB_DATEI})")
+    befehle = parser.add_subparsers(dest="befehl", required=True)
+
+    p = befehle.add_parser("liste", help="Artikel als CSV ausgeben")
+    p.add_argument("--niedrig", action="store_true", help="nur Artikel mit niedrigem Bestand")
+    p.add_argument("--lagerort", default="", help="nur Artikel an diesem Lagerort")
+    zeitraum_argumente(p)
+    p.set_defaults(funktion=liste)
+
+    p = befehle.add_parser("nachbestellliste", help="Artikel mit niedrigem Bestand anzeigen")
+    p.set_defaults(funktion=nachbestellliste)
+
+    p = befehle.add_parser("bestellvorschlag", help="Bestellvorschläge aus dem bisherigen Verbrauch")
+    p.add_argument("--lieferzeit", type=nicht_negativ, default=prognose.LIEFERZEIT_TAGE,
+                   help=f"Tage bis eine Lieferung da ist (Standard: {prognose.LIEFERZEIT_TAGE})")
+    p.add_argument("--reichweite", type=nicht_negativ, default=prognose.REICHWEITE_TAGE,
+                   help=f"so viele Tage soll die Bestellung reichen (Standard: {prognose.REICHWEITE_TAGE})")
+    p.add_argument("--alle", action="store_true", help="alle Artikel mit Verbrauch, nicht nur die nachzubestellenden")
+    p.add_argument("--neu", action="store_true", help="Verbrauch aus dem ganzen Journal neu berechnen")
+    p.set_defaults(funktion=bestellvorschlag)
+
+    p = befehle.add_parser("zugang", help="neuen Artikel mit Zugang buchen")
+    p.add_argument("name")
+    p.add_argument("anzahl", type=positive_zahl)
+    p.add_argument("einheit")
+    p.add_argument("lagerort")
+    p.add_argument("kuerzel")
+    p.add_argument("--datum", type=datum, default=lager.heute())
+    p.set_defaults(funktion=zugang)
+
+    p = befehle.add_parser("abgang", help="Abgang buchen")
+    p.add_argument("name")
+    p.add_argument("anzahl", type=positive_zahl)
+    p.add_argument("kuerzel")
+    p.add_argument("--datum", type=datum, default=lager.heute())
+    p.add_argument("--einheit", default="", help="nur nötig, wenn es den Artikel mehrmals gibt")
+    p.add_argument("--lagerort", default="", help="nur nötig, wenn es den Artikel mehrmals gibt")
+    p.set_defaults(funktion=abgang)
+
+    p = befehle.add_parser("aendern", help="Felder eines Artikels ändern")
+    p.add_argument("id", type=int)
+    p.add_argument("--name")
+    p.add_argument("--bestand", type=nicht_negativ)
+    p.add_argument("--mindestbestand", type=nicht_negativ)
+    p.add_argument("--einheit")
+    p.add_argument("--lagerort")
+    p.add_argument("--kuerzel")
+    p.add_argument("--code", help="Barcode für den Scanner (GTIN oder PZN, \"\" = entfernen)")
+    p.set_defaults(funktion=aendern)
+
+    p = befehle.add_parser("loeschen", help="Artikel löschen")
+    p.add_argument("id", type=int)
+    p.add_argument("--kuerzel", default="")
+    p.set_defaults(funktion=loeschen)
+
+    p = befehle.add_parser("export", help="Inventur als CSV-Datei schreiben")
+    p.add_argument("datei")
+    p.add_argument("--niedrig", action="store_true", help="nur Artikel mit niedrigem Bestand")
+    p.add_argument("--lagerort", default="", help="nur Artikel an diesem Lagerort")
+    zeitraum_argumente(p)
+    p.set_defaults(funktion=export)
+
+    p = befehle.add_parser("import-zugaenge", help="Zugänge aus einer CSV-Datei buchen")
+    p.add_argument("datei")
+    p.set_defaults(funktion=import_zugaenge)
+
+    p = befehle.add_parser("import-abgaenge", help="Abgänge aus einer CSV-Datei buchen")
+    p.add_argument("datei")
+    p.set_defaults(funktion=import_abgaenge)
+
+    p = befehle.add_parser("kompaktieren", help="Datenbank-Datei verkleinern (nach dem Zusammenführen)")
+    p.set_defaults(funktion=kompaktieren)
+
+    p = befehle.add_parser("benutzer-liste", help="alle Benutzer anzeigen")
+    p.set_defaults(funktion=benutzer_liste)
+
+    p = befehle.add_parser("benutzer-anlegen", help="neuen Benutzer anlegen (fragt nach dem Passwort)")
+    p.add_argument("name")
+    p.add_argument("kuerzel")
+    p.set_defaults(funktion=benutzer_anlegen)
+
+    p = befehle.add_parser("passwort-aendern", help="Passwort eines Benutzers ändern")
+    p.add_argument("name")
+    p.set_defaults(funktion=passwort_aendern)
+
+    p = befehle.add_parser("benutzer-loeschen", help="Benutzer löschen")
+    p.add_argument("name")
+    p.set_defaults(funktion=benutzer_loeschen)
+
+    p = befehle.add_parser("kdf-messen", help="Dauer der Passwort-Hashes auf diesem Rechner messen")
+    p.add_argument("--ziel-ms", type=int, default=benutzer.ZIEL_MS,
+                   help=f"so lange darf ein Login höchstens dauern (Standard: {benutzer.ZIEL_MS})")
+    p.set_defaults(funktion=kdf_messen)
+
+    return parser
+
+def main(argv=None):
+    argumente = parser_erstellen().parse_args(argv)
+    if argumente.datenbank:
+        datenbank.DB_DATEI = argumente.datenbank
+
+    try:
+        lager.erstelle_datenbank_falls_nicht_vorhanden()
+        return argumente.funktion(argumente)
+    except (lager.BuchungsFehler, sammelimport.ImportFehler, benutzer.BenutzerFehler) as e:
+        # Erwartete Fehler (z.B. zu wenig Bestand) ohne Traceback melden
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    finally:
+        datenbank.schliessen()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,712 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Lager-Funktionen für MediDEPOT (ohne Fenster)
+#Beschreibung: Alle Arbeiten am Lager (Laden, Zugang, Abgang, Ändern, Löschen, Export).
+#              Dieses Modul benutzt kein tkinter und funktioniert deshalb auch ohne
+#              Bildschirm - z.B. für die Kommandozeile (kommandozeile.py) oder Tests.
+
+
+import csv
+import sqlite3
+from datetime import datetime
+
+import benutzer
+import datenbank
+import diagnose
+import scannen
+
+
+# Spalten eines Artikels in der Reihenfolge, in der sie überall benutzt werden
+ARTIKEL_SPALTEN = "artikel_id, produktname, aktuellerbestand, mindestbestand, einheit, lagerort, Kürzel, datum"
+
+# Überschriften für den Inventur-Export (gleiche Reihenfolge wie ARTIKEL_SPALTEN)
+EXPORT_UEBERSCHRIFTEN = ['ID', 'Artikelname', 'Aktueller Bestand', 'Mindestbestand',
+                         'Einheit', 'Lagerort', 'Kürzel', 'Hinzugefügt am']
+
+
+# Die Artikel-Tabelle (gleiche Struktur wie im Original, wird in Migrations-Schritt 1 angelegt)
+ARTIKEL_TABELLE_SQL = "CREATE TABLE IF NOT EXISTS artikel(" \
+                      "artikel_id INTEGER PRIMARY KEY AUTOINCREMENT, " \
+                      "produktname TEXT, " \
+                      "aktuellerbestand INTEGER, " \
+                      "mindestbestand INTEGER, " \
+                      "einheit TEXT, " \
+                      "lagerort TEXT, " \
+                      "datum TEXT, " \
+                      "Kürzel TEXT)"
+
+# Ein Artikel ist eindeutig durch Name, Einheit und Lagerort (Groß-/Kleinschreibung und
+# Leerzeichen am Rand egal). Ein Zugang zu einem vorhandenen Artikel erhöht dessen Bestand,
+# statt eine zweite Zeile anzulegen - der eindeutige Index idx_artikel_eindeutig sorgt dafür.
+ARTIKEL_SCHLUESSEL = "lower(trim(produktname)), lower(trim(einheit)), lower(trim(lagerort))"
+
+# Mindestbestand für neue Artikel (im Formular gibt es dafür kein Feld)
+STANDARD_MINDESTBESTAND = 5
+
+# Legt einen Artikel (mit Bestand 0) an - oder findet den vorhandenen mit demselben Schlüssel.
+# Gibt in beiden Fällen die artikel_id zurück. Ein angegebener Mindestbestand (nicht NULL)
+# ersetzt den alten, sonst bleibt er wie er ist.
+ARTIKEL_UPSERT_SQL = f"""
+    INSERT INTO artikel (produktname, aktuellerbestand, mindestbestand, einheit, lagerort, Kürzel, datum)
+    VALUES (?, 0, IFNULL(?, {STANDARD_MINDESTBESTAND}), ?, ?, ?, ?)
+    ON CONFLICT({ARTIKEL_SCHLUESSEL}) DO UPDATE SET mindestbestand = IFNULL(?, mindestbestand)
+    RETURNING artikel_id
+"""
+
+# Sucht Artikel für einen Abgang über denselben Schlüssel (liest idx_artikel_eindeutig).
+# Parameter: Name, Einheit zweimal, Lagerort zweimal - leere Einheit/Lagerort passen zu allen.
+ARTIKEL_FINDEN_SQL = """
+    SELECT artikel_id, aktuellerbestand, einheit, lagerort FROM artikel
+    WHERE lower(trim(produktname)) = lower(trim(?))
+      AND (? = '' OR lower(trim(einheit)) = lower(trim(?)))
+      AND (? = '' OR lower(trim(lagerort)) = lower(trim(?)))
+    ORDER BY artikel_id
+"""
+
+# Indexe für das Sortieren in der Tabelle (Name und Lagerort haben schon einen Index)
+SORTIER_INDEXE = [
+    "CREATE INDEX IF NOT EXISTS idx_artikel_bestand ON artikel(aktuellerbestand)",
+    "CREATE INDEX IF NOT EXISTS idx_artikel_mindestbestand ON artikel(mindestbestand)",
+    "CREATE INDEX IF NOT EXISTS idx_artikel_einheit ON artikel(einheit)",
+    "CREATE INDEX IF NOT EXISTS idx_artikel_kuerzel ON artikel(Kürzel)",
+    "CREATE INDEX IF NOT EXISTS idx_artikel_datum ON artikel(datum)",
+]
+
+# Mehr geänderte Artikel als hier lohnen sich nicht einzeln - dann wird die Tabelle neu geladen
+MAX_AENDERUNGEN = 500
+
+# Datum wird in der Datenbank als ISO-Text gespeichert (JJJJ-MM-TT, z.B. 2025-06-01).
+# So sortiert SQLite richtig und kann Zeiträume ("alles aus dem Mai") über den Index lesen.
+# Angezeigt und eingegeben wird weiterhin das deutsche Format (TT.MM.JJJJ).
+DATUM_ISO = "%Y-%m-%d"
+DATUM_DEUTSCH = "%d.%m.%Y"
+DATUM_EINGABE_FORMATE = [DATUM_DEUTSCH, "%d.%m.%y", DATUM_ISO]
+
+
+class BuchungsFehler(Exception):
+    """Fehler bei einer Buchung, der dem Benutzer direkt angezeigt wird (z.B. zu wenig Bestand)."""
+
+
+class KonfliktFehler(BuchungsFehler):
+    """Ein anderer Arbeitsplatz hat dasselbe Feld inzwischen anders geändert. Es wurde nichts gespeichert."""
+
+
+# Felder, die im Bearbeiten-Fenster geändert werden können: Position in ARTIKEL_SPALTEN -> (Spalte, Name)
+# (der Bestand wird nicht überschrieben, sondern als Korrektur-Buchung gebucht)
+AENDERBARE_FELDER = {
+    1: ("produktname", "Artikelname"),
+    3: ("mindestbestand", "Mindestbestand"),
+    4: ("einheit", "Einheit"),
+    5: ("lagerort", "Lagerort"),
+    6: ("Kürzel", "Kürzel"),
+}
+
+
+def _migration_1_grundschema(cursor):
+    """
+    Schema-Version 1: Artikel-Tabelle mit allen Indexen, Nachbestellliste,
+    Buchungsjournal, Suchindex und Datum im ISO-Format.
+    Funktioniert für neue und für ältere Datenbanken (vor den Schema-Versionen),
+    deshalb wird alles nur angelegt, wenn es noch fehlt.
+    """
+    # Tabelle erstellen (gleiche Struktur wie im Original)
+    cursor.execute(ARTIKEL_TABELLE_SQL)
+
+    # Index für die Suche nach Artikelnamen (Groß-/Kleinschreibung egal)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_artikel_produktname "
+                   "ON artikel(produktname COLLATE NOCASE)")
+
+    # Index für den Export nach Lagerort (und zum Sortieren nach Lagerort)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_artikel_lagerort ON artikel(lagerort)")
+
+    # Indexe zum Sortieren der Tabelle nach den übrigen Spalten (Klick auf die Überschrift)
+    for sql in SORTIER_INDEXE:
+        cursor.execute(sql)
+
+    # Teil-Index nur mit den Artikeln, die nachbestellt werden müssen
+    # (SQLite pflegt ihn bei jeder Bestandsänderung automatisch mit)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_artikel_niedrig ON artikel(artikel_id) "
+                   "WHERE aktuellerbestand <= mindestbestand")
+    cursor.execute("CREATE VIEW IF NOT EXISTS nachbestellliste AS "
+                   "SELECT artikel_id, produktname, aktuellerbestand, mindestbestand, einheit, lagerort "
+                   "FROM artikel WHERE aktuellerbestand <= mindestbestand")
+
+    # Buchungsjournal (alle Zu- und Abgänge) anlegen falls es noch fehlt
+    datenbank.buchungsjournal_anlegen(cursor)
+
+    # Suchindex (Volltext) für die Suche über der Tabelle anlegen falls er noch fehlt
+    datenbank.artikelsuche_anlegen(cursor)
+
+    # Alte Datenbanken: deutsches Datum ins ISO-Format umstellen
+    datum_umstellen(cursor)
+
+def _migration_2_aenderungen(cursor):
+    """Schema-Version 2: Änderungsprotokoll, damit andere Arbeitsplätze Änderungen sehen."""
+    datenbank.aenderungsprotokoll_anlegen(cursor)
+
+def _migration_3_benutzer(cursor):
+    """
+    Schema-Version 3: Benutzer mit Passwort-Hash und Kürzel.
+    Damit man sich nach dem Update weiter anmelden kann, bekommt die neue Tabelle das bisher
+    fest eingebaute Konto demo/demo123 (ohne Kürzel) - bitte eigene Benutzer anlegen und
+    "demo" danach löschen (siehe README).
+    """
+    if datenbank.benutzertabelle_anlegen(cursor):
+        benutzer.eintragen(cursor, "demo", "demo123", "")
+
+def _migration_4_artikel_eindeutig(cursor):
+    """
+    Schema-Version 4: Jeden Artikel (Name + Einheit + Lagerort) nur noch einmal.
+    Bisher hat jeder Zugang eine neue Zeile angelegt. Die Doppelten werden hier einmalig
+    zusammengeführt (siehe doppelte_zusammenfuehren), danach verhindert der eindeutige
+    Index neue Doppelte. Die Trigger des Änderungsprotokolls werden dafür neu angelegt,
+    damit sie auch beim Upsert im Zugang funktionieren.
+    """
+    datenbank.aenderungen_trigger_erneuern(cursor)
+    doppelte_zusammenfuehren(cursor)
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_artikel_eindeutig ON artikel({ARTIKEL_SCHLUESSEL})")
+
+def _migration_5_gtin(cursor):
+    """
+    Schema-Version 5: Barcode (GTIN, eine PZN wird umgerechnet - siehe scannen.py) pro Artikel.
+    Der Teil-Index enthält nur Artikel mit Code: jeder Code gehört zu höchstens einem Artikel,
+    und ein Scan findet seinen Artikel direkt über den Index.
+    """
+    spalten = [zeile[1] for zeile in cursor.execute("PRAGMA table_info(artikel)").fetchall()]
+    if "gtin" not in spalten:
+        cursor.execute("ALTER TABLE artikel ADD COLUMN gtin TEXT")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_artikel_gtin ON artikel(gtin) WHERE gtin IS NOT NULL")
+
+def _migration_6_verbrauch(cursor):
+    """
+    Schema-Version 6: Geglätteter Verbrauch pro Artikel für die Prognose (siehe prognose.py).
+    Die Tabelle startet leer - der erste Aufruf der Prognose rechnet das ganze Journal ein.
+    """
+    datenbank.verbrauchstabelle_anlegen(cursor)
+
+# Alle Migrations-Schritte in der richtigen Reihenfolge (Nr. 1 = erster Eintrag).
+# Änderungen am Schema immer als NEUEN Schritt hinten anhängen, nie einen alten ändern -
+# sonst bekommen Datenbanken, die den alten Schritt schon hatten, die Änderung nie.
+MIGRATIONEN = [
+    _migration_1_grundschema,
+    _migration_2_aenderungen,
+    _migration_3_benutzer,
+    _migration_4_artikel_eindeutig,
+    _migration_5_gtin,
+    _migration_6_verbrauch,
+]
+
+def erstelle_datenbank_falls_nicht_vorhanden():
+    """
+    Erstellt automatisch eine neue Datenbank, falls noch keine existiert, und bringt
+    eine vorhandene auf den neuesten Stand (fehlende Migrations-Schritte werden nachgeholt).
+    Wird beim Programmstart aufgerufen.
+    WICHTIG: Diese Funktion sorgt dafür, dass die App auf jedem Computer funktioniert!
+    Gibt True zurück, wenn die Tabelle gerade neu angelegt wurde (erster Start).
+    """
+    # Nur ein PRAGMA lesen - ist die Datenbank aktuell, ist hier schon Schluss
+    version = datenbank.schema_version()
+    if version >= len(MIGRATIONEN):
+        return False
+
+    # Version 0 heißt: ganz neue Datenbank oder eine alte ohne Versionsnummer
+    erster_start = False
+    if version == 0:
+        erster_start = datenbank.abfrage_eins(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='artikel'") is None
+
+    datenbank.migrieren(MIGRATIONEN)
+    return erster_start
+
+def daten_aus_db_laden():
+    """
+    Lädt alle Artikel auf einmal aus der Datenbank und gibt sie zurück.
+    Die Tabelle lädt seitenweise (tabellenansicht.py), der Export stückweise (artikel_stueckweise).
+    """
+    # SQL-Befehl: Alle Artikel aus der Tabelle holen (über die gemeinsame Verbindung)
+    return datenbank.abfrage(f"SELECT {ARTIKEL_SPALTEN} FROM artikel")
+
+def artikel_zeilen_laden(artikel_ids):
+    """
+    Lädt nur die Artikel mit den angegebenen IDs aus der Datenbank.
+    Gibt ein Dictionary {artikel_id: zeile} zurück. Gelöschte Artikel fehlen darin.
+    """
+    if not artikel_ids:
+        return {}
+
+    # Ein Platzhalter "?" pro ID, damit SQLite den Primärschlüssel-Index nutzt
+    platzhalter = ", ".join("?" for _ in artikel_ids)
+    zeilen = datenbank.abfrage(f"SELECT {ARTIKEL_SPALTEN} FROM artikel WHERE artikel_id IN ({platzhalter})",
+                               [int(i) for i in artikel_ids])
+    return {zeile[0]: zeile for zeile in zeilen}
+
+def artikel_nach_name_suchen(artikel_name, einheit_name="", ort_name="", cursor=None):
+    """
+    Sucht einen Artikel über Name, Einheit und Lagerort - mit demselben Schlüssel wie beim
+    Zugang (ARTIKEL_SCHLUESSEL: Groß-/Kleinschreibung und Leerzeichen am Rand egal).
+    Leere Einheit/Lagerort heißt "egal". Nutzt den Index idx_artikel_eindeutig, ist also
+    auch bei sehr vielen Artikeln schnell - egal was gerade in der Tabelle angezeigt wird.
+    cursor: innerhalb einer Transaktion (z.B. Sammel-Import) deren Cursor.
+    Gibt (artikel_id, aktuellerbestand) zurück oder None. Passen mehrere Artikel (gleicher Name
+    an verschiedenen Lagerorten), wird BuchungsFehler geworfen - dann Lagerort angeben.
+    """
+    parameter = (artikel_name, einheit_name or "", einheit_name or "", ort_name or "", ort_name or "")
+    if cursor is None:
+        treffer = datenbank.abfrage(ARTIKEL_FINDEN_SQL, parameter)
+    else:
+        treffer = cursor.execute(ARTIKEL_FINDEN_SQL, parameter).fetchall()
+    if not treffer:
+        return None
+    if len(treffer) > 1:
+        orte = ", ".join(f"{einheit} in {lagerort}" for _, _, einheit, lagerort in treffer)
+        raise BuchungsFehler(f"Artikel '{artikel_name}' gibt es mehrmals ({orte}) - "
+                             f"bitte Einheit und Lagerort angeben!")
+    return treffer[0][:2]
+
+def code_laden(artikel_id):
+    """Gibt den Barcode (GTIN) eines Artikels zurück, "" wenn er keinen hat."""
+    zeile = datenbank.abfrage_eins("SELECT gtin FROM artikel WHERE artikel_id = ?", (artikel_id,))
+    return (zeile[0] or "") if zeile else ""
+
+def niedrige_bestaende_laden():
+    """
+    Gibt alle Artikel mit niedrigem Bestand (aktuellerbestand <= mindestbestand) zurück:
+    (artikel_id, produktname, aktuellerbestand, mindestbestand, einheit, lagerort).
+    Die Sicht "nachbestellliste" liest nur den Teil-Index idx_artikel_niedrig,
+    der genau diese Artikel enthält - es wird also nicht das ganze Lager durchsucht.
+    """
+    return datenbank.abfrage("SELECT artikel_id, produktname, aktuellerbestand, mindestbestand, einheit, lagerort "
+                             "FROM nachbestellliste ORDER BY artikel_id")
+
+# Kürzere Wörter kann der trigram-Suchindex nicht finden
+MINDESTLAENGE_SUCHE = 3
+# Höchstens so viele ähnliche Artikel anzeigen, wenn nichts genau passt (Tippfehler)
+MAX_AEHNLICHE = 200
+
+def aenderungen_pruefen(stand=None):
+    """
+    Prüft, ob ein anderer Arbeitsplatz seit dem letzten Aufruf etwas geändert hat.
+    stand ist (datenversion, nummer) vom letzten Aufruf, None beim ersten Mal.
+    Gibt (neuer_stand, artikel_ids) zurück. artikel_ids sind die neuen, geänderten oder
+    gelöschten Artikel - leer wenn sich nichts geändert hat, None bei sehr vielen
+    Änderungen (dann ist es schneller, die Tabelle neu zu laden).
+    Solange niemand anderes schreibt, kostet das nur ein PRAGMA-Lesen.
+    """
+    version = datenbank.datenversion()
+    if stand is not None and stand[0] == version:
+        return stand, []
+
+    if stand is None:
+        # Erster Aufruf: nur den jetzigen Stand merken
+        nummer = datenbank.abfrage_eins("SELECT IFNULL(MAX(nummer), 0) FROM aenderungen")[0]
+        return (version, nummer), []
+
+    # Nur die Artikel mit höherer Nummer holen (über idx_aenderungen_nummer)
+    zeilen = datenbank.abfrage("SELECT artikel_id, nummer FROM aenderungen WHERE nummer > ? "
+                               "ORDER BY nummer LIMIT ?", (stand[1], MAX_AENDERUNGEN + 1))
+    if len(zeilen) > MAX_AENDERUNGEN:
+        nummer = datenbank.abfrage_eins("SELECT MAX(nummer) FROM aenderungen")[0]
+        return (version, nummer), None
+    nummer = zeilen[-1][1] if zeilen else stand[1]
+    return (version, nummer), [zeile[0] for zeile in zeilen]
+
+def suche_vorbereiten(suchtext):
+    """
+    Bereitet die Suche über der Tabelle vor (läuft im Hintergrund).
+    Gibt den Filter für die Tabelle zurück: (tabelle, id_spalte, bedingung, parameter)
+    oder None, wenn das Suchfeld leer ist (= alle Artikel anzeigen).
+
+    - Jedes Wort ab 3 Zeichen wird im Suchindex gesucht (Teilwort, auch in Lagerort und Kürzel).
+      Kürzere Wörter werden an das Nachbarwort gehängt ("Schrank 3").
+    - Nur kurze Wörter (z.B. "pf"): Artikelnamen, die so anfangen (über idx_artikel_produktname).
+    - Findet die genaue Suche nichts, werden die ähnlichsten Artikel gesucht
+      (möglichst viele gleiche 3-Zeichen-Stücke) - so helfen auch Tippfehler.
+    """
+    suchtext = suchtext.strip()
+    if not suchtext:
+        return None
+
+    # Kurze Wörter (z.B. die "3" in "Schrank 3") gehören zum Wort davor bzw. danach
+    woerter = []
+    vorne = ""
+    for wort in suchtext.split():
+        if len(wort) >= MINDESTLAENGE_SUCHE:
+            woerter.append(vorne + wort)
+            vorne = ""
+        elif woerter:
+            woerter[-1] += " " + wort
+        else:
+            vorne += wort + " "
+    hat_index = datenbank.abfrage_eins("SELECT 1 FROM sqlite_master WHERE name = 'artikel_suche'") is not None
+
+    if not woerter or not hat_index:
+        # Namensanfang: Bereich im Namens-Index, z.B. "pf" <= name < "pg".
+        # NOCASE vergleicht A-Z wie a-z - die Grenzen müssen daher auch klein sein, sonst wäre
+        # "Z" <= name < "[" leer ("[" liegt zwischen "Z" und "a"). Umlaute vergleicht NOCASE genau.
+        anfang = "".join(zeichen.lower() if zeichen.isascii() else zeichen for zeichen in suchtext)
+        ende = anfang[:-1] + chr(ord(anfang[-1]) + 1)
+        return ("artikel", "artikel_id",
+                "produktname >= ? COLLATE NOCASE AND produktname < ? COLLATE NOCASE", [anfang, ende])
+
+    # Jedes Wort als eigene Phrase ("..." - Anführungszeichen im Text werden verdoppelt)
+    ausdruck = " AND ".join('"' + wort.replace('"', '""') + '"' for wort in woerter)
+    if datenbank.abfrage_eins("SELECT 1 FROM artikel_suche WHERE artikel_suche MATCH ? LIMIT 1", (ausdruck,)):
+        return ("artikel_suche", "rowid", "artikel_suche MATCH ?", [ausdruck])
+
+    # Nichts gefunden -> ähnliche Artikel: irgendeines der 3-Zeichen-Stücke muss passen,
+    # die Artikel mit den meisten passenden Stücken kommen zuerst (rank)
+    stuecke = {wort[i:i + 3].lower() for wort in woerter for i in range(len(wort) - 2)}
+    stuecke = {stueck for stueck in stuecke if " " not in stueck}
+    ausdruck = " OR ".join('"' + stueck.replace('"', '""') + '"' for stueck in sorted(stuecke))
+    ids = [zeile[0] for zeile in datenbank.abfrage(
+        "SELECT rowid FROM artikel_suche WHERE artikel_suche MATCH ? ORDER BY rank LIMIT ?",
+        (ausdruck, MAX_AEHNLICHE))]
+    platzhalter = ", ".join("?" for _ in ids) or "NULL"
+    return ("artikel", "artikel_id", f"artikel_id IN ({platzhalter})", ids)
+
+def datum_nach_iso(text):
+    """
+    Wandelt ein eingegebenes Datum (TT.MM.JJJJ, TT.MM.JJ oder schon JJJJ-MM-TT)
+    in das ISO-Format für die Datenbank um. Gibt None zurück, wenn es kein gültiges Datum ist.
+    """
+    text = (text or "").strip()
+    for format in DATUM_EINGABE_FORMATE:
+        try:
+            return datetime.strptime(text, format).strftime(DATUM_ISO)
+        except ValueError:
+            pass
+    return None
+
+def datum_deutsch(wert):
+    """
+    Macht aus einem ISO-Datum aus der Datenbank wieder TT.MM.JJJJ für die Anzeige.
+    Andere Werte (leer oder unbekanntes Format) werden unverändert zurückgegeben.
+    """
+    try:
+        return datetime.strptime(wert, DATUM_ISO).strftime(DATUM_DEUTSCH)
+    except (TypeError, ValueError):
+        return wert
+
+def heute():
+    """Heutiges Datum im ISO-Format (so wie es gespeichert wird)."""
+    return datetime.now().strftime(DATUM_ISO)
+
+def heute_deutsch():
+    """Heutiges Datum im deutschen Format (für die Datum-Felder)."""
+    return datetime.now().strftime(DATUM_DEUTSCH)
+
+def _datum_pruefen(datum_name):
+    """Gibt das Datum im ISO-Format zurück oder wirft BuchungsFehler."""
+    datum = datum_nach_iso(datum_name)
+    if datum is None:
+        raise BuchungsFehler(f"Ungültiges Datum '{datum_name}'! Bitte im Format TT.MM.JJJJ eingeben.")
+    return datum
+
+def _iso_werte(zeilen):
+    """Macht aus (id, datum)-Zeilen die Parameter (iso_datum, id) für ein UPDATE."""
+    werte = []
+    for zeilen_id, datum in zeilen:
+        neu = datum_nach_iso(datum)
+        if neu is not None:
+            werte.append((neu, zeilen_id))
+    return werte
+
+def datum_umstellen(cursor):
+    """
+    Stellt alle Datumswerte in "artikel" und "buchungen" vom deutschen Format
+    (TT.MM.JJJJ) auf ISO (JJJJ-MM-TT) um und legt den Index für das Journal an.
+    Werte, die kein gültiges Datum sind, bleiben wie sie sind.
+    Teil von Migrations-Schritt 1, muss in einer Transaktion laufen.
+    """
+    # Nur Zeilen, die noch nicht im ISO-Format sind (ISO hat an Stelle 5 einen Bindestrich)
+    zeilen = cursor.execute("SELECT artikel_id, datum FROM artikel "
+                            "WHERE datum IS NOT NULL AND substr(datum, 5, 1) <> '-'").fetchall()
+    cursor.executemany("UPDATE artikel SET datum = ? WHERE artikel_id = ?", _iso_werte(zeilen))
+
+    # Das Journal ist gegen Änderungen gesperrt - nur für die Umstellung kurz entsperren.
+    # Alles läuft in derselben Transaktion, bei einem Fehler bleibt die Sperre also bestehen.
+    zeilen = cursor.execute("SELECT buchung_id, datum FROM buchungen "
+                            "WHERE datum IS NOT NULL AND substr(datum, 5, 1) <> '-'").fetchall()
+    if zeilen:
+        cursor.execute("DROP TRIGGER IF EXISTS buchungen_nicht_aendern")
+        cursor.executemany("UPDATE buchungen SET datum = ? WHERE buchung_id = ?", _iso_werte(zeilen))
+        cursor.execute(datenbank.TRIGGER_SQL[2])  # buchungen_nicht_aendern wieder anlegen
+
+    # Index für Zeiträume im Journal (z.B. alle Abgänge eines Monats)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_buchungen_datum ON buchungen(datum)")
+
+def artikel_anlegen_oder_finden(cursor, artikel_name, einheit_name, ort_name, kuerzel_name, datum_name,
+                                mindestbestand=None):
+    """
+    Gibt die artikel_id des Artikels mit diesem Namen, dieser Einheit und diesem Lagerort zurück.
+    Gibt es ihn noch nicht, wird er mit Bestand 0 angelegt (mindestbestand None = Standard).
+    Muss innerhalb einer transaktion() aufgerufen werden.
+    """
+    cursor.execute(ARTIKEL_UPSERT_SQL, (artikel_name, mindestbestand, einheit_name, ort_name,
+                                        kuerzel_name, datum_name, mindestbestand))
+    return cursor.fetchone()[0]
+
+@datenbank.bei_sperre_wiederholen
+def zugang_speichern(artikel_name, anzahl, einheit_name, ort_name, kuerzel_name, datum_name):
+    """
+    Bucht die Anzahl als Zugang ins Journal. Gibt es den Artikel (gleicher Name, gleiche Einheit,
+    gleicher Lagerort) schon, steigt sein Bestand - sonst wird er neu angelegt
+    (mindestbestand = STANDARD_MINDESTBESTAND). Gibt die artikel_id zurück.
+    Das Datum wird im ISO-Format gespeichert (BuchungsFehler wenn es ungültig ist).
+    """
+    datum_name = _datum_pruefen(datum_name)
+    with datenbank.transaktion() as cursor:
+        # Der Bestand kommt über die Buchung (der Trigger zählt ihn hoch)
+        artikel_id = artikel_anlegen_oder_finden(cursor, artikel_name, einheit_name, ort_name,
+                                                 kuerzel_name, datum_name)
+        datenbank.buchen(cursor, artikel_id, anzahl, "Zugang", kuerzel_name, datum_name)
+
+    return artikel_id
+
+def doppelte_zusammenfuehren(cursor, kuerzel_name=""):
+    """
+    Führt Artikel mit gleichem Namen, gleicher Einheit und gleichem Lagerort zusammen:
+    Der älteste (kleinste ID) bleibt. Die Bestände der anderen werden als "Zusammenführung"
+    auf ihn umgebucht (das Journal bleibt vollständig), der höchste Mindestbestand gilt,
+    danach werden die anderen gelöscht.
+    Muss innerhalb einer transaktion() laufen. Gibt die Anzahl der gelöschten Doppelten zurück.
+    """
+    # Nur die Doppelten lesen: pro Gruppe (gleicher Schlüssel) alle außer dem ältesten
+    cursor.execute(f"""
+        SELECT artikel_id, behalten, aktuellerbestand, mindest FROM (
+            SELECT artikel_id, aktuellerbestand,
+                   MIN(artikel_id) OVER gruppe AS behalten,
+                   MAX(mindestbestand) OVER gruppe AS mindest
+            FROM artikel
+            WINDOW gruppe AS (PARTITION BY {ARTIKEL_SCHLUESSEL}))
+        WHERE artikel_id != behalten
+    """)
+    doppelte = cursor.fetchall()
+
+    datum = heute()
+    for artikel_id, behalten, bestand, mindest in doppelte:
+        if bestand:
+            datenbank.buchen(cursor, artikel_id, -bestand, "Zusammenführung", kuerzel_name, datum)
+            datenbank.buchen(cursor, behalten, bestand, "Zusammenführung", kuerzel_name, datum)
+        cursor.execute("UPDATE artikel SET mindestbestand = ? WHERE artikel_id = ? AND IFNULL(mindestbestand, -1) < ?",
+                       (mindest, behalten, mindest))
+        cursor.execute("DELETE FROM artikel WHERE artikel_id = ?", (artikel_id,))
+    return len(doppelte)
+
+@datenbank.bei_sperre_wiederholen
+def abgang_buchen(artikel_name, anzahl, kuerzel_name, datum_name, einheit_name="", ort_name=""):
+    """
+    Bucht einen Abgang ins Journal (der Bestand sinkt dabei um anzahl).
+    Der Artikel wird über Name, Einheit und Lagerort gefunden (leer = egal, solange der Name
+    eindeutig ist). Gibt die artikel_id zurück. Wirft BuchungsFehler wenn der Artikel nicht
+    (oder mehrmals) gefunden wird, nicht genug Bestand da ist oder das Datum ungültig ist.
+    """
+    datum_name = _datum_pruefen(datum_name)
+    with datenbank.transaktion() as cursor:
+        # Artikel in der Datenbank suchen (über den eindeutigen Index)
+        treffer = artikel_nach_name_suchen(artikel_name, einheit_name, ort_name)
+        if treffer is None:
+            genauer = ", ".join(wert for wert in (einheit_name, ort_name) if wert)
+            raise BuchungsFehler(f"Artikel '{artikel_name}'{f' ({genauer})' if genauer else ''} nicht gefunden!")
+
+        artikel_id, aktueller_bestand = treffer
+
+        # Prüfen ob genug Bestand vorhanden ist (der Trigger prüft beim Buchen nochmal)
+        if aktueller_bestand < anzahl:
+            raise BuchungsFehler(f"Nicht genug Bestand! Verfuegbar: {aktueller_bestand}")
+
+        # Abgang buchen - der Bestand wird in derselben Transaktion reduziert
+        datenbank.buchen(cursor, artikel_id, -anzahl, "Abgang", kuerzel_name, datum_name)
+
+    return artikel_id
+
+@datenbank.bei_sperre_wiederholen
+def scans_buchen(scans):
+    """
+    Bucht gescannte Abgänge (je 1 Stück) zusammen in EINER Transaktion (siehe scannen.py).
+    scans = [(gtin, kuerzel, datum)] - gtin schon normalisiert (scannen.code_normalisieren),
+    datum im ISO-Format. Ein Scan, der nicht gebucht werden kann (unbekannter Code, kein Bestand),
+    hält die anderen nicht auf. Gibt pro Scan (in derselben Reihenfolge) zurück:
+    (gtin, artikel_id, name, bestand_danach, fehlertext) - fehlertext ist None wenn gebucht wurde.
+    """
+    ergebnis = []
+    with datenbank.transaktion() as cursor:
+        for gtin, kuerzel_name, datum_name in scans:
+            # Artikel über den Teil-Index idx_artikel_gtin suchen
+            cursor.execute("SELECT artikel_id, produktname, aktuellerbestand FROM artikel WHERE gtin = ?", (gtin,))
+            zeile = cursor.fetchone()
+            if zeile is None:
+                ergebnis.append((gtin, None, None, None, "Unbekannter Code"))
+                continue
+
+            # Der Bestand enthält schon die vorherigen Scans dieses Pakets (gleiche Transaktion)
+            artikel_id, name, bestand = zeile
+            if bestand < 1:
+                ergebnis.append((gtin, artikel_id, name, bestand, "Kein Bestand mehr"))
+                continue
+            datenbank.buchen(cursor, artikel_id, -1, "Abgang", kuerzel_name, datum_name)
+            ergebnis.append((gtin, artikel_id, name, bestand - 1, None))
+
+    return ergebnis
+
+@datenbank.bei_sperre_wiederholen
+def artikel_loeschen(artikel_id, kuerzel_name=""):
+    """
+    Löscht einen Artikel komplett aus der Datenbank.
+    Der Restbestand wird vorher als "Löschung" ausgebucht, die Buchungen bleiben erhalten.
+    """
+    with datenbank.transaktion() as cursor:
+        cursor.execute("SELECT aktuellerbestand FROM artikel WHERE artikel_id = ?", (artikel_id,))
+        zeile = cursor.fetchone()
+        if zeile is None:
+            return
+        if zeile[0]:
+            datenbank.buchen(cursor, artikel_id, -zeile[0], "Löschung", kuerzel_name, heute())
+        cursor.execute("DELETE FROM artikel WHERE artikel_id = ?", (artikel_id,))
+
+@datenbank.bei_sperre_wiederholen
+def artikel_aendern(artikel_id, name, bestand, mindestbestand, einheit_name, ort_name, kuerzel_name, alt=None,
+                    code=None):
+    """
+    Speichert einen bearbeiteten Artikel. alt ist die Zeile (wie aus artikel_zeilen_laden),
+    die der Benutzer beim Öffnen gesehen hat - so wird nichts überschrieben, was ein anderer
+    Arbeitsplatz inzwischen geändert hat:
+    - Gespeichert werden nur die Felder, die der Benutzer wirklich geändert hat.
+    - Eine Änderung des Bestands wird als Differenz ("Korrektur") gebucht, gerechnet vom
+      alten Wert. Abgänge von anderen Arbeitsplätzen gehen dadurch nicht verloren.
+    - Hat ein anderer dasselbe Feld anders geändert, kommt ein KonfliktFehler.
+    Ohne alt wird der jetzige Stand in der Datenbank als alt benutzt.
+    code: neuer Barcode (GTIN oder PZN, "" = Barcode entfernen), None = Barcode nicht ändern.
+    Gibt den neuen Bestand zurück.
+    """
+    gtin = None
+    if code is not None and code.strip():
+        try:
+            gtin = scannen.code_normalisieren(code)
+        except scannen.CodeFehler as e:
+            raise BuchungsFehler(str(e))
+
+    with datenbank.transaktion() as cursor:
+        # Jetzigen Stand lesen - die Transaktion hält die Schreib-Sperre, er bleibt also bis zum Speichern gleich
+        cursor.execute(f"SELECT {ARTIKEL_SPALTEN} FROM artikel WHERE artikel_id = ?", (artikel_id,))
+        aktuell = cursor.fetchone()
+        if aktuell is None:
+            raise BuchungsFehler(f"Artikel mit ID {artikel_id} wurde inzwischen gelöscht!")
+        if alt is None:
+            alt = aktuell
+
+        # Nur geänderte Felder speichern und dabei prüfen, ob jemand anderes sie auch geändert hat
+        neu = {1: name, 3: mindestbestand, 4: einheit_name, 5: ort_name, 6: kuerzel_name}
+        spalten = []
+        werte = []
+        for nr, wert in neu.items():
+            if wert == alt[nr] or wert == aktuell[nr]:
+                continue  # vom Benutzer nicht geändert (oder schon so gespeichert)
+            spalte, feldname = AENDERBARE_FELDER[nr]
+            if aktuell[nr] != alt[nr]:
+                raise KonfliktFehler(f"{feldname} wurde inzwischen an einem anderen Arbeitsplatz geändert "
+                                     f"(jetzt: {aktuell[nr]}). Bitte den Artikel neu öffnen.")
+            spalten.append(f"{spalte} = ?")
+            werte.append(wert)
+        if spalten:
+            try:
+                cursor.execute(f"UPDATE artikel SET {', '.join(spalten)} WHERE artikel_id = ?", werte + [artikel_id])
+            except sqlite3.IntegrityError:
+                # idx_artikel_eindeutig: Name, Einheit und Lagerort gibt es schon bei einem anderen Artikel
+                raise BuchungsFehler("Diesen Artikel gibt es mit gleicher Einheit am gleichen Lagerort schon!")
+
+        # Barcode: jeder Code gehört zu höchstens einem Artikel (idx_artikel_gtin)
+        if code is not None:
+            cursor.execute("SELECT produktname FROM artikel WHERE gtin = ? AND artikel_id != ?", (gtin, artikel_id))
+            anderer = cursor.fetchone()
+            if anderer is not None:
+                raise BuchungsFehler(f"Der Code {scannen.code_anzeigen(gtin)} gehört schon zu '{anderer[0]}'!")
+            cursor.execute("UPDATE artikel SET gtin = ? WHERE artikel_id = ? AND gtin IS NOT ?",
+                           (gtin, artikel_id, gtin))
+
+        # Bestand: nur die Änderung des Benutzers buchen, auf den jetzigen Bestand
+        differenz = bestand - alt[2]
+        if aktuell[2] + differenz < 0:
+            raise BuchungsFehler(f"Nicht genug Bestand! Inzwischen verfügbar: {aktuell[2]}")
+        if differenz:
+            datenbank.buchen(cursor, artikel_id, differenz, "Korrektur", kuerzel_name, heute())
+
+    return aktuell[2] + differenz
+
+def export_bedingung(nur_niedrig=False, lagerort="", von=None, bis=None):
+    """
+    Baut die WHERE-Bedingung für den Inventur-Export.
+    von / bis sind ISO-Daten (JJJJ-MM-TT) für "Hinzugefügt am" - beide sind inklusive.
+    Gibt (sql, parameter) zurück - sql ist leer wenn alle Artikel exportiert werden.
+    """
+    bedingungen = []
+    parameter = []
+    if nur_niedrig:
+        bedingungen.append("aktuellerbestand <= mindestbestand")
+    if lagerort:
+        bedingungen.append("lagerort = ?")  # nutzt idx_artikel_lagerort
+        parameter.append(lagerort)
+    if von:
+        bedingungen.append("datum >= ?")    # Zeitraum über idx_artikel_datum
+        parameter.append(von)
+    if bis:
+        bedingungen.append("datum <= ?")
+        parameter.append(bis)
+    sql = " WHERE " + " AND ".join(bedingungen) if bedingungen else ""
+    return sql, parameter
+
+def artikel_zaehlen(nur_niedrig=False, lagerort="", von=None, bis=None):
+    """Zählt die Artikel, die zu den Filtern passen (ohne sie zu laden)."""
+    bedingung, parameter = export_bedingung(nur_niedrig, lagerort, von, bis)
+    return datenbank.abfrage_eins("SELECT COUNT(*) FROM artikel" + bedingung, parameter)[0]
+
+def artikel_stueckweise(nur_niedrig=False, lagerort="", von=None, bis=None, groesse=1000):
+    """
+    Liefert die passenden Artikel nach ID sortiert in Stücken von höchstens groesse Zeilen.
+    So ist auch bei sehr vielen Artikeln nie das ganze Lager im Speicher.
+    """
+    bedingung, parameter = export_bedingung(nur_niedrig, lagerort, von, bis)
+    yield from datenbank.abfrage_stueckweise(
+        f"SELECT {ARTIKEL_SPALTEN} FROM artikel" + bedingung + " ORDER BY artikel_id", parameter, groesse)
+
+def inventur_csv_schreiben(datei, nur_niedrig=False, lagerort="", fortschritt=None, gesamt=None,
+                           von=None, bis=None):
+    """
+    Schreibt die Artikel als CSV (mit Überschrift) in eine schon geöffnete Datei,
+    z.B. auch sys.stdout. Gibt die Anzahl der geschriebenen Artikel zurück.
+    Das Datum steht wie in der Tabelle im deutschen Format in der Datei.
+    fortschritt(geschrieben, gesamt) wird nach jedem Stück aufgerufen.
+    """
+    writer = csv.writer(datei, delimiter=';')  # Semikolon für deutsche Excel-Version
+
+    # Spaltenüberschriften schreiben
+    writer.writerow(EXPORT_UEBERSCHRIFTEN)
+
+    # Artikel-Daten stückweise direkt aus dem Cursor schreiben
+    geschrieben = 0
+    for stueck in artikel_stueckweise(nur_niedrig, lagerort, von, bis):
+        writer.writerows(zeile[:7] + (datum_deutsch(zeile[7]),) for zeile in stueck)
+        geschrieben += len(stueck)
+        if fortschritt:
+            fortschritt(geschrieben, gesamt)
+
+    return geschrieben
+
+@diagnose.gemessen("Export")
+def inventur_schreiben(vollständiger_pfad, nur_niedrig=False, lagerort="", fortschritt=None, von=None, bis=None):
+    """
+    Schreibt die Artikel als CSV-Datei. Gibt die Anzahl der Artikel zurück.
+    Die Artikel werden stückweise (je 1000) gelesen und sofort geschrieben,
+    es ist also nie das ganze Lager im Speicher.
+    Mit nur_niedrig / lagerort / von / bis werden nur die passenden Artikel gelesen.
+    fortschritt(geschrieben, gesamt) wird nach jedem Stück aufgerufen.
+    Gibt es keine Artikel, wird keine Datei erstellt und 0 zurückgegeben.
+    """
+    # Schritt 1: Zählen (für den Fortschrittsbalken)
+    gesamt = artikel_zaehlen(nur_niedrig, lagerort, von, bis)
+    if not gesamt:
+        return 0
+
+    # Schritt 2: CSV-Datei erstellen (mit 64 KB Schreibpuffer)
+    with open(vollständiger_pfad, 'w', newline='', encoding='utf-8', buffering=65536) as csvfile:
+        return inventur_csv_schreiben(csvfile, nur_niedrig, lagerort, fortschritt, gesamt, von, bis)
@@ -0,0 +1,461 @@
+# Unit Test für die Lager-Funktionen (ohne Fenster)
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+import datenbank
+import diagnose
+import lager
+import meldungen
+import prognose
+import sammelimport
+import scannen
+import tabellenansicht
+import vorschlaege
+
+
+class TestLager(unittest.TestCase):
+
+    def setUp(self):
+        """Jeder Test bekommt eine eigene, leere Datenbank im Temp-Ordner"""
+        self.ordner = tempfile.TemporaryDirectory()
+        datenbank.schliessen()
+        self.alte_datei = datenbank.DB_DATEI
+        datenbank.DB_DATEI = os.path.join(self.ordner.name, "test.db")
+        self.assertTrue(lager.erstelle_datenbank_falls_nicht_vorhanden())
+
+    def tearDown(self):
+        datenbank.schliessen()
+        datenbank.DB_DATEI = self.alte_datei
+        self.ordner.cleanup()
+
+    def bestand(self, artikel_id):
+        return lager.artikel_zeilen_laden([artikel_id])[artikel_id][2]
+
+    def test_zugang_und_abgang(self):
+        """Test: Zugang 10, Abgang 4 = Bestand 6"""
+        artikel_id = lager.zugang_speichern("Pflaster", 10, "Stück", "Schrank 1", "EG", "01.06.2025")
+        self.assertEqual(lager.abgang_buchen("pflaster", 4, "EG", "02.06.2025"), artikel_id)
+        self.assertEqual(self.bestand(artikel_id), 6)
+        print("Zugang und Abgang funktionieren")
+
+    def test_zu_wenig_bestand(self):
+        """Test: Abgang größer als Bestand wird abgelehnt"""
+        artikel_id = lager.zugang_speichern("Pflaster", 2, "Stück", "Schrank 1", "EG", "01.06.2025")
+        with self.assertRaises(lager.BuchungsFehler):
+            lager.abgang_buchen("Pflaster", 3, "EG", "02.06.2025")
+        self.assertEqual(self.bestand(artikel_id), 2)
+        print("Zu wenig Bestand wird abgelehnt")
+
+    def test_aendern_und_loeschen(self):
+        """Test: Korrektur des Bestands und Löschen des Artikels"""
+        artikel_id = lager.zugang_speichern("Pflaster", 2, "Stück", "Schrank 1", "EG", "01.06.2025")
+        lager.artikel_aendern(artikel_id, "Pflaster", 8, 1, "Stück", "Schrank 2", "EG")
+        self.assertEqual(self.bestand(artikel_id), 8)
+        self.assertEqual(lager.niedrige_bestaende_laden(), [])
+        lager.artikel_loeschen(artikel_id, "EG")
+        self.assertEqual(lager.artikel_zeilen_laden([artikel_id]), {})
+        print("Ändern und Löschen funktionieren")
+
+    def test_zugang_zum_vorhandenen_artikel(self):
+        """Test: Zugang zu einem vorhandenen Artikel erhöht den Bestand statt eine neue Zeile anzulegen"""
+        artikel_id = lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "01.06.2025")
+        lager.artikel_aendern(artikel_id, "Pflaster", 2, 9, "Stück", "Labor", "EG")
+        self.assertEqual(lager.zugang_speichern(" pflaster", 3, "stück", "Labor ", "MS", "02.06.2025"), artikel_id)
+        self.assertNotEqual(lager.zugang_speichern("Pflaster", 1, "Stück", "Schrank 1", "EG", "02.06.2025"),
+                            artikel_id)
+        zeile = lager.artikel_zeilen_laden([artikel_id])[artikel_id]
+        self.assertEqual((zeile[2], zeile[3]), (5, 9))  # Bestand 2 + 3, Mindestbestand bleibt
+        self.assertEqual(lager.artikel_zaehlen(), 2)
+
+        # Umbenennen auf einen vorhandenen Artikel wird abgelehnt
+        with self.assertRaises(lager.BuchungsFehler):
+            lager.artikel_aendern(artikel_id, "Pflaster", 5, 9, "Stück", "Schrank 1", "EG")
+        print("Zugang zum vorhandenen Artikel funktioniert")
+
+    def test_abgang_mit_lagerort(self):
+        """Test: Abgang findet den Artikel über Name, Einheit und Lagerort - gleicher Name an zwei Orten"""
+        schrank1 = lager.zugang_speichern("Pflaster", 1, "Stück", "Schrank 1", "EG", "01.06.2025")
+        schrank2 = lager.zugang_speichern("Pflaster", 50, "Stück", "Schrank 2", "EG", "01.06.2025")
+        with self.assertRaisesRegex(lager.BuchungsFehler, "mehrmals"):
+            lager.abgang_buchen("Pflaster", 10, "EG", "02.06.2025", "Stück")
+        self.assertEqual(lager.abgang_buchen(" pflaster", 10, "EG", "02.06.2025", "stück", "schrank 2 "), schrank2)
+        self.assertEqual(self.bestand(schrank2), 40)
+        with self.assertRaises(lager.BuchungsFehler):
+            lager.abgang_buchen("Pflaster", 1, "EG", "02.06.2025", "Packung", "Schrank 1")
+
+        # Sammel-Import: Einheit und Lagerort aus der Datei, ohne Lagerort ist der Name mehrdeutig
+        pfad = os.path.join(self.ordner.name, "abgaenge.csv")
+        with open(pfad, "w", encoding="utf-8") as datei:
+            datei.write(";".join(lager.EXPORT_UEBERSCHRIFTEN) + "\n;Pflaster;1;;Stück;Schrank 1;EG;02.06.2025\n")
+        self.assertEqual(sammelimport.abgaenge_importieren(pfad), 1)
+        self.assertEqual(self.bestand(schrank1), 0)
+        with open(pfad, "w", encoding="utf-8") as datei:
+            datei.write(";".join(lager.EXPORT_UEBERSCHRIFTEN) + "\n;Pflaster;1;;Stück;;EG;02.06.2025\n")
+        with self.assertRaisesRegex(sammelimport.ImportFehler, "mehrmals"):
+            sammelimport.abgaenge_importieren(pfad)
+        print("Abgang mit Lagerort funktioniert")
+
+    def test_doppelte_zusammenfuehren(self):
+        """Test: Doppelte Artikel aus älteren Versionen werden zum ältesten zusammengeführt"""
+        datenbank.ausfuehren("DROP INDEX idx_artikel_eindeutig")
+        with datenbank.transaktion() as cursor:
+            for bestand, mindest in [(4, 2), (0, 7), (6, 1)]:
+                cursor.execute("INSERT INTO artikel (produktname, aktuellerbestand, mindestbestand, einheit, "
+                               "lagerort, Kürzel, datum) VALUES ('Pflaster', 0, ?, 'Stück', 'Labor', 'EG', "
+                               "'2025-06-01')", (mindest,))
+                datenbank.buchen(cursor, cursor.lastrowid, bestand, "Zugang", "EG", "2025-06-01")
+        erster = datenbank.abfrage_eins("SELECT MIN(artikel_id) FROM artikel")[0]
+
+        with datenbank.transaktion() as cursor:
+            self.assertEqual(lager.doppelte_zusammenfuehren(cursor, "EG"), 2)
+        zeilen = lager.daten_aus_db_laden()
+        self.assertEqual([(z[0], z[2], z[3]) for z in zeilen], [(erster, 10, 7)])
+        summe = datenbank.abfrage_eins("SELECT SUM(menge) FROM buchungen WHERE artikel_id = ?", (erster,))[0]
+        self.assertEqual(summe, 10)  # Bestand passt weiter zum Journal
+        print("Doppelte Artikel werden zusammengeführt")
+
+    def test_vorschlaege(self):
+        """Test: Namens-Vorschläge (Anfang, Groß/klein egal) und Nachführen bei Änderungen"""
+        pflaster = lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "01.06.2025")
+        lager.zugang_speichern("pflasterspray", 1, "Flasche", "Schrank 1", "EG", "01.06.2025")
+        lager.zugang_speichern("Spritzen", 5, "Stück", "Labor", "EG", "01.06.2025")
+        index = vorschlaege.NamensIndex.laden()
+        self.assertEqual(index.vorschlaege("PFL"), [(pflaster, "Pflaster", "Stück", "Labor"),
+                                                    (pflaster + 1, "pflasterspray", "Flasche", "Schrank 1")])
+        self.assertEqual(index.vorschlaege("x"), [])
+        self.assertEqual(index.vorschlaege(" "), [])
+
+        # Umbenennen, neu, wieder zurück umbenennen, löschen
+        lager.artikel_aendern(pflaster, "Kompresse", 2, 5, "Stück", "Labor", "EG")
+        neu = lager.zugang_speichern("Pinzette", 1, "Stück", "Labor", "EG", "01.06.2025")
+        index.aktualisieren(lager.artikel_zeilen_laden([pflaster, neu]), [pflaster, neu])
+        self.assertEqual([name for _, name, _, _ in index.vorschlaege("p")], ["pflasterspray", "Pinzette"])
+        self.assertEqual(index.vorschlaege("komp"), [(pflaster, "Kompresse", "Stück", "Labor")])
+        lager.artikel_aendern(pflaster, "Pflaster", 2, 5, "Stück", "Schrank 2", "EG")
+        index.aktualisieren(lager.artikel_zeilen_laden([pflaster]), [pflaster])
+        self.assertEqual(index.vorschlaege("pflaster "), [])
+        self.assertEqual(index.vorschlaege("pflaster")[0], (pflaster, "Pflaster", "Stück", "Schrank 2"))
+        self.assertEqual(len(index.vorschlaege("pflaster")), 2)
+        index.aktualisieren({}, [neu])
+        self.assertEqual(index.vorschlaege("pin"), [])
+        print("Vorschläge funktionieren")
+
+    def test_meldungen(self):
+        """Test: Niedrige Bestände werden nachgeführt, gemeldet wird nur, wer neu unter das Minimum fällt"""
+        pflaster = lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "01.06.2025")
+        tupfer = lager.zugang_speichern("Tupfer", 8, "Packung", "Labor", "EG", "01.06.2025")
+        niedrig = meldungen.NiedrigeBestaende()
+        self.assertEqual(niedrig.setzen(lager.niedrige_bestaende_laden()), [])  # Start: nichts ist neu
+        self.assertEqual(len(niedrig), 1)
+
+        # Tupfer fällt unter das Minimum (5) - einmal gemeldet, beim nächsten Abgang nicht nochmal
+        lager.abgang_buchen("Tupfer", 3, "EG", "02.06.2025")
+        self.assertEqual(niedrig.aktualisieren(lager.artikel_zeilen_laden([tupfer]), [tupfer]), [tupfer])
+        lager.abgang_buchen("Tupfer", 1, "EG", "02.06.2025")
+        self.assertEqual(niedrig.aktualisieren(lager.artikel_zeilen_laden([tupfer]), [tupfer]), [])
+        self.assertEqual([(artikel_id, neu) for artikel_id, neu, *_ in niedrig.eintraege()],
+                         [(tupfer, True), (pflaster, False)])
+        niedrig.gesehen()
+        self.assertEqual(niedrig.neu, set())
+
+        # Pflaster wieder aufgefüllt und gelöscht: fällt aus der Liste, neu laden ergibt dasselbe
+        lager.zugang_speichern("Pflaster", 10, "Stück", "Labor", "EG", "03.06.2025")
+        lager.artikel_loeschen(tupfer, "EG")
+        niedrig.aktualisieren(lager.artikel_zeilen_laden([pflaster, tupfer]), [pflaster, tupfer])
+        self.assertEqual(len(niedrig), 0)
+        self.assertEqual(niedrig.setzen(lager.niedrige_bestaende_laden()), [])
+        print("Meldungen funktionieren")
+
+    def test_scannen(self):
+        """Test: PZN und GTIN umrechnen, Code zuordnen, Scans paketweise als Abgang buchen"""
+        # PZN mit "-" (Strichcode), mit "PZN" davor oder alt mit 7 Ziffern ergibt dieselbe GTIN
+        gtin = scannen.code_normalisieren("-04114918")
+        self.assertEqual(gtin, "4150041149186")
+        self.assertEqual(scannen.code_normalisieren("PZN 4114918"), gtin)
+        self.assertEqual(scannen.code_anzeigen(gtin), "PZN 04114918")
+        self.assertEqual(scannen.code_normalisieren("04006381333931"), "4006381333931")
+        for falsch in ("-04114917", "4006381333932", "Pflaster", "123"):
+            with self.assertRaises(scannen.CodeFehler):
+                scannen.code_normalisieren(falsch)
+
+        pflaster = lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "01.06.2025")
+        tupfer = lager.zugang_speichern("Tupfer", 5, "Packung", "Labor", "EG", "01.06.2025")
+        lager.artikel_aendern(pflaster, "Pflaster", 2, 5, "Stück", "Labor", "EG", code="-04114918")
+        lager.artikel_aendern(tupfer, "Tupfer", 5, 5, "Packung", "Labor", "EG", code="4006381333931")
+        self.assertEqual(lager.code_laden(pflaster), gtin)
+        with self.assertRaises(lager.BuchungsFehler):
+            lager.artikel_aendern(tupfer, "Tupfer", 5, 5, "Packung", "Labor", "EG", code="PZN 04114918")
+
+        # Drei Scans Pflaster (nur 2 da), ein Tupfer, ein unbekannter Code - alles in einem Paket
+        scans = [(gtin, "EG", "2025-06-02")] * 3 + [("4006381333931", "EG", "2025-06-02"),
+                                                    ("4150123456782", "EG", "2025-06-02")]
+        ergebnis = lager.scans_buchen(scans)
+        self.assertEqual([fehlertext for *_, fehlertext in ergebnis],
+                         [None, None, "Kein Bestand mehr", None, "Unbekannter Code"])
+        self.assertEqual(self.bestand(pflaster), 0)
+        self.assertEqual(self.bestand(tupfer), 4)
+
+        # Code entfernen
+        lager.artikel_aendern(tupfer, "Tupfer", 4, 5, "Packung", "Labor", "EG", code="")
+        self.assertEqual(lager.code_laden(tupfer), "")
+        print("Scannen funktioniert")
+
+    def test_prognose(self):
+        """Test: Gleichmäßiger Verbrauch wird erkannt, stückweise gerechnet = neu gerechnet, Bestellmenge"""
+        pflaster = lager.zugang_speichern("Pflaster", 200, "Stück", "Labor", "EG", "01.06.2025")
+        lager.artikel_aendern(pflaster, "Pflaster", 200, 20, "Stück", "Labor", "EG")
+        for tag in range(1, 21):
+            lager.abgang_buchen("Pflaster", 4, "EG", f"{tag:02d}.06.2025")
+            if tag == 10:
+                prognose.aktualisieren("2025-06-10")  # die Hälfte schon einmal einrechnen
+        self.assertEqual(prognose.aktualisieren("2025-06-20"), 10)
+        self.assertEqual(prognose.aktualisieren("2025-06-20"), 0)
+
+        # 4 Stück pro Tag, Bestand 120: reicht 30 Tage, in 7 Tagen Lieferzeit noch über dem Minimum
+        vorschlaege = prognose.bestellvorschlaege(heute="2025-06-20", alle=True)
+        _, _, bestand, _, _, _, pro_tag, tage_bis_leer, menge = vorschlaege[0]
+        self.assertEqual((bestand, pro_tag, round(tage_bis_leer), menge), (120, 4.0, 30, 0))
+        self.assertEqual(prognose.bestellvorschlaege(heute="2025-06-20"), [])
+
+        # Das ganze Journal neu gerechnet ergibt dasselbe
+        prognose.neu_berechnen("2025-06-20")
+        self.assertEqual(prognose.bestellvorschlaege(heute="2025-06-20", alle=True), vorschlaege)
+
+        # Bei 30 Tagen Lieferzeit: 4 * (30 + 30) + 20 - 120 = 140 Stück nachbestellen
+        self.assertEqual(prognose.bestellvorschlaege(30, 30, heute="2025-06-20")[0][-1], 140)
+        print("Prognose funktioniert")
+
+    def test_export(self):
+        """Test: Export nach Lagerort schreibt nur passende Artikel"""
+        lager.zugang_speichern("Pflaster", 2, "Stück", "Schrank 1", "EG", "01.06.2025")
+        lager.zugang_speichern("Spritzen", 50, "Stück", "Schrank 2", "EG", "01.06.2025")
+        pfad = os.path.join(self.ordner.name, "inventur.csv")
+        self.assertEqual(lager.inventur_schreiben(pfad, lagerort="Schrank 2"), 1)
+        with open(pfad, encoding="utf-8") as datei:
+            self.assertIn("Spritzen", datei.read())
+        print("Export funktioniert")
+
+    def test_suche(self):
+        """Test: Suchindex findet Teilwörter, folgt Änderungen und hilft bei Tippfehlern"""
+        artikel_id = lager.zugang_speichern("Leukoplast Pflaster", 5, "Stück", "Labor", "EG", "01.06.2025")
+        lager.zugang_speichern("Spritzen 5ml", 50, "Stück", "Schrank 2", "EG", "01.06.2025")
+
+        def treffer(suchtext):
+            tabelle, id_spalte, bedingung, parameter = lager.suche_vorbereiten(suchtext)
+            return [zeile[0] for zeile in datenbank.abfrage(
+                f"SELECT {id_spalte} FROM {tabelle} WHERE {bedingung}", parameter)]
+
+        self.assertIsNone(lager.suche_vorbereiten("  "))
+        self.assertEqual(treffer("flast"), [artikel_id])
+        self.assertEqual(treffer("labor"), [artikel_id])
+        self.assertEqual(treffer("Le"), [artikel_id])
+        zink = lager.zugang_speichern("Zinksalbe", 1, "Tube", "Labor", "EG", "01.06.2025")
+        self.assertEqual(treffer("Z"), [zink])    # Großbuchstabe am Ende: Bereich trotzdem klein
+        self.assertEqual(treffer("z"), [zink])
+        self.assertEqual(treffer("ZI"), [zink])
+        self.assertEqual(treffer("Pflastr"), [artikel_id])
+        lager.artikel_aendern(artikel_id, "Mullbinde", 5, 2, "Stück", "Labor", "EG")
+        self.assertEqual(treffer("Mullbinde"), [artikel_id])
+        print("Suche funktioniert")
+
+    def test_tabelle_sortieren_mit_leeren_werten(self):
+        """Test: Seitenweises Lesen (Keyset) verliert beim Sortieren keine Artikel ohne Wert (NULL)"""
+        with datenbank.transaktion() as cursor:
+            for nummer in range(25):
+                cursor.execute("INSERT INTO artikel (produktname, aktuellerbestand, einheit, lagerort, Kürzel) "
+                               "VALUES (?, 1, 'Stück', 'Labor', ?)",
+                               (f"Artikel {nummer}", None if nummer % 3 == 0 else f"K{nummer % 4}"))
+
+        class Attrappe:
+            """Ersetzt Treeview und Scrollbar - hier werden nur die Abfragen gebaut"""
+            def configure(self, **optionen): pass
+            def bind(self, *argumente): pass
+
+        tabelle = tabellenansicht.VirtuelleTabelle(Attrappe(), Attrappe(), None, None, seitengroesse=4)
+        tabelle.gesamt = 25
+        erwartet = {}
+        for absteigend in (False, True):
+            tabelle.sortierung = (6, absteigend)
+            erwartet[absteigend] = [zeile[0] for zeile in datenbank.abfrage(
+                "SELECT artikel_id FROM artikel ORDER BY Kürzel" + " DESC" * absteigend
+                + ", artikel_id" + " DESC" * absteigend)]
+
+            def seite(nr):
+                sql, parameter, rueckwaerts = tabelle._abfrage(nr)
+                tabelle._seiten[nr] = tabellenansicht.VirtuelleTabelle._abfragen_ausfuehren(
+                    {nr: (sql, parameter, rueckwaerts)})[nr]
+                return [zeile[0] for zeile in tabelle._seiten[nr]]
+
+            # Vorwärts von der ersten Seite (Keyset über die Seite davor)
+            tabelle._seiten.clear()
+            gelesen = [artikel_id for nr in range(7) for artikel_id in seite(nr)]
+            self.assertEqual(gelesen, erwartet[absteigend])
+
+            # Rückwärts von der letzten Seite (Keyset über die Seite danach)
+            tabelle._seiten.clear()
+            gelesen = [seite(nr) for nr in range(6, -1, -1)]
+            self.assertEqual([artikel_id for zeilen in reversed(gelesen) for artikel_id in zeilen],
+                             erwartet[absteigend])
+        print("Sortieren mit leeren Werten funktioniert")
+
+    def test_datum(self):
+        """Test: Datum wird als ISO gespeichert, Zeitraum-Export und Umstellung alter Daten"""
+        mai = lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "15.05.2025")
+        lager.zugang_speichern("Spritzen", 5, "Stück", "Labor", "EG", "2025-06-01")
+        self.assertEqual(lager.artikel_zeilen_laden([mai])[mai][7], "2025-05-15")
+        with self.assertRaises(lager.BuchungsFehler):
+            lager.abgang_buchen("Pflaster", 1, "EG", "31.02.2025")
+
+        # Zeitraum "alles aus dem Mai", im Export wieder deutsches Datum
+        pfad = os.path.join(self.ordner.name, "mai.csv")
+        self.assertEqual(lager.inventur_schreiben(pfad, von="2025-05-01", bis="2025-05-31"), 1)
+        with open(pfad, encoding="utf-8") as datei:
+            self.assertIn("15.05.2025", datei.read())
+
+        # Alte Datenbank mit deutschem Datum wird einmalig umgestellt
+        with datenbank.transaktion() as cursor:
+            cursor.execute("UPDATE artikel SET datum = '03.04.2024' WHERE artikel_id = ?", (mai,))
+            cursor.execute("DROP TRIGGER buchungen_nicht_aendern")
+            cursor.execute("UPDATE buchungen SET datum = '03.04.2024' WHERE artikel_id = ?", (mai,))
+            cursor.execute(datenbank.TRIGGER_SQL[2])
+            cursor.execute("PRAGMA user_version = 0")
+        lager.erstelle_datenbank_falls_nicht_vorhanden()
+        self.assertEqual(lager.artikel_zeilen_laden([mai])[mai][7], "2024-04-03")
+        self.assertEqual(datenbank.abfrage("SELECT DISTINCT datum FROM buchungen WHERE artikel_id = ?", (mai,)),
+                         [("2024-04-03",)])
+        with self.assertRaises(sqlite3.IntegrityError):
+            datenbank.ausfuehren("UPDATE buchungen SET menge = 0")  # Journal ist wieder gesperrt
+        print("Datum funktioniert")
+
+    def test_migrationen(self):
+        """Test: Schritte laufen nur einmal, ein fehlerhafter Schritt ändert gar nichts"""
+        self.assertEqual(datenbank.schema_version(), len(lager.MIGRATIONEN))
+        self.assertFalse(lager.erstelle_datenbank_falls_nicht_vorhanden())
+
+        def kaputt(cursor):
+            cursor.execute("CREATE TABLE halb_fertig (x INTEGER)")
+            raise RuntimeError("Fehler mitten im Schritt")
+
+        with self.assertRaises(RuntimeError):
+            datenbank.migrieren(lager.MIGRATIONEN + [kaputt])
+        self.assertEqual(datenbank.schema_version(), len(lager.MIGRATIONEN))
+        self.assertIsNone(datenbank.abfrage_eins("SELECT name FROM sqlite_master WHERE name = 'halb_fertig'"))
+
+        neu = lager.MIGRATIONEN + [lambda cursor: cursor.execute("CREATE INDEX idx_test ON artikel(einheit, lagerort)")]
+        self.assertEqual(datenbank.migrieren(neu), 1)
+        self.assertEqual(datenbank.migrieren(neu), 0)
+        self.assertEqual(datenbank.schema_version(), len(neu))
+        print("Migrationen funktionieren")
+
+    def test_bearbeiten_mit_anderem_arbeitsplatz(self):
+        """Test: Änderungen von einem anderen Arbeitsplatz gehen beim Speichern nicht verloren"""
+        artikel_id = lager.zugang_speichern("Pflaster", 10, "Stück", "Schrank 1", "EG", "01.06.2025")
+        alt = lager.artikel_zeilen_laden([artikel_id])[artikel_id]  # Fenster wird geöffnet
+
+        # Inzwischen: Abgang und neuer Lagerort an einem anderen Arbeitsplatz
+        lager.abgang_buchen("Pflaster", 3, "AB", "02.06.2025")
+        lager.artikel_aendern(artikel_id, "Pflaster", 7, 5, "Stück", "Schrank 9", "EG")
+
+        # Gespeichert wird: Bestand 10 -> 12 (also +2) und neuer Name
+        self.assertEqual(lager.artikel_aendern(artikel_id, "Pflaster groß", 12, 5, "Stück", "Schrank 1", "EG",
+                                               alt=alt), 9)
+        _, name, bestand, _, _, lagerort, _, _ = lager.artikel_zeilen_laden([artikel_id])[artikel_id]
+        self.assertEqual((name, bestand, lagerort), ("Pflaster groß", 9, "Schrank 9"))
+
+        # Beide ändern dasselbe Feld unterschiedlich -> Konflikt, nichts wird gespeichert
+        with self.assertRaises(lager.KonfliktFehler):
+            lager.artikel_aendern(artikel_id, "Pflaster", 20, 5, "Stück", "Labor", "EG", alt=alt)
+        self.assertEqual(self.bestand(artikel_id), 9)
+        print("Bearbeiten mit anderem Arbeitsplatz funktioniert")
+
+    def test_aenderungen_anderer_arbeitsplaetze(self):
+        """Test: Nur Änderungen von anderen Verbindungen werden gemeldet, mit den richtigen Artikeln"""
+        pflaster = lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "01.06.2025")
+        spritzen = lager.zugang_speichern("Spritzen", 5, "Stück", "Labor", "EG", "01.06.2025")
+        stand, ids = lager.aenderungen_pruefen()
+        self.assertEqual(ids, [])
+
+        lager.abgang_buchen("Pflaster", 1, "EG", "02.06.2025")  # eigene Änderung
+        self.assertEqual(lager.aenderungen_pruefen(stand), (stand, []))
+
+        anderer = sqlite3.connect(datenbank.DB_DATEI)
+        try:
+            anderer.execute("UPDATE artikel SET lagerort = 'Keller' WHERE artikel_id = ?", (spritzen,))
+            anderer.commit()
+            stand, ids = lager.aenderungen_pruefen(stand)
+            self.assertEqual(sorted(ids), [pflaster, spritzen])  # eigene seit dem letzten Stand kommen mit
+            self.assertEqual(lager.aenderungen_pruefen(stand), (stand, []))
+
+            anderer.execute("DELETE FROM artikel WHERE artikel_id = ?", (pflaster,))
+            anderer.commit()
+            self.assertEqual(lager.aenderungen_pruefen(stand)[1], [pflaster])
+        finally:
+            anderer.close()
+        print("Änderungen anderer Arbeitsplätze funktionieren")
+
+    def test_journal_modus(self):
+        """Test: Standard ist DELETE (Netzlaufwerk), WAL nur auf Wunsch"""
+        self.assertEqual(datenbank.abfrage_eins("PRAGMA journal_mode")[0], "delete")
+        alter_modus = datenbank.JOURNAL_MODUS
+        datenbank.schliessen()
+        datenbank.JOURNAL_MODUS = "WAL"
+        try:
+            self.assertEqual(datenbank.abfrage_eins("PRAGMA journal_mode")[0], "wal")
+        finally:
+            datenbank.schliessen()
+            datenbank.JOURNAL_MODUS = alter_modus
+        self.assertEqual(datenbank.abfrage_eins("PRAGMA journal_mode")[0], "delete")
+        print("Journal-Modus funktioniert")
+
+    def test_gesperrte_datenbank(self):
+        """Test: Schreibt ein anderer Arbeitsplatz gerade, wird gewartet und neu versucht"""
+        datenbank.schliessen()
+        alte_wartezeit = datenbank.WARTEZEIT_SPERRE
+        datenbank.WARTEZEIT_SPERRE = 0.05
+        anderer = sqlite3.connect(datenbank.DB_DATEI, isolation_level=None, check_same_thread=False)
+        try:
+            anderer.execute("BEGIN IMMEDIATE")
+            threading.Timer(0.1, anderer.execute, ("COMMIT",)).start()
+            artikel_id = lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "01.06.2025")
+            self.assertEqual(self.bestand(artikel_id), 2)
+
+            anderer.execute("BEGIN IMMEDIATE")
+            with self.assertRaises(sqlite3.OperationalError):
+                lager.abgang_buchen("Pflaster", 1, "EG", "02.06.2025")
+            anderer.execute("COMMIT")
+            self.assertEqual(self.bestand(artikel_id), 2)
+        finally:
+            anderer.close()
+            datenbank.schliessen()
+            datenbank.WARTEZEIT_SPERRE = alte_wartezeit
+        print("Gesperrte Datenbank funktioniert")
+
+    def test_diagnose(self):
+        """Test: Mit eingeschalteter Diagnose werden SQL-Befehle mit Zeilenanzahl gemessen"""
+        diagnose.AKTIV = True
+        diagnose.leeren()
+        try:
+            lager.zugang_speichern("Pflaster", 2, "Stück", "Labor", "EG", "01.06.2025")
+            lager.daten_aus_db_laden()
+        finally:
+            diagnose.AKTIV = False
+        lager.daten_aus_db_laden()  # ausgeschaltet: wird nicht mehr gemessen
+
+        messungen = [(art, name.split()[0], zeilen) for _, _, art, name, _, zeilen in diagnose.eintraege()]
+        self.assertIn(("SQL", "INSERT", 1), messungen)
+        self.assertIn(("SQL", "COMMIT", None), messungen)
+        self.assertEqual([zeilen for art, befehl, zeilen in messungen if befehl == "SELECT"], [1])
+
+        pfad = os.path.join(self.ordner.name, "diagnose.log")
+        diagnose.speichern(pfad)
+        with open(pfad, encoding="utf-8") as datei:
+            self.assertIn("BEGIN IMMEDIATE", datei.read())
+        print("Diagnose funktioniert")
+
+# Tests ausführen
+if __name__ == "__main__":
+    print("Lager Tests werden ausgeführt...")
+    unittest.main(verbosity=2)
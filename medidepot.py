@@ -5,137 +5,251 @@
 
 
 import tkinter
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-import sqlite3
-import os, sys
-import csv
+import os
+import time
+
+import diagnose
+import lager
+import prognose
+import sammelimport
+import scannen
+from hintergrund import DatenbankArbeiter
+from meldungen import Bestandsmeldung, NiedrigeBestaende
+from tabellenansicht import VirtuelleTabelle
+from vorschlaege import NamensIndex, Vorschlagsliste
 
 
 # Variable um zu merken ob es der erste Start ist
 erster_start = False
 
-# WICHTIGE FUNKTION: Findet den richtigen Ort für die Datenbank
-def get_writable_path(filename):
+# Größe des Hauptfensters
+FENSTER_BREITE = 1200
+FENSTER_HOEHE = 900
+
+# Wird das Hauptfenster schon angezeigt? Bis dahin (z.B. solange das Login offen ist)
+# werden Meldungen aufgehoben und erst mit dem Fenster gezeigt - siehe wenn_sichtbar()
+fenster_sichtbar = False
+aufgehobene_meldungen = []
+
+# Kürzel des angemeldeten Benutzers (aus dem Login) - steht schon in den Kürzel-Feldern
+angemeldetes_kuerzel = ""
+
+# Alle Artikelnamen sortiert im Speicher, für die Vorschläge beim Tippen (siehe vorschlaege.py).
+# Wird beim Start im Hintergrund geladen und danach bei jeder Änderung nachgeführt.
+namensindex = NamensIndex()
+
+# Alle Artikel mit niedrigem Bestand im Speicher (siehe meldungen.py). Nach einer Buchung werden
+# nur die gebuchten Artikel nachgeführt - gemeldet werden nur Artikel, die NEU darunter fallen.
+niedrige_bestaende = NiedrigeBestaende()
+
+# Suche: erst suchen, wenn so lange (Millisekunden) nichts mehr getippt wurde
+SUCH_VERZOEGERUNG = 250
+# Die geplante Suche (fenster.after), damit sie bei jedem Tastendruck verschoben werden kann
+suche_geplant = None
+
+# Andere Arbeitsplätze: alle AKTUALISIEREN_MS Millisekunden nach Änderungen schauen
+AKTUALISIEREN_MS = 2000
+# Stand der letzten Prüfung (siehe lager.aenderungen_pruefen)
+aenderungs_stand = None
+
+# Diagnose (nur mit MEDIDEPOT_DIAGNOSE=1): alle HERZSCHLAG_MS prüfen, ob das Fenster blockiert war
+HERZSCHLAG_MS = 100
+# Das Diagnose-Fenster aktualisiert sich alle DIAGNOSE_AKTUALISIEREN_MS selbst
+DIAGNOSE_AKTUALISIEREN_MS = 1000
+
+# Alle Arbeiten am Lager stehen in lager.py (ohne tkinter, auch für die Kommandozeile).
+# Sie laufen hier im Hintergrund-Thread (siehe hintergrund.py).
+
+
+# FENSTER-FUNKTIONEN (laufen im Tk-Thread, die Arbeit macht der Hintergrund-Arbeiter)
+
+
+def wenn_sichtbar(funktion, *argumente):
     """
-    Diese Funktion sorgt dafür, dass die Datenbank immer am richtigen Ort gespeichert wird.
-    - Beim Programmieren: im aktuellen Ordner
-    - Als App: im Application Support Ordner (wo Apps ihre Daten speichern dürfen)
+    Ruft funktion(*argumente) sofort auf - oder erst in anzeigen(), solange das Hauptfenster
+    noch versteckt ist. So erscheint keine Meldung (z.B. Datenbank-Fehler) über dem Login-Fenster.
     """
-    if getattr(sys, 'frozen', False):  # Prüft ob es eine gepackte App ist
-        # App-Version: Spezialordner für App-Daten verwenden
-        app_support = os.path.expanduser("~/Library/Application Support/MediDepot")
-        if not os.path.exists(app_support):  # Ordner erstellen falls er nicht existiert
-            os.makedirs(app_support)
-        return os.path.join(app_support, filename)
+    if fenster_sichtbar:
+        funktion(*argumente)
     else:
-        # Entwicklungsversion: aktueller Ordner
-        return filename
+        aufgehobene_meldungen.append((funktion, argumente))
+
+def datenbank_fehler(fehler):
+    """Standard-Fehlermeldung für Aufträge ohne eigene Fehlerbehandlung."""
+    wenn_sichtbar(messagebox.showerror, "Datenbank-Fehler", f"Kann nicht aus Datenbank laden!\n{fehler}")
 
-def erstelle_datenbank_falls_nicht_vorhanden():
+def besetzt_anzeigen(besetzt):
+    """Zeigt in der Statusleiste an, ob der Hintergrund-Arbeiter gerade beschäftigt ist."""
+    status_label.config(text="⏳ Datenbank arbeitet..." if besetzt else "")
+    fenster.config(cursor="watch" if besetzt else "")
+
+def zeile_darstellen(eintrag):
     """
-    Erstellt automatisch eine neue Datenbank mit Beispieldaten,
-    falls noch keine existiert. Wird beim Programmstart aufgerufen.
-    WICHTIG: Diese Funktion sorgt dafür, dass die App auf jedem Computer funktioniert!
+    Macht aus einer Datenbank-Zeile die Werte für die Tabelle.
+    Bei niedrigem Bestand bekommt der aktuelle Bestand ein Warnsymbol (⚠️).
+    Das Datum (in der Datenbank JJJJ-MM-TT) wird im deutschen Format angezeigt.
+    Gibt (werte, niedrig) zurück.
     """
-    global erster_start
-    db_path = get_writable_path("praxislager.db")
+    werte = list(eintrag)
     
-    try:
-        # Verbindung zur Datenbank (wird erstellt falls nicht vorhanden)
-        connection = sqlite3.connect(db_path)
-        cursor = connection.cursor()
-        
-        # Prüfen ob Tabelle "artikel" existiert
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='artikel'")
-        tabelle_existiert = cursor.fetchone() is not None
-        
-        if tabelle_existiert:
-            connection.close()
-            return
-        
-        # Merken dass es der erste Start ist
-        erster_start = True
-        
-        # Tabelle erstellen (gleiche Struktur wie im Original)
-        sql = "CREATE TABLE artikel(" \
-              "artikel_id INTEGER PRIMARY KEY AUTOINCREMENT, " \
-              "produktname TEXT, " \
-              "aktuellerbestand INTEGER, " \
-              "mindestbestand INTEGER, " \
-              "einheit TEXT, " \
-              "lagerort TEXT, " \
-              "datum TEXT, " \
-              "Kürzel TEXT)"
-        cursor.execute(sql)
-        connection.commit()
-        connection.close()
-        
-        
-    except Exception as e:
-        messagebox.showerror("Datenbank-Fehler", 
-                           f"Konnte keine Datenbank erstellen:\n{e}\n\nBitte Administrator kontaktieren.")
+    # Bestand prüfen: Position 2 = aktueller Bestand, Position 3 = Mindestbestand
+    aktueller_bestand = int(eintrag[2])
+    mindest_bestand = int(eintrag[3])
+    
+    # Wenn aktueller Bestand <= Mindestbestand, dann Warnsymbol anhängen
+    niedrig = aktueller_bestand <= mindest_bestand
+    if niedrig:
+        werte[2] = f"{aktueller_bestand} ⚠️"
+    
+    # Position 7 = Datum
+    werte[7] = lager.datum_deutsch(eintrag[7])
+    
+    return werte, niedrig
+
+def niedrige_bestaende_pruefen():
+    """
+    Lädt alle Artikel mit niedrigem Bestand neu (eine Abfrage über den Teil-Index) - nur nach
+    vielen Änderungen auf einmal. Neu dazugekommene erscheinen in der Statusleiste, ohne Fenster.
+    """
+    def fertig(niedrig):
+        niedrige_bestaende.setzen(niedrig)
+        bestandsmeldung.anzeigen()
+    
+    arbeiter.auftrag(lager.niedrige_bestaende_laden, fertig=fertig)
 
-# DATENBANK-FUNKTIONEN (Hier wird mit der Datenbank gearbeitet)
+def tabelle_neu_laden():
+    """
+    Lädt die Tabelle neu aus der Datenbank.
+    Wird nur beim Programmstart und über den Button "Tabelle neu laden" aufgerufen.
+    Nach Zugang/Abgang/Ändern/Löschen reicht tabelle_zeilen_aktualisieren().
+    Die Tabelle zeigt nur die sichtbaren Zeilen (siehe tabellenansicht.py).
+    Prüft auch, welche Bestände zu niedrig sind (Anzeige unten rechts in der Statusleiste).
+    """
+    # Schritt 1: Gespeicherte Seiten vergessen und sichtbaren Bereich neu laden
+    ansicht.neu_laden()
+    
+    # Schritt 2: Artikel mit niedrigem Bestand direkt in der Datenbank suchen
+    niedrige_bestaende_pruefen()
+    
+    # Schritt 3: Vorschläge für die Artikelnamen neu aufbauen (nach der ersten Seite der Tabelle)
+    namen_laden()
+
+def namen_laden():
+    """Lädt alle Artikelnamen im Hintergrund in einen neuen NamensIndex (für die Vorschläge)."""
+    def fertig(index):
+        global namensindex
+        namensindex = index
+    
+    arbeiter.auftrag(NamensIndex.laden, fertig=fertig)
+
+def zugang_vorschlag_gewaehlt(artikel_id, name, einheit, lagerort):
+    """Vorschlag im Zugang gewählt: Einheit und Lagerort des Artikels eintragen."""
+    for feld, wert in ((einheit_feld, einheit), (ort_feld, lagerort)):
+        feld.delete(0, tkinter.END)
+        feld.insert(0, wert)
+    anzahl_feld.focus_set()
 
+def abgang_vorschlag_gewaehlt(artikel_id, name, einheit, lagerort):
+    """Vorschlag im Abgang gewählt: Einheit und Lagerort des Artikels eintragen."""
+    for feld, wert in ((abgang_einheit_feld, einheit), (abgang_ort_feld, lagerort)):
+        feld.delete(0, tkinter.END)
+        feld.insert(0, wert)
+    abgang_anzahl_feld.focus_set()
 
-def daten_aus_db_laden():
+def suche_eingegeben(*_):
     """
-    Lädt alle Artikel aus der Datenbank und gibt sie zurück.
-    Wird verwendet um die Tabelle zu füllen.
+    Wird bei jedem Tastendruck im Suchfeld aufgerufen.
+    Gesucht wird erst, wenn SUCH_VERZOEGERUNG lang nichts mehr getippt wurde -
+    so läuft beim schnellen Tippen nicht für jeden Buchstaben eine Abfrage.
     """
-    try:
-        # Datenbank öffnen
-        db_path = get_writable_path("praxislager.db")  # Richtigen Pfad holen
-        conn = sqlite3.connect(db_path)               # Verbindung zur Datenbank
-        cursor = conn.cursor()                        # Cursor zum Ausführen von Befehlen
-        
-        # SQL-Befehl: Alle Artikel aus der Tabelle holen
-        cursor.execute("SELECT artikel_id, produktname, aktuellerbestand, mindestbestand, einheit, lagerort, Kürzel, datum FROM artikel")
-        daten = cursor.fetchall()                     # Alle Ergebnisse holen
-        conn.close()                                  # Datenbank schließen
-        
-        return daten                                  # Daten zurückgeben
+    global suche_geplant
+    if suche_geplant:
+        fenster.after_cancel(suche_geplant)
+    suche_geplant = fenster.after(SUCH_VERZOEGERUNG, suchen)
+
+def suchen():
+    """Sucht im Hintergrund (Suchindex) und zeigt danach nur noch die Treffer in der Tabelle an."""
+    global suche_geplant
+    suche_geplant = None
+    suchtext = such_var.get()
+    
+    def fertig(quelle):
+        if such_var.get() != suchtext:
+            return  # Inzwischen weitergetippt - die neuere Suche kommt gleich
+        ansicht.filtern(quelle)
+    
+    arbeiter.auftrag(lager.suche_vorbereiten, suchtext, fertig=fertig)
+
+def suche_leeren(event=None):
+    """Leert das Suchfeld - danach werden wieder alle Artikel angezeigt."""
+    such_var.set("")
+
+def anzahl_anzeigen(anzahl):
+    """Zeigt beim Suchen die Anzahl der Treffer neben der Überschrift an."""
+    if such_var.get().strip():
+        tabelle_titel.config(text=f"Lagerbestand Übersicht - {anzahl} Treffer")
+    else:
+        tabelle_titel.config(text="Lagerbestand Übersicht")
+
+def spalte_sortieren(spalte):
+    """
+    Sortiert die Tabelle nach der angeklickten Spalte (nochmal klicken = umgekehrt).
+    Sortiert wird in SQLite über einen Index - es werden weiterhin nur die sichtbaren Seiten geladen.
+    """
+    ansicht.sortieren(spalte)
+    
+    # Pfeil in der Überschrift der sortierten Spalte anzeigen
+    sortiert, absteigend = ansicht.sortierung
+    for nr, col in enumerate(columns):
+        pfeil = (" ▼" if absteigend else " ▲") if nr == sortiert else ""
+        treeview.heading(col, text=col + pfeil)
+
+def tabelle_zeilen_aktualisieren(artikel_ids):
+    """
+    Aktualisiert nur die Zeilen der geänderten Artikel in der Tabelle.
+    Geänderte Zeilen werden überschrieben. Kommen Artikel dazu oder fallen weg,
+    wird nur der sichtbare Bereich neu geladen.
+    Das Warnsymbol (⚠️) und die niedrigen Bestände werden nur für diese Artikel neu berechnet.
+    Fällt einer neu unter sein Minimum, steht das in der Statusleiste - die Arbeit geht weiter.
+    """
+    def fertig(daten):
+        # Zeilen in der Tabelle ersetzen (oder sichtbaren Bereich neu laden)
+        ansicht.zeilen_aktualisieren(daten, artikel_ids)
+        # Vorschläge für die Artikelnamen nachführen (neu, umbenannt, gelöscht)
+        namensindex.aktualisieren(daten, artikel_ids)
         
-    except Exception as e:
-        # Falls ein Fehler auftritt (z.B. Datenbank nicht gefunden)
-        messagebox.showerror("Datenbank-Fehler", "Kann nicht aus Datenbank laden!")
-        return []                                     # Leere Liste zurückgeben
+        # Niedrige Bestände nur für die geänderten Artikel nachführen
+        niedrige_bestaende.aktualisieren(daten, artikel_ids)
+        bestandsmeldung.anzeigen()
+    
+    # Aktuelle Daten nur für die geänderten Artikel holen (im Hintergrund)
+    arbeiter.auftrag(lager.artikel_zeilen_laden, artikel_ids, fertig=fertig)
 
-def tabelle_neu_laden():
+def aenderungen_pruefen():
     """
-    Löscht alle Einträge aus der Tabelle und lädt sie neu aus der Datenbank.
-    Wird nach jedem Hinzufügen/Löschen/Ändern aufgerufen.
-    NEUE FUNKTION: Prüft auch ob Bestände zu niedrig sind.
+    Schaut nach, ob ein anderer Arbeitsplatz etwas geändert hat, und übernimmt nur
+    diese Artikel in die Tabelle. Plant sich danach selbst wieder ein (fenster.after).
+    Solange niemand anderes schreibt, wird dabei nur eine Zahl gelesen (PRAGMA data_version).
     """
-    # Schritt 1: Alte Einträge aus der Tabelle löschen
-    for item in treeview.get_children():
-        treeview.delete(item)
+    def fertig(ergebnis):
+        global aenderungs_stand
+        aenderungs_stand, artikel_ids = ergebnis
+        if artikel_ids is None:
+            ansicht.neu_laden()  # sehr viele Änderungen (z.B. Sammel-Import)
+            namen_laden()
+            niedrige_bestaende_pruefen()
+        elif artikel_ids:
+            tabelle_zeilen_aktualisieren(artikel_ids)
+        fenster.after(AKTUALISIEREN_MS, aenderungen_pruefen)
     
-    # Schritt 2: Neue Daten aus Datenbank holen und in Tabelle einfügen
-    daten = daten_aus_db_laden()
-    niedrige_bestaende = []  # Liste für Artikel mit niedrigem Bestand
+    def fehler(e):
+        # z.B. Datenbank gerade gesperrt - beim nächsten Mal nochmal versuchen
+        fenster.after(AKTUALISIEREN_MS, aenderungen_pruefen)
     
-    for eintrag in daten:
-        # Eintrag in Tabelle einfügen
-        item = treeview.insert('', 'end', values=eintrag)
-        
-        # Bestand prüfen: Position 2 = aktueller Bestand, Position 3 = Mindestbestand
-        aktueller_bestand = int(eintrag[2])
-        mindest_bestand = int(eintrag[3])
-        artikel_name = eintrag[1]
-        
-        # Wenn aktueller Bestand <= Mindestbestand, dann Warnung
-        if aktueller_bestand <= mindest_bestand:
-            # Zeile mit Warnsymbol markieren
-            treeview.set(item, 'Aktueller Bestand', f"{aktueller_bestand} ⚠️")
-            niedrige_bestaende.append(f"• {artikel_name}: {aktueller_bestand} (Minimum: {mindest_bestand})")
-    
-    # Warnung anzeigen wenn Bestände niedrig sind (aber nicht beim ersten Start)
-    if niedrige_bestaende and not erster_start:
-        warnung_text = "WARNUNG: Folgende Artikel haben niedrige Bestände:\n\n" + "\n".join(niedrige_bestaende)
-        warnung_text += "\n\nBitte Nachbestellung prüfen!"
-        messagebox.showwarning("Niedrige Bestände!", warnung_text)
+    # Ohne Besetzt-Anzeige - sonst blinken Sanduhr und Statusleiste alle paar Sekunden
+    arbeiter.auftrag(lager.aenderungen_pruefen, aenderungs_stand, fertig=fertig, fehler=fehler, anzeigen=False)
 
 def hinzufugen():
     """
@@ -155,38 +269,44 @@ def hinzufugen():
         messagebox.showwarning("Warnung", "Bitte füllen Sie alle Felder aus!")
         return  # Funktion beenden wenn Felder leer sind
     
-    # Schritt 3: Neuen Artikel in die Datenbank speichern
+    # Anzahl in Zahl umwandeln (wird als Buchung gespeichert)
     try:
-        # Datenbank öffnen
-        db_path = get_writable_path("praxislager.db")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # SQL-Befehl: Neuen Artikel einfügen (mindestbestand = 5 als Standard)
-        cursor.execute("""
-            INSERT INTO artikel (produktname, aktuellerbestand, mindestbestand, einheit, lagerort, Kürzel, datum)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (artikel_name, anzahl_name, 5, einheit_name, ort_name, kuerzel_name, datum_name))
-        
-        conn.commit()  # Änderungen speichern
-        conn.close()   # Datenbank schließen
-        
+        anzahl = int(anzahl_name)
+    except ValueError:
+        messagebox.showerror("Fehler", "Anzahl muss eine Zahl sein!")
+        return
+    if anzahl <= 0:
+        messagebox.showerror("Fehler", "Anzahl muss größer als 0 sein!")
+        return
+    
+    # Datum prüfen (gespeichert wird es im ISO-Format JJJJ-MM-TT)
+    datum = lager.datum_nach_iso(datum_name)
+    if datum is None:
+        messagebox.showerror("Fehler", "Datum muss im Format TT.MM.JJJJ sein!")
+        return
+    
+    def fertig(artikel_id):
         # Schritt 4: Eingabefelder leeren für nächste Eingabe
         artikel_feld.delete(0, tkinter.END)
         anzahl_feld.delete(0, tkinter.END)
         einheit_feld.delete(0, tkinter.END)
         ort_feld.delete(0, tkinter.END)
         kuerzel_feld.delete(0, tkinter.END)
+        kuerzel_feld.insert(0, angemeldetes_kuerzel)  # Kürzel des angemeldeten Benutzers
         datum_feld.delete(0, tkinter.END)
-        datum_feld.insert(0, datetime.now().strftime("%d.%m.%Y"))  # Heutiges Datum einfügen
+        datum_feld.insert(0, lager.heute_deutsch())  # Heutiges Datum einfügen
         
-        # Schritt 5: Tabelle neu laden und Erfolg anzeigen
-        tabelle_neu_laden()
+        # Schritt 5: Nur diese Zeile in der Tabelle einfügen/aktualisieren und Erfolg anzeigen
+        tabelle_zeilen_aktualisieren([artikel_id])
         messagebox.showinfo("Erfolg", "Zugang wurde erfolgreich hinzugefuegt!")
-        
-    except Exception as e:
+    
+    def fehler(e):
         # Falls beim Speichern ein Fehler auftritt
         messagebox.showerror("Datenbank-Fehler", f"Konnte nicht speichern: {e}")
+    
+    # Schritt 3: Zugang im Hintergrund buchen (vorhandener Artikel oder neu angelegt)
+    arbeiter.auftrag(lager.zugang_speichern, artikel_name, anzahl, einheit_name, ort_name, kuerzel_name, datum,
+                     fertig=fertig, fehler=fehler)
 
 def abgang_hinzufugen():
     """
@@ -197,10 +317,11 @@ def abgang_hinzufugen():
     artikel_name = abgang_artikel_feld.get()
     anzahl_str = abgang_anzahl_feld.get()
     einheit_name = abgang_einheit_feld.get()
+    ort_name = abgang_ort_feld.get()     # darf leer bleiben, wenn es den Artikel nur an einem Ort gibt
     kuerzel_name = abgang_kuerzel_feld.get()
     datum_name = abgang_datum_feld.get()
     
-    # Schritt 2: Prüfen ob alle Felder ausgefüllt sind
+    # Schritt 2: Prüfen ob alle Felder ausgefüllt sind (außer Lagerort)
     if not all([artikel_name, anzahl_str, einheit_name, kuerzel_name, datum_name]):
         messagebox.showwarning("Warnung", "Bitte füllen Sie alle Abgang-Felder aus!")
         return
@@ -211,50 +332,97 @@ def abgang_hinzufugen():
     except ValueError:
         messagebox.showerror("Fehler", "Anzahl muss eine Zahl sein!")
         return
+    if anzahl <= 0:
+        messagebox.showerror("Fehler", "Anzahl muss größer als 0 sein!")
+        return
     
-    # Schritt 4: Artikel in der Tabelle suchen und Bestand reduzieren
-    for item in treeview.get_children():
-        values = list(treeview.item(item, 'values'))
-        if values[1].lower() == artikel_name.lower():  # Artikelname vergleichen (nicht case-sensitive)
-            artikel_id = values[0]
-            aktueller_bestand = int(values[2])
-            
-            # Prüfen ob genug Bestand vorhanden ist
-            if aktueller_bestand < anzahl:
-                messagebox.showerror("Fehler", f"Nicht genug Bestand! Verfuegbar: {aktueller_bestand}")
-                return
-            
-            # Bestand reduzieren
-            neuer_bestand = aktueller_bestand - anzahl
-            
-            # In Datenbank aktualisieren
-            try:
-                db_path = get_writable_path("praxislager.db")
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                cursor.execute("UPDATE artikel SET aktuellerbestand = ? WHERE artikel_id = ?", (neuer_bestand, artikel_id))
-                conn.commit()
-                conn.close()
-                
-                # Abgang-Felder leeren
-                abgang_artikel_feld.delete(0, tkinter.END)
-                abgang_anzahl_feld.delete(0, tkinter.END)
-                abgang_einheit_feld.delete(0, tkinter.END)
-                abgang_kuerzel_feld.delete(0, tkinter.END)
-                abgang_datum_feld.delete(0, tkinter.END)
-                abgang_datum_feld.insert(0, datetime.now().strftime("%d.%m.%Y"))
-                
-                # Tabelle neu laden
-                tabelle_neu_laden()
-                messagebox.showinfo("Erfolg", f"Abgang von {anzahl} {einheit_name} wurde erfolgreich registriert!")
-                return
-                
-            except Exception as e:
-                messagebox.showerror("Datenbank-Fehler", f"Konnte nicht aktualisieren: {e}")
-                return
+    # Datum prüfen (gespeichert wird es im ISO-Format JJJJ-MM-TT)
+    datum = lager.datum_nach_iso(datum_name)
+    if datum is None:
+        messagebox.showerror("Fehler", "Datum muss im Format TT.MM.JJJJ sein!")
+        return
+    
+    def fertig(artikel_id):
+        # Abgang-Felder leeren
+        abgang_artikel_feld.delete(0, tkinter.END)
+        abgang_anzahl_feld.delete(0, tkinter.END)
+        abgang_einheit_feld.delete(0, tkinter.END)
+        abgang_ort_feld.delete(0, tkinter.END)
+        abgang_kuerzel_feld.delete(0, tkinter.END)
+        abgang_kuerzel_feld.insert(0, angemeldetes_kuerzel)
+        abgang_datum_feld.delete(0, tkinter.END)
+        abgang_datum_feld.insert(0, lager.heute_deutsch())
+        
+        # Nur die geänderte Zeile aktualisieren
+        tabelle_zeilen_aktualisieren([artikel_id])
+        messagebox.showinfo("Erfolg", f"Abgang von {anzahl} {einheit_name} wurde erfolgreich registriert!")
+    
+    def fehler(e):
+        if isinstance(e, lager.BuchungsFehler):
+            messagebox.showerror("Fehler", str(e))  # Artikel nicht gefunden, mehrmals da / zu wenig Bestand
+        else:
+            messagebox.showerror("Datenbank-Fehler", f"Konnte nicht aktualisieren: {e}")
+    
+    # Schritt 4: Artikel suchen und Bestand reduzieren (im Hintergrund)
+    arbeiter.auftrag(lager.abgang_buchen, artikel_name, anzahl, kuerzel_name, datum, einheit_name, ort_name,
+                     fertig=fertig, fehler=fehler)
+
+def scan_melden(text, fehler=False):
+    """Zeigt das Ergebnis der Scans unter dem Scan-Feld (rot mit Signalton bei Fehlern)."""
+    scan_status.config(text=text, fg="red" if fehler else "darkgreen")
+    if fehler:
+        fenster.bell()
+
+def gescannt(event=None):
+    """
+    Ein Barcode wurde gescannt (der Scanner tippt den Code ins Scan-Feld und drückt Enter).
+    Bucht 1 Stück als Abgang mit Kürzel und Datum aus den Abgang-Feldern. Gebucht wird
+    gesammelt im Hintergrund (siehe scannen.py) und ohne Meldungsfenster - so kann sofort
+    weitergescannt werden und kein Scan landet in einem Dialog.
+    """
+    text = scan_feld.get()
+    scan_feld.delete(0, tkinter.END)
+    if not text.strip():
+        return "break"
+    
+    try:
+        gtin = scannen.code_normalisieren(text)
+    except scannen.CodeFehler as e:
+        scan_melden(f"✗ {e}", fehler=True)
+        return "break"
+    
+    kuerzel_name = abgang_kuerzel_feld.get().strip()
+    datum = lager.datum_nach_iso(abgang_datum_feld.get())
+    if not kuerzel_name or datum is None:
+        scan_melden("✗ Bitte unter \"Abgänge\" Kürzel und Datum (TT.MM.JJJJ) eintragen", fehler=True)
+        return "break"
+    
+    scan_warteschlange.hinzufuegen(gtin, kuerzel_name, datum)
+    return "break"
+
+def scans_gebucht(ergebnis):
+    """Ein Paket Scans ist gebucht: Tabellenzeilen aktualisieren und Ergebnis anzeigen."""
+    artikel_ids = sorted({artikel_id for _, artikel_id, _, _, fehlertext in ergebnis if fehlertext is None})
+    if artikel_ids:
+        tabelle_zeilen_aktualisieren(artikel_ids)
     
-    # Falls Artikel nicht gefunden wurde
-    messagebox.showerror("Fehler", f"Artikel '{artikel_name}' nicht gefunden!")
+    fehler = [f"✗ {scannen.code_anzeigen(gtin)}: {name + ' - ' if name else ''}{fehlertext}"
+              for gtin, _, name, _, fehlertext in ergebnis if fehlertext is not None]
+    if fehler:
+        scan_melden("\n".join(fehler[-3:]), fehler=True)
+        return
+    _, _, name, bestand, _ = ergebnis[-1]
+    text = f"✓ {name} - noch {bestand}"
+    if len(ergebnis) > 1:
+        text = f"{len(ergebnis)} Scans gebucht, zuletzt: " + text[2:]
+    if len(scan_warteschlange):
+        text += f"   ({len(scan_warteschlange)} weitere werden gebucht)"
+    scan_melden(text)
+
+def scans_fehlgeschlagen(e):
+    """Ein Paket konnte gar nicht gebucht werden - die Scans bleiben in der Warteschlange."""
+    scan_melden(f"✗ Datenbank-Fehler, {len(scan_warteschlange)} Scan(s) werden gleich nochmal gebucht: {e}",
+                fehler=True)
 
 def loeschen():
     """
@@ -279,64 +447,211 @@ def loeschen():
                                  f"Möchten Sie den Artikel '{artikel_name}' wirklich löschen?")
     
     if antwort:
-        # Schritt 4: Aus Datenbank löschen
-        try:
-            db_path = get_writable_path("praxislager.db")
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM artikel WHERE artikel_id = ?", (artikel_id,))
-            conn.commit()
-            conn.close()
-            
-            # Tabelle neu laden
-            tabelle_neu_laden()
+        def fertig(_):
+            # Nur die gelöschte Zeile aus der Tabelle entfernen
+            tabelle_zeilen_aktualisieren([artikel_id])
             messagebox.showinfo("Erfolg", f"Artikel '{artikel_name}' wurde geloescht!")
-            
-        except Exception as e:
+        
+        def fehler(e):
             messagebox.showerror("Datenbank-Fehler", f"Konnte nicht loeschen: {e}")
+        
+        # Schritt 4: Aus Datenbank löschen (im Hintergrund)
+        arbeiter.auftrag(lager.artikel_loeschen, artikel_id, fertig=fertig, fehler=fehler)
+
+def fortschritt_anzeigen(wert):
+    """Setzt den Fortschrittsbalken in der Statusleiste. wert = (fertig, gesamt) oder None zum Ausblenden."""
+    if wert is None:
+        fortschritt_balken.pack_forget()
+        return
+    fertig, gesamt = wert
+    fortschritt_balken.pack(side=tkinter.RIGHT)
+    fortschritt_balken.config(maximum=gesamt, value=fertig)
 
 def inventur_exportieren():
     """
-    Exportiert alle Artikel als CSV-Datei auf den Desktop für die Inventur.
+    Exportiert die Artikel als CSV-Datei auf den Desktop für die Inventur.
     Wird aufgerufen wenn der "Inventur exportieren" Button geklickt wird.
+    Vorher kann gewählt werden, ob nur niedrige Bestände, nur ein Lagerort
+    oder nur ein Zeitraum ("Hinzugefügt am") exportiert werden.
     """
-    try:
+    # Schritt 1: Kleines Fenster für die Filter
+    export_fenster = tkinter.Toplevel(fenster)
+    export_fenster.title("Inventur exportieren")
+    export_fenster.resizable(False, False)
+    export_fenster.transient(fenster)
+    export_fenster.grab_set()
+    
+    nur_niedrig_var = tkinter.BooleanVar(value=False)
+    tkinter.Checkbutton(export_fenster, text="Nur Artikel mit niedrigem Bestand",
+                        variable=nur_niedrig_var).grid(row=0, column=0, columnspan=2, sticky="w", padx=20, pady=(15, 5))
+    
+    tkinter.Label(export_fenster, text="Lagerort (leer = alle):").grid(row=1, column=0, sticky="w", padx=(20, 10), pady=5)
+    lagerort_var = tkinter.StringVar()
+    tkinter.Entry(export_fenster, textvariable=lagerort_var, width=20).grid(row=1, column=1, padx=(0, 20), pady=5)
+    
+    tkinter.Label(export_fenster, text="Hinzugefügt von (TT.MM.JJJJ):").grid(row=2, column=0, sticky="w", padx=(20, 10), pady=5)
+    von_var = tkinter.StringVar()
+    tkinter.Entry(export_fenster, textvariable=von_var, width=20).grid(row=2, column=1, padx=(0, 20), pady=5)
+    
+    tkinter.Label(export_fenster, text="Hinzugefügt bis (TT.MM.JJJJ):").grid(row=3, column=0, sticky="w", padx=(20, 10), pady=5)
+    bis_var = tkinter.StringVar()
+    tkinter.Entry(export_fenster, textvariable=bis_var, width=20).grid(row=3, column=1, padx=(0, 20), pady=5)
+    
+    def starten():
+        nur_niedrig = nur_niedrig_var.get()
+        lagerort = lagerort_var.get().strip()
+        
+        # Zeitraum prüfen (leer = keine Grenze), gesucht wird mit ISO-Datum über den Index
+        von = lager.datum_nach_iso(von_var.get()) if von_var.get().strip() else None
+        bis = lager.datum_nach_iso(bis_var.get()) if bis_var.get().strip() else None
+        if (von_var.get().strip() and von is None) or (bis_var.get().strip() and bis is None):
+            messagebox.showerror("Fehler", "Datum muss im Format TT.MM.JJJJ sein!", parent=export_fenster)
+            return
+        export_fenster.destroy()
+        
         # Desktop-Pfad ermitteln
         desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
         
         # Dateiname mit aktuellem Datum erstellen
-        heute = datetime.now().strftime("%Y-%m-%d_%H-%M")
-        dateiname = f"MediDepot_Inventur_{heute}.csv"
+        zeitstempel = datetime.now().strftime("%Y-%m-%d_%H-%M")
+        dateiname = f"MediDepot_Inventur_{zeitstempel}.csv"
         vollständiger_pfad = os.path.join(desktop_path, dateiname)
         
-        # Daten aus Datenbank laden
-        daten = daten_aus_db_laden()
-        
-        if not daten:
-            messagebox.showwarning("Keine Daten", "Keine Artikel zum Exportieren gefunden!")
-            return
-        
-        # CSV-Datei erstellen
-        with open(vollständiger_pfad, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile, delimiter=';')  # Semikolon für deutsche Excel-Version
-            
-            # Spaltenüberschriften schreiben
-            writer.writerow([
-                'ID', 'Artikelname', 'Aktueller Bestand', 'Mindestbestand', 
-                'Einheit', 'Lagerort', 'Kürzel', 'Hinzugefügt am'
-            ])
+        def fertig(anzahl_artikel):
+            fortschritt_anzeigen(None)
+            if not anzahl_artikel:
+                messagebox.showwarning("Keine Daten", "Keine Artikel zum Exportieren gefunden!")
+                return
             
-            # Alle Artikel-Daten schreiben
-            for artikel in daten:
-                writer.writerow(artikel)
+            # Erfolgsmeldung anzeigen
+            messagebox.showinfo("Export erfolgreich", 
+                               f"Inventur wurde erfolgreich exportiert!\n\nDatei: {dateiname}\nOrt: Desktop\n\nAnzahl Artikel: {anzahl_artikel}")
         
-        # Erfolgsmeldung anzeigen
-        messagebox.showinfo("Export erfolgreich", 
-                           f"Inventur wurde erfolgreich exportiert!\n\nDatei: {dateiname}\nOrt: Desktop\n\nAnzahl Artikel: {len(daten)}")
+        def fehler(e):
+            fortschritt_anzeigen(None)
+            messagebox.showerror("Export-Fehler", f"Konnte Inventur nicht exportieren:\n{e}")
         
+        # Fortschritt kommt aus dem Hintergrund-Thread und wird im Tk-Thread angezeigt
+        def fortschritt(geschrieben, gesamt):
+            arbeiter.melden(fortschritt_anzeigen, (geschrieben, gesamt))
         
-    except Exception as e:
-        messagebox.showerror("Export-Fehler", f"Konnte Inventur nicht exportieren:\n{e}")
+        # Schritt 2: Lesen und Schreiben der Datei passiert im Hintergrund
+        arbeiter.auftrag(lager.inventur_schreiben, vollständiger_pfad, nur_niedrig, lagerort, fortschritt, von, bis,
+                         fertig=fertig, fehler=fehler)
+    
+    tkinter.Button(export_fenster, text="Exportieren", command=starten, width=15,
+                   background="lightblue", foreground="black", font=("Arial", 10, "bold")).grid(row=4, column=0, padx=(20, 10), pady=15)
+    tkinter.Button(export_fenster, text="Abbrechen", command=export_fenster.destroy, width=15,
+                   background="gray", foreground="black", font=("Arial", 10, "bold")).grid(row=4, column=1, padx=(10, 20), pady=15)
+    
+    export_fenster.bind('<Return>', lambda e: starten())
+    export_fenster.bind('<Escape>', lambda e: export_fenster.destroy())
+
+def nachbestellliste_anzeigen():
+    """
+    Öffnet ein Fenster mit allen Artikeln, deren Bestand beim oder unter dem Minimum liegt.
+    Wird aufgerufen wenn der "Nachbestellliste" Button geklickt wird.
+    """
+    # Schritt 1: Fenster mit einer eigenen Tabelle erstellen
+    liste_fenster = tkinter.Toplevel(fenster)
+    liste_fenster.title("Nachbestellliste")
+    liste_fenster.geometry("700x400")
+    liste_fenster.transient(fenster)
+    
+    tkinter.Label(liste_fenster, text="Artikel mit niedrigem Bestand", font=("Arial", 12, "bold")).pack(pady=(10, 5))
+    
+    spalten = ['ID', 'Artikelname', 'Aktueller Bestand', 'Mindestbestand', 'Einheit', 'Lagerort']
+    liste = ttk.Treeview(liste_fenster, columns=spalten, show='headings')
+    for spalte in spalten:
+        liste.heading(spalte, text=spalte)
+        liste.column(spalte, width=100, minwidth=50)
+    
+    liste_scrollbar = ttk.Scrollbar(liste_fenster, orient='vertical', command=liste.yview)
+    liste.configure(yscrollcommand=liste_scrollbar.set)
+    liste_scrollbar.pack(side=tkinter.RIGHT, fill=tkinter.Y, pady=(0, 10))
+    liste.pack(fill=tkinter.BOTH, expand=True, padx=(10, 0), pady=(0, 10))
+    
+    # Schritt 2: Artikel im Hintergrund laden (eine Abfrage über den Teil-Index)
+    def fertig(niedrig):
+        if not liste_fenster.winfo_exists():
+            return  # Fenster wurde inzwischen geschlossen
+        for eintrag in niedrig:
+            liste.insert('', 'end', values=eintrag)
+        liste_fenster.title(f"Nachbestellliste ({len(niedrig)} Artikel)")
+    
+    arbeiter.auftrag(lager.niedrige_bestaende_laden, fertig=fertig)
+    
+    liste_fenster.bind('<Escape>', lambda e: liste_fenster.destroy())
+
+def bestellvorschlag_anzeigen():
+    """
+    Öffnet ein Fenster mit den Bestellvorschlägen aus der Verbrauchsprognose (prognose.py):
+    Artikel, die bis zum Eintreffen einer Lieferung unter das Minimum fallen, mit Menge.
+    Wird aufgerufen wenn der "Bestellvorschlag" Button geklickt wird.
+    """
+    # Schritt 1: Fenster mit einer eigenen Tabelle erstellen
+    vorschlag_fenster = tkinter.Toplevel(fenster)
+    vorschlag_fenster.title("Bestellvorschlag")
+    vorschlag_fenster.geometry("900x400")
+    vorschlag_fenster.transient(fenster)
+
+    tkinter.Label(vorschlag_fenster,
+                  text=f"Nachbestellen (Lieferzeit {prognose.LIEFERZEIT_TAGE} Tage, "
+                       f"reicht für {prognose.REICHWEITE_TAGE} Tage)",
+                  font=("Arial", 12, "bold")).pack(pady=(10, 5))
+
+    spalten = ['ID', 'Artikelname', 'Aktueller Bestand', 'Mindestbestand', 'Einheit', 'Lagerort',
+               'Verbrauch/Tag', 'Reicht (Tage)', 'Vorschlag']
+    liste = ttk.Treeview(vorschlag_fenster, columns=spalten, show='headings')
+    for spalte in spalten:
+        liste.heading(spalte, text=spalte)
+        liste.column(spalte, width=90, minwidth=50)
+
+    liste_scrollbar = ttk.Scrollbar(vorschlag_fenster, orient='vertical', command=liste.yview)
+    liste.configure(yscrollcommand=liste_scrollbar.set)
+    liste_scrollbar.pack(side=tkinter.RIGHT, fill=tkinter.Y, pady=(0, 10))
+    liste.pack(fill=tkinter.BOTH, expand=True, padx=(10, 0), pady=(0, 10))
+
+    # Schritt 2: Prognose im Hintergrund aktualisieren und die Vorschläge laden
+    def fertig(vorschlaege):
+        if not vorschlag_fenster.winfo_exists():
+            return  # Fenster wurde inzwischen geschlossen
+        for *artikel, pro_tag, tage_bis_leer, menge in vorschlaege:
+            reicht = f"{tage_bis_leer:.0f}" if tage_bis_leer is not None else "-"
+            liste.insert('', 'end', values=(*artikel, f"{pro_tag:g}", reicht, menge))
+        vorschlag_fenster.title(f"Bestellvorschlag ({len(vorschlaege)} Artikel)")
+
+    arbeiter.auftrag(prognose.bestellvorschlaege, fertig=fertig)
+
+    vorschlag_fenster.bind('<Escape>', lambda e: vorschlag_fenster.destroy())
+
+def sammelimport_starten(import_funktion, art):
+    """
+    Bucht viele Zugänge oder Abgänge auf einmal aus einer CSV-Datei
+    (gleiches Format wie der Inventur-Export, Anzahl in der Spalte "Aktueller Bestand").
+    Alle Zeilen werden in einer Transaktion gespeichert, danach wird die Tabelle einmal neu geladen.
+    """
+    # Schritt 1: Datei auswählen
+    pfad = filedialog.askopenfilename(title=f"{art} importieren",
+                                      filetypes=[("CSV-Dateien", "*.csv"), ("Alle Dateien", "*.*")])
+    if not pfad:
+        return  # Abgebrochen
+    
+    def fertig(anzahl_zeilen):
+        # Schritt 3: Tabelle (Vorschläge, niedrige Bestände) einmal neu laden und Erfolg anzeigen
+        ansicht.neu_laden()
+        namen_laden()
+        niedrige_bestaende_pruefen()
+        messagebox.showinfo("Import erfolgreich", f"{anzahl_zeilen} {art} wurden erfolgreich gebucht!")
+    
+    def fehler(e):
+        if isinstance(e, sammelimport.ImportFehler):
+            messagebox.showerror("Import-Fehler", f"{e}\n\nEs wurde nichts gebucht.")
+        else:
+            messagebox.showerror("Datenbank-Fehler", f"Konnte nicht importieren: {e}")
+    
+    # Schritt 2: Datei im Hintergrund lesen, prüfen und buchen
+    arbeiter.auftrag(import_funktion, pfad, fertig=fertig, fehler=fehler)
 
 def artikel_bearbeiten(event=None):
     """
@@ -350,15 +665,37 @@ def artikel_bearbeiten(event=None):
         messagebox.showwarning("Warnung", "Bitte wählen Sie einen Artikel zum Bearbeiten aus!")
         return
     
-    # Schritt 2: Artikeldaten holen
-    item = ausgewaehlt[0]
-    values = list(treeview.item(item, 'values'))
+    # Schritt 2: Artikeldaten frisch aus der Datenbank holen und Fenster öffnen
+    artikel_oeffnen(int(ausgewaehlt[0]))
+
+def artikel_oeffnen(artikel_id):
+    """
+    Holt die Artikeldaten frisch aus der Datenbank (im Hintergrund) - die Tabelle kann veraltet
+    sein, wenn an einem anderen Arbeitsplatz gebucht wurde - und öffnet das Bearbeitungsfenster.
+    Auch für den Doppelklick in der Liste der niedrigen Bestände.
+    """
+    def fertig(daten):
+        if artikel_id not in daten:
+            messagebox.showwarning("Warnung", "Der Artikel wurde inzwischen gelöscht!")
+            ansicht.neu_laden()
+            return
+        bearbeiten_fenster_oeffnen(daten[artikel_id])
+    
+    arbeiter.auftrag(lager.artikel_zeilen_laden, [artikel_id], fertig=fertig, fehler=datenbank_fehler)
+
+def bearbeiten_fenster_oeffnen(alt):
+    """
+    Zeigt das Bearbeitungsfenster für einen Artikel.
+    alt ist die Zeile aus der Datenbank - sie wird beim Speichern mitgegeben, damit
+    Änderungen von anderen Arbeitsplätzen nicht überschrieben werden.
+    """
+    values = list(alt)
     artikel_id = values[0]
     
     # Schritt 3: Bearbeitungsfenster erstellen
     bearbeiten_fenster = tkinter.Toplevel(fenster)
     bearbeiten_fenster.title(f"Artikel bearbeiten - {values[1]}")
-    bearbeiten_fenster.geometry("500x400")  # GROß GENUG - alles auf einmal sichtbar!
+    bearbeiten_fenster.geometry("500x440")  # GROß GENUG - alles auf einmal sichtbar!
     bearbeiten_fenster.resizable(False, False)
     
     # Fenster mittig positionieren
@@ -404,49 +741,69 @@ def artikel_bearbeiten(event=None):
     kuerzel_entry = tkinter.Entry(bearbeiten_fenster, textvariable=kuerzel_var, width=25)
     kuerzel_entry.grid(row=6, column=1, padx=(10, 30), pady=8, sticky="w")
     
+    # Barcode (GTIN oder PZN) für den Scanner - wird im Hintergrund nachgeladen, leer = kein Barcode
+    tkinter.Label(bearbeiten_fenster, text="Barcode (GTIN/PZN):").grid(row=7, column=0, sticky="w", padx=(30, 10), pady=8)
+    code_var = tkinter.StringVar()
+    code_entry = tkinter.Entry(bearbeiten_fenster, textvariable=code_var, width=25)
+    code_entry.grid(row=7, column=1, padx=(10, 30), pady=8, sticky="w")
+    geladener_code = [""]
+    
+    def code_geladen(gtin):
+        if bearbeiten_fenster.winfo_exists() and not code_var.get():
+            geladener_code[0] = scannen.code_anzeigen(gtin)
+            code_var.set(geladener_code[0])
+    
+    arbeiter.auftrag(lager.code_laden, artikel_id, fertig=code_geladen)
+    
     def speichern_aenderungen():
         """Speichert die Änderungen in der Datenbank"""
+        # Eingaben validieren
+        if not all([name_var.get(), bestand_var.get(), mindest_var.get(), 
+                   einheit_var.get(), ort_var.get(), kuerzel_var.get()]):
+            messagebox.showwarning("Warnung", "Bitte füllen Sie alle Felder aus!")
+            return
+        
+        # Zahlen prüfen
         try:
-            # Eingaben validieren
-            if not all([name_var.get(), bestand_var.get(), mindest_var.get(), 
-                       einheit_var.get(), ort_var.get(), kuerzel_var.get()]):
-                messagebox.showwarning("Warnung", "Bitte füllen Sie alle Felder aus!")
-                return
-            
-            # Zahlen prüfen
-            try:
-                neuer_bestand = int(bestand_var.get())
-                neuer_mindest = int(mindest_var.get())
-            except ValueError:
-                messagebox.showerror("Fehler", "Bestand und Mindestbestand müssen Zahlen sein!")
-                return
-            
-            # In Datenbank aktualisieren
-            db_path = get_writable_path("praxislager.db")
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE artikel SET 
-                produktname = ?, aktuellerbestand = ?, mindestbestand = ?, 
-                einheit = ?, lagerort = ?, Kürzel = ?
-                WHERE artikel_id = ?
-            """, (name_var.get(), neuer_bestand, neuer_mindest, 
-                  einheit_var.get(), ort_var.get(), kuerzel_var.get(), artikel_id))
-            
-            conn.commit()
-            conn.close()
-            
-            # Tabelle neu laden
-            tabelle_neu_laden()
+            neuer_bestand = int(bestand_var.get())
+            neuer_mindest = int(mindest_var.get())
+        except ValueError:
+            messagebox.showerror("Fehler", "Bestand und Mindestbestand müssen Zahlen sein!")
+            return
+        if neuer_bestand < 0 or neuer_mindest < 0:
+            messagebox.showerror("Fehler", "Bestand und Mindestbestand dürfen nicht negativ sein!")
+            return
+        
+        def fertig(gespeicherter_bestand):
+            # Nur die bearbeitete Zeile aktualisieren
+            tabelle_zeilen_aktualisieren([artikel_id])
             
             # Fenster schließen
             bearbeiten_fenster.destroy()
             
-            messagebox.showinfo("Erfolg", "Artikel wurde erfolgreich aktualisiert!")
-            
-        except Exception as e:
-            messagebox.showerror("Datenbank-Fehler", f"Konnte nicht speichern: {e}")
+            if gespeicherter_bestand != neuer_bestand:
+                # Inzwischen wurde woanders gebucht - die Korrektur wurde als Differenz gebucht
+                messagebox.showinfo("Erfolg", "Artikel wurde erfolgreich aktualisiert!\n\n"
+                                    "Der Bestand wurde inzwischen an einem anderen Arbeitsplatz geändert. "
+                                    f"Ihre Änderung wurde dazugerechnet, neuer Bestand: {gespeicherter_bestand}")
+            else:
+                messagebox.showinfo("Erfolg", "Artikel wurde erfolgreich aktualisiert!")
+        
+        def fehler(e):
+            if isinstance(e, lager.BuchungsFehler):
+                messagebox.showerror("Fehler", str(e))  # z.B. Konflikt mit einem anderen Arbeitsplatz
+            else:
+                messagebox.showerror("Datenbank-Fehler", f"Konnte nicht speichern: {e}")
+        
+        # Barcode nur mitgeben, wenn er geändert wurde (None = nicht ändern)
+        code = code_var.get().strip()
+        if code == geladener_code[0]:
+            code = None
+        
+        # In Datenbank aktualisieren (im Hintergrund), alt = Stand beim Öffnen des Fensters
+        arbeiter.auftrag(lager.artikel_aendern, artikel_id, name_var.get(), neuer_bestand, neuer_mindest,
+                         einheit_var.get(), ort_var.get(), kuerzel_var.get(), alt, code,
+                         fertig=fertig, fehler=fehler)
     
     def abbrechen():
         """Schließt das Fenster ohne zu speichern"""
@@ -455,11 +812,11 @@ def artikel_bearbeiten(event=None):
     # Schritt 5: Buttons wie die anderen Buttons im Hauptprogramm (mit mehr Abstand)
     speichern_btn = tkinter.Button(bearbeiten_fenster, text="Speichern", command=speichern_aenderungen,
                                   background="green", foreground="black", font=("Arial", 10, "bold"), width=15)
-    speichern_btn.grid(row=8, column=0, padx=(30, 15), pady=(20, 15))
+    speichern_btn.grid(row=9, column=0, padx=(30, 15), pady=(20, 15))
     
     abbrechen_btn = tkinter.Button(bearbeiten_fenster, text="Abbrechen", command=abbrechen,
                                   background="gray", foreground="black", font=("Arial", 10, "bold"), width=15)
-    abbrechen_btn.grid(row=8, column=1, padx=(15, 30), pady=(20, 15))
+    abbrechen_btn.grid(row=9, column=1, padx=(15, 30), pady=(20, 15))
     
     # Enter-Taste für Speichern
     bearbeiten_fenster.bind('<Return>', lambda e: speichern_aenderungen())
@@ -471,157 +828,400 @@ def artikel_bearbeiten(event=None):
 
 
 
-# HAUPTFENSTER ERSTELLEN UND KONFIGURIEREN
-
+# DIAGNOSE (nur sichtbar mit der Umgebungsvariable MEDIDEPOT_DIAGNOSE=1, siehe diagnose.py)
 
-# Hauptfenster erstellen
-fenster = tkinter.Tk()
-fenster.title("MediDEPOT - Lagerverwaltung")
-fenster.geometry("1200x900")                    # Fenstergröße: 1200 Pixel breit, 900 Pixel hoch
 
-# Fenster mittig auf dem Bildschirm positionieren
-fenster.update_idletasks()                      # Größe berechnen lassen
-breite = fenster.winfo_width()                  # Fensterbreite holen
-hoehe = fenster.winfo_height()                  # Fensterhöhe holen
-x = (fenster.winfo_screenwidth() // 2) - (breite // 2)    # X-Position berechnen (mittig horizontal)
-y = (fenster.winfo_screenheight() // 2) - (hoehe // 2)   # Y-Position berechnen (mittig vertikal)
-fenster.geometry(f"{breite}x{hoehe}+{x}+{y}")  # Fenster neu positionieren
-
-fenster.resizable(True, False)                  # Größe änderbar: horizontal ja, vertikal nein
-
-# =============================================================================
-# OBERER BEREICH: EINGABEFELDER FÜR ZUGÄNGE UND ABGÄNGE
-# =============================================================================
-
-# Hauptframe für Eingabebereiche
-haupt_eingabe_frame = tkinter.Frame(fenster)
-haupt_eingabe_frame.pack(side=tkinter.TOP, fill=tkinter.X, padx=10, pady=10)
-
-# ZUGÄNGE BEREICH (LINKS)
-eingabe_frame = tkinter.Frame(haupt_eingabe_frame)
-eingabe_frame.pack(side=tkinter.LEFT, fill=tkinter.BOTH, expand=True, padx=(0, 5))
-
-zugaenge = tkinter.Label(eingabe_frame, text="Neue Zugänge", font=("Arial", 12, "bold"), fg="green")
-zugaenge.grid(row=0, column=0, columnspan=2, sticky="w", padx=20, pady=(10, 15))
-
-# Eingabefelder für Zugänge
-artikel = tkinter.Label(eingabe_frame, text="Artikelname:")
-artikel.grid(row=1, column=0, sticky="w", padx=20, pady=5)
-artikel_feld = tkinter.Entry(eingabe_frame, width=25)
-artikel_feld.grid(row=1, column=1, padx=10, pady=5, sticky="w")
+def diagnose_herzschlag(erwartet=None):
+    """
+    Läuft alle HERZSCHLAG_MS im Tk-Thread. Kommt der Aufruf deutlich zu spät, war das Fenster
+    so lange blockiert (z.B. durch einen langsamen Rückruf) - das wird als "Fenster blockiert" gemessen.
+    """
+    jetzt = time.perf_counter()
+    if erwartet is not None:
+        verspaetung_ms = (jetzt - erwartet) * 1000
+        if verspaetung_ms > diagnose.BLOCKIERT_MS:
+            diagnose.eintragen("Tk", "Fenster blockiert", verspaetung_ms)
+    fenster.after(HERZSCHLAG_MS, diagnose_herzschlag, jetzt + HERZSCHLAG_MS / 1000)
 
-anzahl = tkinter.Label(eingabe_frame, text="Anzahl:")
-anzahl.grid(row=2, column=0, sticky="w", padx=20, pady=5)
-anzahl_feld = tkinter.Entry(eingabe_frame, width=25)
-anzahl_feld.grid(row=2, column=1, padx=10, pady=5, sticky="w")
+def diagnose_anzeigen(event=None):
+    """
+    Öffnet das Diagnose-Fenster: alle Messungen zusammengefasst, die teuersten zuerst.
+    Es aktualisiert sich selbst, solange es offen ist, und kann die Messungen als Datei speichern.
+    """
+    diagnose_fenster = tkinter.Toplevel(fenster)
+    diagnose_fenster.title("Diagnose")
+    diagnose_fenster.geometry("1000x500")
+    diagnose_fenster.transient(fenster)
+    
+    tkinter.Label(diagnose_fenster, text=f"Zeitmessungen (die letzten {diagnose.MAX_EINTRAEGE}), teuerste zuerst",
+                  font=("Arial", 12, "bold")).pack(pady=(10, 5))
+    
+    # Schritt 1: Tabelle für die Zusammenfassung
+    spalten = ['Art', 'Anzahl', 'Gesamt (ms)', 'Max (ms)', 'Zeilen', 'Name']
+    liste = ttk.Treeview(diagnose_fenster, columns=spalten, show='headings')
+    for spalte in spalten:
+        liste.heading(spalte, text=spalte)
+        liste.column(spalte, width=80, minwidth=50, anchor="e")
+    liste.column('Art', anchor="w")
+    liste.column('Name', width=560, anchor="w")
+    
+    knopf_frame = tkinter.Frame(diagnose_fenster)
+    knopf_frame.pack(side=tkinter.BOTTOM, pady=10)
+    liste_scrollbar = ttk.Scrollbar(diagnose_fenster, orient='vertical', command=liste.yview)
+    liste.configure(yscrollcommand=liste_scrollbar.set)
+    liste_scrollbar.pack(side=tkinter.RIGHT, fill=tkinter.Y)
+    liste.pack(fill=tkinter.BOTH, expand=True, padx=(10, 0))
+    
+    # Schritt 2: Inhalt neu aufbauen (einmal pro Sekunde, solange das Fenster offen ist)
+    def aktualisieren():
+        if not diagnose_fenster.winfo_exists():
+            return
+        liste.delete(*liste.get_children())
+        for art, name, anzahl, gesamt, maximum, zeilen in diagnose.zusammenfassung():
+            liste.insert('', 'end', values=(art, anzahl, f"{gesamt:.1f}", f"{maximum:.1f}", zeilen,
+                                            diagnose.kurzname(name)))
+        diagnose_fenster.after(DIAGNOSE_AKTUALISIEREN_MS, aktualisieren)
+    
+    def leeren():
+        diagnose.leeren()
+        liste.delete(*liste.get_children())
+    
+    # Schritt 3: Speichern als Textdatei (z.B. für den Support)
+    def speichern():
+        pfad = filedialog.asksaveasfilename(parent=diagnose_fenster, title="Diagnose speichern",
+                                            defaultextension=".log",
+                                            initialfile=f"MediDepot_Diagnose_{datetime.now():%Y-%m-%d_%H-%M}.log",
+                                            filetypes=[("Log-Dateien", "*.log"), ("Alle Dateien", "*.*")])
+        if not pfad:
+            return  # Abgebrochen
+        try:
+            diagnose.speichern(pfad)
+        except OSError as e:
+            messagebox.showerror("Fehler", f"Konnte Diagnose nicht speichern:\n{e}", parent=diagnose_fenster)
+            return
+        messagebox.showinfo("Gespeichert", f"Diagnose gespeichert:\n{pfad}", parent=diagnose_fenster)
+    
+    tkinter.Button(knopf_frame, text="Speichern...", command=speichern, width=15).pack(side=tkinter.LEFT, padx=5)
+    tkinter.Button(knopf_frame, text="Leeren", command=leeren, width=15).pack(side=tkinter.LEFT, padx=5)
+    tkinter.Button(knopf_frame, text="Schließen", command=diagnose_fenster.destroy, width=15).pack(side=tkinter.LEFT, padx=5)
+    diagnose_fenster.bind('<Escape>', lambda e: diagnose_fenster.destroy())
+    
+    aktualisieren()
 
-einheit = tkinter.Label(eingabe_frame, text="Einheit:")
-einheit.grid(row=3, column=0, sticky="w", padx=20, pady=5)
-einheit_feld = tkinter.Entry(eingabe_frame, width=25)
-einheit_feld.grid(row=3, column=1, padx=10, pady=5, sticky="w")
 
-ort = tkinter.Label(eingabe_frame, text="Ort:")
-ort.grid(row=4, column=0, sticky="w", padx=20, pady=5)
-ort_feld = tkinter.Entry(eingabe_frame, width=25)
-ort_feld.grid(row=4, column=1, padx=10, pady=5, sticky="w")
+def start_fertig(neu_angelegt):
+    """Wird aufgerufen sobald die Datenbank bereit ist."""
+    # Merken ob die Datenbank gerade neu angelegt wurde (dann Willkommensnachricht)
+    global erster_start
+    erster_start = neu_angelegt
+    diagnose.seit_start("Datenbank bereit")
+    
+    # Ab jetzt Änderungen von anderen Arbeitsplätzen übernehmen (der erste Aufruf merkt sich
+    # nur den Stand - er läuft vor dem Laden der Tabelle, damit keine Änderung verloren geht)
+    aenderungen_pruefen()
+    
+    # DATEN AUS DATENBANK LADEN (anstatt Beispieldaten)
+    tabelle_neu_laden()
+    
+    # Willkommensnachricht nur beim ersten Start zeigen
+    if erster_start:
+        wenn_sichtbar(messagebox.showinfo, "Willkommen", "Willkommen bei MediDEPOT!")
+
+def start_fehler(e):
+    wenn_sichtbar(messagebox.showerror, "Datenbank-Fehler",
+                  f"Konnte keine Datenbank erstellen:\n{e}\n\nBitte Administrator kontaktieren.")
+
+
+def starten():
+    """
+    Baut das Hauptfenster auf, zeigt es an und startet das Programm ("python medidepot.py").
+    Beim reinen "import medidepot" wird noch kein Fenster geöffnet.
+    """
+    vorbereiten()
+    anzeigen()
+    fenster.mainloop()
+
+def anzeigen(kuerzel=""):
+    """
+    Zeigt das (mit vorbereiten() schon aufgebaute) Hauptfenster mittig auf dem Bildschirm an.
+    Meldungen, die vorher schon gekommen sind (z.B. Datenbank-Fehler), erscheinen jetzt.
+    kuerzel: Kürzel des angemeldeten Benutzers - wird in Zugang und Abgang schon eingetragen.
+    """
+    global fenster_sichtbar, angemeldetes_kuerzel
+    angemeldetes_kuerzel = kuerzel
+    for feld in (kuerzel_feld, abgang_kuerzel_feld):
+        feld.delete(0, tkinter.END)
+        feld.insert(0, kuerzel)
+    
+    x = (fenster.winfo_screenwidth() // 2) - (FENSTER_BREITE // 2)    # X-Position berechnen (mittig horizontal)
+    y = (fenster.winfo_screenheight() // 2) - (FENSTER_HOEHE // 2)    # Y-Position berechnen (mittig vertikal)
+    fenster.geometry(f"{FENSTER_BREITE}x{FENSTER_HOEHE}+{x}+{y}")
+    fenster.deiconify()
+    fenster_sichtbar = True
+    diagnose.seit_start("Hauptfenster sichtbar")
+    
+    for funktion, argumente in aufgehobene_meldungen:
+        funktion(*argumente)
+    aufgehobene_meldungen.clear()
+
+def vorbereiten(login_fenster=None):
+    """
+    Baut das Hauptfenster auf, ohne es anzuzeigen, und startet schon das Öffnen der
+    Datenbank und das Laden der Tabelle im Hintergrund.
+    passwort.py ruft das auf, während das Login-Fenster noch offen ist - nach dem Login
+    muss anzeigen() das fertige Fenster dann nur noch zeigen.
+    Ohne login_fenster (python medidepot.py) wird ein eigenes Tk-Fenster erstellt.
+    """
+    # Die Fenster-Elemente werden von den Funktionen oben benutzt -> als globale Variablen speichern
+    global fenster, arbeiter, ansicht, treeview, columns, status_label, fortschritt_balken, such_var, tabelle_titel
+    global artikel_feld, anzahl_feld, einheit_feld, ort_feld, kuerzel_feld, datum_feld
+    global abgang_artikel_feld, abgang_anzahl_feld, abgang_einheit_feld, abgang_ort_feld, abgang_kuerzel_feld
+    global abgang_datum_feld
+    global scan_feld, scan_status, scan_warteschlange, bestandsmeldung
+    
+    # HAUPTFENSTER ERSTELLEN UND KONFIGURIEREN
+
+    # Hauptfenster erstellen (erst einmal versteckt, siehe anzeigen())
+    if login_fenster is None:
+        fenster = tkinter.Tk()
+    else:
+        # Das Login-Fenster bleibt das Tk-Hauptfenster (nur versteckt) - ein zweites tkinter.Tk()
+        # würde Tcl/Tk komplett neu starten. Wird das Lager geschlossen, endet das ganze Programm.
+        fenster = tkinter.Toplevel(login_fenster)
+        fenster.protocol("WM_DELETE_WINDOW", login_fenster.destroy)
+    fenster.withdraw()
+    fenster.title("MediDEPOT - Lagerverwaltung")
+    fenster.geometry(f"{FENSTER_BREITE}x{FENSTER_HOEHE}")   # Fenstergröße: 1200 Pixel breit, 900 Pixel hoch
+
+    fenster.resizable(True, False)                  # Größe änderbar: horizontal ja, vertikal nein
+
+    # Hintergrund-Arbeiter: alle Datenbank- und Datei-Arbeiten laufen in einem eigenen Thread
+    arbeiter = DatenbankArbeiter(fenster, besetzt=besetzt_anzeigen, fehler_standard=datenbank_fehler)
+    
+    # Gescannte Abgänge werden gesammelt und paketweise über den Arbeiter gebucht (siehe scannen.py)
+    scan_warteschlange = scannen.ScanWarteschlange(arbeiter, lager.scans_buchen, scans_gebucht,
+                                                   scans_fehlgeschlagen)
+
+    # =============================================================================
+    # OBERER BEREICH: EINGABEFELDER FÜR ZUGÄNGE UND ABGÄNGE
+    # =============================================================================
+
+    # Hauptframe für Eingabebereiche
+    haupt_eingabe_frame = tkinter.Frame(fenster)
+    haupt_eingabe_frame.pack(side=tkinter.TOP, fill=tkinter.X, padx=10, pady=10)
+
+    # ZUGÄNGE BEREICH (LINKS)
+    eingabe_frame = tkinter.Frame(haupt_eingabe_frame)
+    eingabe_frame.pack(side=tkinter.LEFT, fill=tkinter.BOTH, expand=True, padx=(0, 5))
+
+    zugaenge = tkinter.Label(eingabe_frame, text="Neue Zugänge", font=("Arial", 12, "bold"), fg="green")
+    zugaenge.grid(row=0, column=0, columnspan=2, sticky="w", padx=20, pady=(10, 15))
+
+    # Eingabefelder für Zugänge
+    artikel = tkinter.Label(eingabe_frame, text="Artikelname:")
+    artikel.grid(row=1, column=0, sticky="w", padx=20, pady=5)
+    artikel_feld = tkinter.Entry(eingabe_frame, width=25)
+    artikel_feld.grid(row=1, column=1, padx=10, pady=5, sticky="w")
+
+    anzahl = tkinter.Label(eingabe_frame, text="Anzahl:")
+    anzahl.grid(row=2, column=0, sticky="w", padx=20, pady=5)
+    anzahl_feld = tkinter.Entry(eingabe_frame, width=25)
+    anzahl_feld.grid(row=2, column=1, padx=10, pady=5, sticky="w")
+
+    einheit = tkinter.Label(eingabe_frame, text="Einheit:")
+    einheit.grid(row=3, column=0, sticky="w", padx=20, pady=5)
+    einheit_feld = tkinter.Entry(eingabe_frame, width=25)
+    einheit_feld.grid(row=3, column=1, padx=10, pady=5, sticky="w")
+
+    ort = tkinter.Label(eingabe_frame, text="Ort:")
+    ort.grid(row=4, column=0, sticky="w", padx=20, pady=5)
+    ort_feld = tkinter.Entry(eingabe_frame, width=25)
+    ort_feld.grid(row=4, column=1, padx=10, pady=5, sticky="w")
 
-kuerzel = tkinter.Label(eingabe_frame, text="Kürzel:")
-kuerzel.grid(row=5, column=0, sticky="w", padx=20, pady=5)
-kuerzel_feld = tkinter.Entry(eingabe_frame, width=25)
-kuerzel_feld.grid(row=5, column=1, padx=10, pady=5, sticky="w")
+    kuerzel = tkinter.Label(eingabe_frame, text="Kürzel:")
+    kuerzel.grid(row=5, column=0, sticky="w", padx=20, pady=5)
+    kuerzel_feld = tkinter.Entry(eingabe_frame, width=25)
+    kuerzel_feld.grid(row=5, column=1, padx=10, pady=5, sticky="w")
 
-datum_label = tkinter.Label(eingabe_frame, text="Datum:")
-datum_label.grid(row=6, column=0, sticky="w", padx=20, pady=5)
-datum_feld = tkinter.Entry(eingabe_frame, width=25)
-datum_feld.grid(row=6, column=1, padx=10, pady=5, sticky="w")
-datum_feld.insert(0, datetime.now().strftime("%d.%m.%Y"))
+    datum_label = tkinter.Label(eingabe_frame, text="Datum:")
+    datum_label.grid(row=6, column=0, sticky="w", padx=20, pady=5)
+    datum_feld = tkinter.Entry(eingabe_frame, width=25)
+    datum_feld.grid(row=6, column=1, padx=10, pady=5, sticky="w")
+    datum_feld.insert(0, lager.heute_deutsch())
 
-zugang_button = tkinter.Button(eingabe_frame, text="Zugang hinzufügen", command=hinzufugen, width=20,
-                              background="green", foreground="black", font=("Arial", 10, "bold"))
-zugang_button.grid(row=7, column=0, columnspan=2, pady=15)
+    zugang_button = tkinter.Button(eingabe_frame, text="Zugang hinzufügen", command=hinzufugen, width=20,
+                                  background="green", foreground="black", font=("Arial", 10, "bold"))
+    zugang_button.grid(row=7, column=0, columnspan=2, pady=(15, 5))
 
-# ABGÄNGE BEREICH (RECHTS)
-abgang_frame = tkinter.Frame(haupt_eingabe_frame)
-abgang_frame.pack(side=tkinter.RIGHT, fill=tkinter.BOTH, expand=True, padx=(5, 0))
+    zugang_import_button = tkinter.Button(eingabe_frame, text="Zugänge importieren (CSV)", width=20,
+                                         command=lambda: sammelimport_starten(sammelimport.zugaenge_importieren, "Zugänge"))
+    zugang_import_button.grid(row=8, column=0, columnspan=2, pady=(0, 15))
 
-abgaenge = tkinter.Label(abgang_frame, text="Abgänge", font=("Arial", 12, "bold"), fg="red")
-abgaenge.grid(row=0, column=0, columnspan=2, sticky="w", padx=20, pady=(10, 15))
+    # ABGÄNGE BEREICH (RECHTS)
+    abgang_frame = tkinter.Frame(haupt_eingabe_frame)
+    abgang_frame.pack(side=tkinter.RIGHT, fill=tkinter.BOTH, expand=True, padx=(5, 0))
 
-# Eingabefelder für Abgänge
-abgang_artikel_label = tkinter.Label(abgang_frame, text="Artikelname:")
-abgang_artikel_label.grid(row=1, column=0, sticky="w", padx=20, pady=5)
-abgang_artikel_feld = tkinter.Entry(abgang_frame, width=25)
-abgang_artikel_feld.grid(row=1, column=1, padx=10, pady=5, sticky="w")
+    abgaenge = tkinter.Label(abgang_frame, text="Abgänge", font=("Arial", 12, "bold"), fg="red")
+    abgaenge.grid(row=0, column=0, columnspan=2, sticky="w", padx=20, pady=(10, 15))
 
-abgang_anzahl_label = tkinter.Label(abgang_frame, text="Anzahl:")
-abgang_anzahl_label.grid(row=2, column=0, sticky="w", padx=20, pady=5)
-abgang_anzahl_feld = tkinter.Entry(abgang_frame, width=25)
-abgang_anzahl_feld.grid(row=2, column=1, padx=10, pady=5, sticky="w")
+    # Eingabefelder für Abgänge
+    abgang_artikel_label = tkinter.Label(abgang_frame, text="Artikelname:")
+    abgang_artikel_label.grid(row=1, column=0, sticky="w", padx=20, pady=5)
+    abgang_artikel_feld = tkinter.Entry(abgang_frame, width=25)
+    abgang_artikel_feld.grid(row=1, column=1, padx=10, pady=5, sticky="w")
 
-abgang_einheit_label = tkinter.Label(abgang_frame, text="Einheit:")
-abgang_einheit_label.grid(row=3, column=0, sticky="w", padx=20, pady=5)
-abgang_einheit_feld = tkinter.Entry(abgang_frame, width=25)
-abgang_einheit_feld.grid(row=3, column=1, padx=10, pady=5, sticky="w")
+    abgang_anzahl_label = tkinter.Label(abgang_frame, text="Anzahl:")
+    abgang_anzahl_label.grid(row=2, column=0, sticky="w", padx=20, pady=5)
+    abgang_anzahl_feld = tkinter.Entry(abgang_frame, width=25)
+    abgang_anzahl_feld.grid(row=2, column=1, padx=10, pady=5, sticky="w")
 
-abgang_kuerzel_label = tkinter.Label(abgang_frame, text="Kürzel:")
-abgang_kuerzel_label.grid(row=4, column=0, sticky="w", padx=20, pady=5)
-abgang_kuerzel_feld = tkinter.Entry(abgang_frame, width=25)
-abgang_kuerzel_feld.grid(row=4, column=1, padx=10, pady=5, sticky="w")
+    abgang_einheit_label = tkinter.Label(abgang_frame, text="Einheit:")
+    abgang_einheit_label.grid(row=3, column=0, sticky="w", padx=20, pady=5)
+    abgang_einheit_feld = tkinter.Entry(abgang_frame, width=25)
+    abgang_einheit_feld.grid(row=3, column=1, padx=10, pady=5, sticky="w")
 
-abgang_datum_label = tkinter.Label(abgang_frame, text="Datum:")
-abgang_datum_label.grid(row=5, column=0, sticky="w", padx=20, pady=5)
-abgang_datum_feld = tkinter.Entry(abgang_frame, width=25)
-abgang_datum_feld.grid(row=5, column=1, padx=10, pady=5, sticky="w")
-abgang_datum_feld.insert(0, datetime.now().strftime("%d.%m.%Y"))
-
-abgang_button = tkinter.Button(abgang_frame, text="Abgang registrieren", command=abgang_hinzufugen, width=20,
-                              background="red", foreground="black", font=("Arial", 10, "bold"))
-abgang_button.grid(row=6, column=0, columnspan=2, pady=15)
-
-# LÖSCHEN BUTTON
-buLoeschen = tkinter.Button(fenster, text="Artikel löschen", command=loeschen, width=20,
-                           background="orange", foreground="black", font=("Arial", 10, "bold"))
-buLoeschen.pack(pady=10)
-
-# INVENTUR EXPORT BUTTON
-buInventur = tkinter.Button(fenster, text="Inventur exportieren (CSV)", command=inventur_exportieren, width=25,
-                           background="lightblue", foreground="black", font=("Arial", 10, "bold"))
-buInventur.pack(pady=5)
-
-# TRENNLINIE
-separator = ttk.Separator(fenster, orient='horizontal')
-separator.pack(fill=tkinter.X, padx=10, pady=5)
-
-# TABELLENBEREICH
-tabelle_frame = tkinter.Frame(fenster)
-tabelle_frame.pack(fill=tkinter.BOTH, expand=True, padx=10, pady=10)
-
-tabelle_titel = tkinter.Label(tabelle_frame, text="Lagerbestand Übersicht", font=("Arial", 12, "bold"))
-tabelle_titel.pack(pady=(0, 10))
-
-# TABELLE ERSTELLEN
-columns = ['ID', 'Artikelname', 'Aktueller Bestand', 'Mindestbestand', 'Einheit', 'Lagerort', 'Kürzel', 'Hinzugefügt am']
-treeview = ttk.Treeview(tabelle_frame, columns=columns, show='headings', height=15)
-
-# Spaltenüberschriften setzen
-for col in columns:
-    treeview.heading(col, text=col)
-    treeview.column(col, width=100, minwidth=50)
-
-treeview.pack(fill=tkinter.BOTH, expand=True)
-
-# DOPPELKLICK-EVENT FÜR BEARBEITUNG HINZUFÜGEN
-treeview.bind("<Double-1>", artikel_bearbeiten)  # Doppelklick öffnet Bearbeitung
-
-
-# WICHTIG: Datenbank erstellen falls sie nicht existiert (für erste Benutzung)
-erstelle_datenbank_falls_nicht_vorhanden()
-
-# DATEN AUS DATENBANK LADEN (anstatt Beispieldaten)
-tabelle_neu_laden()
+    abgang_ort_label = tkinter.Label(abgang_frame, text="Lagerort:")
+    abgang_ort_label.grid(row=4, column=0, sticky="w", padx=20, pady=5)
+    abgang_ort_feld = tkinter.Entry(abgang_frame, width=25)
+    abgang_ort_feld.grid(row=4, column=1, padx=10, pady=5, sticky="w")
+
+    abgang_kuerzel_label = tkinter.Label(abgang_frame, text="Kürzel:")
+    abgang_kuerzel_label.grid(row=5, column=0, sticky="w", padx=20, pady=5)
+    abgang_kuerzel_feld = tkinter.Entry(abgang_frame, width=25)
+    abgang_kuerzel_feld.grid(row=5, column=1, padx=10, pady=5, sticky="w")
+
+    abgang_datum_label = tkinter.Label(abgang_frame, text="Datum:")
+    abgang_datum_label.grid(row=6, column=0, sticky="w", padx=20, pady=5)
+    abgang_datum_feld = tkinter.Entry(abgang_frame, width=25)
+    abgang_datum_feld.grid(row=6, column=1, padx=10, pady=5, sticky="w")
+    abgang_datum_feld.insert(0, lager.heute_deutsch())
+
+    abgang_button = tkinter.Button(abgang_frame, text="Abgang registrieren", command=abgang_hinzufugen, width=20,
+                                  background="red", foreground="black", font=("Arial", 10, "bold"))
+    abgang_button.grid(row=7, column=0, columnspan=2, pady=(15, 5))
+
+    abgang_import_button = tkinter.Button(abgang_frame, text="Abgänge importieren (CSV)", width=20,
+                                         command=lambda: sammelimport_starten(sammelimport.abgaenge_importieren, "Abgänge"))
+    abgang_import_button.grid(row=8, column=0, columnspan=2, pady=(0, 15))
+
+    # Scan-Feld: Barcode-Scanner (GTIN/PZN) bucht pro Scan 1 Stück als Abgang. Mit F8 springt
+    # der Cursor hierher, grün heißt "bereit zum Scannen".
+    scan_label = tkinter.Label(abgang_frame, text="Scan (GTIN/PZN):")
+    scan_label.grid(row=9, column=0, sticky="w", padx=20, pady=5)
+    scan_feld = tkinter.Entry(abgang_frame, width=25)
+    scan_feld.grid(row=9, column=1, padx=10, pady=5, sticky="w")
+    scan_feld.bind('<Return>', gescannt)
+    scan_feld.bind('<KP_Enter>', gescannt)
+    scan_feld.bind('<FocusIn>', lambda e: scan_feld.config(background="#c8f0c8"))
+    scan_feld.bind('<FocusOut>', lambda e: scan_feld.config(background="white"))
+    fenster.bind('<F8>', lambda e: scan_feld.focus_set())
+
+    scan_status = tkinter.Label(abgang_frame, text="", anchor="w", justify=tkinter.LEFT, wraplength=350)
+    scan_status.grid(row=10, column=0, columnspan=2, sticky="w", padx=20)
+
+    # Vorschläge beim Tippen der Artikelnamen (ein gewählter Vorschlag füllt auch Einheit/Lagerort)
+    Vorschlagsliste(artikel_feld, lambda: namensindex, zugang_vorschlag_gewaehlt)
+    Vorschlagsliste(abgang_artikel_feld, lambda: namensindex, abgang_vorschlag_gewaehlt)
+
+    # LÖSCHEN BUTTON
+    buLoeschen = tkinter.Button(fenster, text="Artikel löschen", command=loeschen, width=20,
+                               background="orange", foreground="black", font=("Arial", 10, "bold"))
+    buLoeschen.pack(pady=10)
+
+    # INVENTUR EXPORT BUTTON
+    buInventur = tkinter.Button(fenster, text="Inventur exportieren (CSV)", command=inventur_exportieren, width=25,
+                               background="lightblue", foreground="black", font=("Arial", 10, "bold"))
+    buInventur.pack(pady=5)
+
+    # NEU LADEN BUTTON (komplettes Neuladen nur auf Wunsch)
+    buNeuLaden = tkinter.Button(fenster, text="Tabelle neu laden", command=tabelle_neu_laden, width=25,
+                               background="lightgray", foreground="black", font=("Arial", 10, "bold"))
+    buNeuLaden.pack(pady=5)
+
+    # NACHBESTELLLISTE BUTTON
+    buNachbestellung = tkinter.Button(fenster, text="Nachbestellliste", command=nachbestellliste_anzeigen, width=25,
+                                     background="yellow", foreground="black", font=("Arial", 10, "bold"))
+    buNachbestellung.pack(pady=5)
+
+    # BESTELLVORSCHLAG BUTTON (Nachbestellen nach dem bisherigen Verbrauch)
+    buBestellvorschlag = tkinter.Button(fenster, text="Bestellvorschlag (Prognose)", command=bestellvorschlag_anzeigen,
+                                        width=25, background="khaki", foreground="black", font=("Arial", 10, "bold"))
+    buBestellvorschlag.pack(pady=5)
+
+    # DIAGNOSE BUTTON (nur mit MEDIDEPOT_DIAGNOSE=1, auch mit F12 zu öffnen)
+    if diagnose.AKTIV:
+        buDiagnose = tkinter.Button(fenster, text="Diagnose", command=diagnose_anzeigen, width=25,
+                                   background="white", foreground="black", font=("Arial", 10, "bold"))
+        buDiagnose.pack(pady=5)
+        fenster.bind('<F12>', diagnose_anzeigen)
+        diagnose_herzschlag()
+
+    # TRENNLINIE
+    separator = ttk.Separator(fenster, orient='horizontal')
+    separator.pack(fill=tkinter.X, padx=10, pady=5)
+
+    # STATUSLEISTE (zeigt an, wenn die Datenbank im Hintergrund arbeitet)
+    status_frame = tkinter.Frame(fenster)
+    status_frame.pack(side=tkinter.BOTTOM, fill=tkinter.X, padx=10, pady=(0, 5))
+
+    status_label = tkinter.Label(status_frame, text="", anchor="w", fg="gray")
+    status_label.pack(side=tkinter.LEFT, fill=tkinter.X, expand=True)
+
+    # Fortschrittsbalken (nur sichtbar während eines Exports)
+    fortschritt_balken = ttk.Progressbar(status_frame, orient='horizontal', length=200, mode='determinate')
+
+    # TABELLENBEREICH
+    tabelle_frame = tkinter.Frame(fenster)
+    tabelle_frame.pack(fill=tkinter.BOTH, expand=True, padx=10, pady=10)
+
+    # NIEDRIGE BESTÄNDE: Anzeige unten rechts in der Statusleiste, ein Klick öffnet die Liste
+    # rechts neben der Tabelle (kein Meldungsfenster - Buchen geht ohne Unterbrechung weiter)
+    bestandsmeldung = Bestandsmeldung(status_frame, fenster, tabelle_frame, niedrige_bestaende,
+                                      artikel_oeffnen, nachbestellliste_anzeigen)
+
+    tabelle_titel = tkinter.Label(tabelle_frame, text="Lagerbestand Übersicht", font=("Arial", 12, "bold"))
+    tabelle_titel.pack(pady=(0, 10))
+
+    # SUCHFELD (sucht während der Eingabe in Artikelname, Lagerort und Kürzel)
+    such_frame = tkinter.Frame(tabelle_frame)
+    such_frame.pack(side=tkinter.TOP, fill=tkinter.X, pady=(0, 5))
+
+    such_label = tkinter.Label(such_frame, text="Suche:")
+    such_label.pack(side=tkinter.LEFT)
+    such_var = tkinter.StringVar()
+    such_feld = tkinter.Entry(such_frame, textvariable=such_var, width=40)
+    such_feld.pack(side=tkinter.LEFT, padx=5)
+    such_var.trace_add("write", suche_eingegeben)
+    such_feld.bind('<Escape>', suche_leeren)
+
+    such_leeren_button = tkinter.Button(such_frame, text="✕", command=suche_leeren, width=2)
+    such_leeren_button.pack(side=tkinter.LEFT)
+
+    # TABELLE ERSTELLEN
+    columns = ['ID', 'Artikelname', 'Aktueller Bestand', 'Mindestbestand', 'Einheit', 'Lagerort', 'Kürzel', 'Hinzugefügt am']
+    treeview = ttk.Treeview(tabelle_frame, columns=columns, show='headings', height=15)
+
+    # Eigene Scrollbar: der Treeview enthält nur die sichtbaren Zeilen
+    tabelle_scrollbar = ttk.Scrollbar(tabelle_frame, orient='vertical')
+    tabelle_scrollbar.pack(side=tkinter.RIGHT, fill=tkinter.Y)
+
+    # Spaltenüberschriften setzen (Klick auf die Überschrift sortiert nach dieser Spalte)
+    for nr, col in enumerate(columns):
+        treeview.heading(col, text=col, command=lambda nr=nr: spalte_sortieren(nr))
+        treeview.column(col, width=100, minwidth=50)
+
+    treeview.pack(side=tkinter.LEFT, fill=tkinter.BOTH, expand=True)
+
+    # Virtuelle Tabelle: lädt die Artikel seitenweise beim Scrollen
+    ansicht = VirtuelleTabelle(treeview, tabelle_scrollbar, zeile_darstellen, arbeiter, gezaehlt=anzahl_anzeigen)
+
+    # DOPPELKLICK-EVENT FÜR BEARBEITUNG HINZUFÜGEN
+    treeview.bind("<Double-1>", artikel_bearbeiten)  # Doppelklick öffnet Bearbeitung
+    
+    # WICHTIG: Datenbank erstellen falls sie nicht existiert (für erste Benutzung)
+    # Läuft schon im Hintergrund, damit das Fenster sofort erscheint
+    arbeiter.auftrag(lager.erstelle_datenbank_falls_nicht_vorhanden, fertig=start_fertig, fehler=start_fehler)
 
-# Willkommensnachricht nur beim ersten Start zeigen
-if erster_start:
-    messagebox.showinfo("Willkommen", "Willkommen bei MediDEPOT!")
 
-fenster.mainloop()
+if __name__ == "__main__":
+    starten()
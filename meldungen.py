@@ -0,0 +1,156 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Meldungen bei niedrigen Beständen
+#Beschreibung: Statt nach jeder Buchung ein Warnfenster zu zeigen, das erst weggeklickt werden
+#              muss, merkt sich MediDEPOT die Artikel mit niedrigem Bestand und meldet nur die,
+#              die NEU unter ihr Minimum gefallen sind - unten rechts in der Statusleiste.
+#              Ein Klick darauf öffnet die Liste am rechten Rand. Man kann immer weiterarbeiten.
+
+import heapq
+import tkinter
+from tkinter import ttk
+
+
+# So viele Artikel zeigt die Liste am Rand höchstens (alle: Button "Nachbestellliste")
+MAX_ANZEIGE = 200
+
+
+class NiedrigeBestaende:
+    """
+    Alle Artikel mit niedrigem Bestand (Bestand <= Mindestbestand) im Speicher.
+
+    - setzen() übernimmt die ganze Liste aus der Datenbank (beim Start, "Tabelle neu laden",
+      nach einem Sammel-Import).
+    - aktualisieren() übernimmt nur die geänderten Artikel nach einer Buchung - dafür wird die
+      Datenbank nicht noch einmal gefragt, die Zeilen für die Tabelle sind ja schon geladen.
+    Beide geben die Artikel zurück, die neu dazugekommen sind. Beim ersten setzen() ist noch
+    nichts bekannt - da zählt keiner als neu, sonst wäre beim Start jeder Artikel eine Meldung.
+    """
+
+    def __init__(self):
+        self.artikel = {}       # artikel_id -> (name, bestand, mindestbestand, einheit, lagerort)
+        self.neu = set()        # neu niedrig und noch nicht angesehen
+        self.geladen = False    # setzen() war schon einmal da
+
+    def __len__(self):
+        return len(self.artikel)
+
+    def setzen(self, zeilen):
+        """zeilen: (artikel_id, name, bestand, mindestbestand, einheit, lagerort) wie lager.niedrige_bestaende_laden()."""
+        artikel = {zeile[0]: tuple(zeile[1:6]) for zeile in zeilen}
+        neu = [artikel_id for artikel_id in artikel if artikel_id not in self.artikel] if self.geladen else []
+        self.artikel = artikel
+        self.geladen = True
+        self.neu = {artikel_id for artikel_id in self.neu if artikel_id in artikel}
+        self.neu.update(neu)
+        return neu
+
+    def aktualisieren(self, daten, artikel_ids):
+        """
+        daten: {artikel_id: zeile} von lager.artikel_zeilen_laden() für die geänderten artikel_ids.
+        Fehlt ein Artikel in daten, wurde er gelöscht.
+        """
+        neu = []
+        for artikel_id in artikel_ids:
+            zeile = daten.get(artikel_id)
+            if zeile is not None and zeile[3] is not None and zeile[2] <= zeile[3]:
+                if artikel_id not in self.artikel and self.geladen:
+                    neu.append(artikel_id)
+                self.artikel[artikel_id] = tuple(zeile[1:6])
+            else:
+                # wieder genug da (oder gelöscht) - fällt er später wieder darunter, ist er wieder neu
+                self.artikel.pop(artikel_id, None)
+                self.neu.discard(artikel_id)
+        self.neu.update(neu)
+        return neu
+
+    def gesehen(self):
+        """Die neuen Artikel wurden angesehen - sie bleiben in der Liste, zählen aber nicht mehr als neu."""
+        self.neu.clear()
+
+    def eintraege(self, anzahl=MAX_ANZEIGE):
+        """Höchstens anzahl Einträge (artikel_id, neu, name, bestand, mindestbestand, einheit, lagerort):
+        zuerst die neuen, dann nach Name."""
+        return heapq.nsmallest(anzahl, ((artikel_id, artikel_id in self.neu, *werte)
+                                        for artikel_id, werte in self.artikel.items()),
+                               key=lambda eintrag: (not eintrag[1], (eintrag[2] or "").casefold(), eintrag[0]))
+
+
+class Bestandsmeldung:
+    """
+    Anzeige in der Statusleiste ("⚠️ 12 niedrig · 2 neu") und Liste am rechten Fensterrand.
+    Ein Klick auf die Anzeige öffnet oder schließt die Liste; beim Schließen gelten die neuen
+    Artikel als gesehen. Doppelklick auf einen Artikel in der Liste öffnet ihn zum Bearbeiten.
+    """
+
+    def __init__(self, statusleiste, rand, vor, niedrig, oeffnen, alle_anzeigen):
+        """rand: Fenster, an dessen rechten Rand die Liste kommt. alle_anzeigen: Funktion für "Nachbestellliste"."""
+        self.niedrig = niedrig              # NiedrigeBestaende
+        self.oeffnen = oeffnen              # Funktion(artikel_id) - Artikel bearbeiten
+        self._vor = vor                     # Widget in rand, vor dem die Liste eingepackt wird (die Tabelle)
+        self._ids = []                      # artikel_id zu jeder Zeile der Liste
+        self.offen = False
+
+        self.anzeige = tkinter.Label(statusleiste, text="", cursor="hand2", padx=6)
+        self._hintergrund = self.anzeige.cget("background")
+        self.anzeige.pack(side=tkinter.RIGHT)
+        self.anzeige.bind("<Button-1>", lambda e: self.umschalten())
+
+        self.liste_frame = tkinter.Frame(rand, relief="groove", borderwidth=1)
+        tkinter.Label(self.liste_frame, text="Niedrige Bestände", font=("Arial", 11, "bold")).pack(pady=(5, 0))
+        knopf_frame = tkinter.Frame(self.liste_frame)
+        knopf_frame.pack(side=tkinter.BOTTOM, fill=tkinter.X, pady=5)
+        tkinter.Button(knopf_frame, text="Nachbestellliste", command=alle_anzeigen).pack(side=tkinter.LEFT, padx=5)
+        tkinter.Button(knopf_frame, text="Schließen", command=self.schliessen).pack(side=tkinter.RIGHT, padx=5)
+        self.liste = tkinter.Listbox(self.liste_frame, width=42, activestyle="none")
+        scrollbar = ttk.Scrollbar(self.liste_frame, orient="vertical", command=self.liste.yview)
+        self.liste.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tkinter.RIGHT, fill=tkinter.Y)
+        self.liste.pack(fill=tkinter.BOTH, expand=True, padx=(5, 0))
+        self.liste.bind("<Double-1>", self._doppelklick)
+
+        self.anzeigen()
+
+    def anzeigen(self):
+        """Zahlen in der Statusleiste (und die offene Liste) auf den Stand von niedrig bringen."""
+        anzahl, neu = len(self.niedrig), len(self.niedrig.neu)
+        if neu:
+            self.anzeige.config(text=f"⚠️ {anzahl} niedrig · {neu} neu", background="orange",
+                                foreground="black", font=("Arial", 10, "bold"))
+        elif anzahl:
+            self.anzeige.config(text=f"⚠️ {anzahl} niedrig", background=self._hintergrund,
+                                foreground="black", font=("Arial", 10))
+        else:
+            self.anzeige.config(text="", background=self._hintergrund)
+        if self.offen:
+            self._liste_fuellen()
+
+    def _liste_fuellen(self):
+        self.liste.delete(0, tkinter.END)
+        eintraege = self.niedrig.eintraege()
+        self._ids = [eintrag[0] for eintrag in eintraege]
+        for nummer, (_, neu, name, bestand, mindest, einheit, _) in enumerate(eintraege):
+            self.liste.insert(tkinter.END, f"{'NEU  ' if neu else ''}{name}: {bestand} {einheit} (Min. {mindest})")
+            if neu:
+                self.liste.itemconfig(nummer, foreground="red")
+        if len(self.niedrig) > len(eintraege):
+            self.liste.insert(tkinter.END, f"... und {len(self.niedrig) - len(eintraege)} weitere")
+
+    def umschalten(self):
+        if self.offen:
+            self.schliessen()
+        else:
+            self.offen = True
+            self.liste_frame.pack(side=tkinter.RIGHT, fill=tkinter.Y, padx=(0, 10), pady=10, before=self._vor)
+            self.anzeigen()
+
+    def schliessen(self):
+        self.offen = False
+        self.liste_frame.pack_forget()
+        self.niedrig.gesehen()
+        self.anzeigen()
+
+    def _doppelklick(self, event=None):
+        auswahl = self.liste.curselection()
+        if auswahl and auswahl[0] < len(self._ids):
+            self.oeffnen(self._ids[auswahl[0]])
@@ -7,10 +7,20 @@
 #               Überprüft Benutzername und Passwort, startet dann das Hauptprogramm
 
 # Alle benötigten Module importieren
+import diagnose                  # Zuerst: ab hier wird die Startzeit gemessen (siehe diagnose.py)
 import tkinter                    # Für das Fenster, Buttons und Eingabefelder
 import os                        # Für Dateipfade
 import sys                       # Für Systeminformationen
 
+# Erst das Login-Fenster zeichnen, dann (nach so vielen Millisekunden) die Bilder laden
+BILDER_MS = 20
+# Das Hauptprogramm wird schon vorbereitet, während das Login-Fenster offen ist
+VORBEREITEN_MS = 100
+# Das Hauptprogramm (medidepot), sobald es vorbereitet ist
+hauptprogramm = None
+# Kürzel des angemeldeten Benutzers (wird im Lager-Fenster vorausgefüllt)
+angemeldetes_kuerzel = ""
+
 def get_resource_path(relative_path):
     """ 
     Findet den richtigen Pfad zu Bildern und anderen Dateien.
@@ -30,37 +40,118 @@ def get_resource_path(relative_path):
 # FUNKTIONEN FÜR DAS LOGIN-SYSTEM
 
 
+def anmelden(name, pw):
+    """
+    Läuft im Hintergrund-Thread des Hauptprogramms (die Passwort-Prüfung braucht absichtlich etwas Zeit).
+    Gibt das Kürzel zurück oder None (falsche Daten).
+    """
+    import benutzer
+    import lager
+    # Falls das Hauptprogramm die Datenbank noch nicht geöffnet hat (kostet sonst fast nichts)
+    lager.erstelle_datenbank_falls_nicht_vorhanden()
+    return benutzer.anmelden(name, pw)
+
 def pruefen():
     """
     Diese Funktion wird aufgerufen wenn der "Prüfen"-Button geklickt wird.
     Sie überprüft ob Benutzername und Passwort richtig sind.
+    Die Benutzer stehen in der Datenbank (Tabelle "benutzer", siehe benutzer.py) - verwaltet
+    werden sie mit der Kommandozeile, z.B. "python kommandozeile.py benutzer-anlegen NAME KÜRZEL".
+    Die Prüfung läuft über den Hintergrund-Arbeiter des Hauptprogramms - nach dem Öffnen der
+    Datenbank, das dort schon wartet. Das Login-Fenster bleibt solange bedienbar.
     """
     # Schritt 1: Eingaben aus den Textfeldern holen
-    benutzer = etBenutzer.get()      # Text aus dem Benutzername-Feld
+    name = etBenutzer.get()          # Text aus dem Benutzername-Feld
     pw = etPasswort.get()            # Text aus dem Passwort-Feld
     
-    # Schritt 2: Prüfen ob die Daten richtig sind
-    # HIER STEHEN DIE LOGIN-DATEN: Benutzername "demo", Passwort "demo123"
-    if benutzer == "demo" and pw == "demo123":
+    # Schritt 2: Eingabefelder leeren (für neue Eingabe bereit machen)
+    etBenutzer.delete(0, "end")      # Benutzername-Feld leeren
+    etPasswort.delete(0, "end")      # Passwort-Feld leeren
+    
+    # Schritt 3: Im Hintergrund prüfen, solange "Prüfe..." anzeigen
+    hauptprogramm_vorbereiten()      # Falls das Login schneller war als die Vorbereitung
+    pruefen_besetzt(True)
+    hauptprogramm.arbeiter.auftrag(anmelden, name, pw, fertig=geprueft,
+                                   fehler=lambda e: geprueft(None, f"Datenbank-Fehler: {e}"))
+
+def pruefen_besetzt(besetzt):
+    """Während der Prüfung: Button "Prüfen" aus, Sanduhr als Mauszeiger."""
+    buPruefen["state"] = "disabled" if besetzt else "normal"
+    fenster.config(cursor="watch" if besetzt else "")
+    if besetzt:
+        lbAusgabe["text"] = "Prüfe..."
+        buEnde["state"] = "disabled"
+
+def geprueft(kuerzel, meldung="Zugang nicht erlaubt"):
+    """Ergebnis der Prüfung (im Tk-Thread): kuerzel oder None bei falschen Daten."""
+    global angemeldetes_kuerzel
+    pruefen_besetzt(False)
+    if kuerzel is not None:
         # ERFOLG: Login-Daten sind korrekt
+        angemeldetes_kuerzel = kuerzel
         lbAusgabe["text"] = "Zugang erlaubt"      # Erfolgsmeldung anzeigen
         buEnde["state"] = "normal"                # "Weiter"-Button aktivieren (anklickbar machen)
     else:
         # FEHLER: Login-Daten sind falsch
-        lbAusgabe["text"] = "Zugang nicht erlaubt" # Fehlermeldung anzeigen
+        lbAusgabe["text"] = meldung                # Fehlermeldung anzeigen
         buEnde["state"] = "disabled"               # "Weiter"-Button deaktivieren (nicht anklickbar)
-    
-    # Schritt 3: Eingabefelder leeren (für neue Eingabe bereit machen)
-    etBenutzer.delete(0, "end")      # Benutzername-Feld leeren
-    etPasswort.delete(0, "end")      # Passwort-Feld leeren
+
+def hauptprogramm_vorbereiten():
+    """
+    Lädt das Hauptprogramm und baut das Lager-Fenster versteckt auf, während das Login noch offen ist.
+    Die Datenbank wird dabei schon im Hintergrund geöffnet und die Tabelle geladen -
+    nach dem Login ist das Lager-Fenster dann sofort benutzbar.
+    """
+    global hauptprogramm
+    if hauptprogramm is None:
+        import medidepot                 # Hauptprogramm (Lagerverwaltung) laden
+        medidepot.vorbereiten(fenster)   # Lager-Fenster versteckt aufbauen
+        hauptprogramm = medidepot
 
 def ende():
     """
     Diese Funktion wird aufgerufen wenn der "Weiter"-Button geklickt wird.
-    Sie schließt das Login-Fenster und startet das Hauptprogramm.
+    Sie versteckt das Login-Fenster und zeigt das (schon vorbereitete) Hauptprogramm.
     """
-    fenster.destroy()         # Login-Fenster schließen (komplett entfernen)
-    import medidepot         # Hauptprogramm (Lagerverwaltung) starten
+    hauptprogramm_vorbereiten()  # Falls das Login schneller war als die Vorbereitung
+    fenster.withdraw()           # Login-Fenster verstecken (es bleibt das Tk-Hauptfenster)
+    hauptprogramm.anzeigen(angemeldetes_kuerzel)  # und das Lager-Fenster öffnen (mit Kürzel)
+
+def bilder_laden():
+    """
+    Lädt Hintergrundbild und Logo. Läuft erst, nachdem das Login-Fenster schon zu sehen ist -
+    das große Hintergrundbild braucht etwas Zeit und soll den Start nicht aufhalten.
+    Das Logo liegt schon verkleinert vor (logo_klein.png), es muss nicht mehr umgerechnet werden.
+    """
+    # Die Bilder müssen in globalen Variablen bleiben, sonst löscht Python sie wieder
+    global hintergrund, logo_bild
+    
+    # HINTERGRUNDBILD hinzufügen (falls vorhanden)
+    try:
+        # Versuche das Hintergrundbild zu laden
+        hintergrund = tkinter.PhotoImage(file=get_resource_path("daten_bilder/Bild.png"))
+        hintergrund_label = tkinter.Label(fenster, image=hintergrund)  # Bild in ein Label packen
+        hintergrund_label.place(x=0, y=0, relwidth=1, relheight=1)    # Über das ganze Fenster strecken
+        hintergrund_label.lower()                                      # Hintergrund nach hinten legen
+    except tkinter.TclError:
+        # Falls Hintergrundbild nicht gefunden wird, einfach weitermachen
+        print("Hintergrundbild nicht gefunden")
+    
+    # LOGO hinzufügen (links mittig, kleinere Größe)
+    try:
+        logo_bild = tkinter.PhotoImage(file=get_resource_path("daten_bilder/logo_klein.png"))
+    except tkinter.TclError:
+        try:
+            # Ältere Version ohne verkleinertes Logo: großes Logo laden und halbieren
+            logo_bild = tkinter.PhotoImage(file=get_resource_path("daten_bilder/logo_image.png")).subsample(2, 2)
+        except tkinter.TclError:
+            logo_bild = None
+    if logo_bild is not None:
+        logo_label.config(image=logo_bild, width=0, height=0)  # Bild statt Text im weißen Kasten
+    else:
+        print("Logo nicht gefunden")
+    
+    diagnose.seit_start("Login-Bilder geladen")
 
 # HAUPTFENSTER ERSTELLEN UND KONFIGURIEREN
 
@@ -85,30 +176,10 @@ fenster.configure(bg="white")                     # Weißer Hintergrund als Fall
 # HINTERGRUNDBILD UND LOGO HINZUFÜGEN
 
 
-# HINTERGRUNDBILD hinzufügen (falls vorhanden)
-try:
-    # Versuche das Hintergrundbild zu laden
-    hintergrund = tkinter.PhotoImage(file=get_resource_path("daten_bilder/Bild.png"))
-    hintergrund_label = tkinter.Label(fenster, image=hintergrund)  # Bild in ein Label packen
-    hintergrund_label.place(x=0, y=0, relwidth=1, relheight=1)    # Über das ganze Fenster strecken
-    hintergrund_label.lower()                                      # Hintergrund nach hinten legen
-except:
-    # Falls Hintergrundbild nicht gefunden wird, einfach weitermachen
-    print("Hintergrundbild nicht gefunden")
-
-# LOGO hinzufügen (links mittig, kleinere Größe)
-try:
-    # Versuche das Logo zu laden und zu verkleinern
-    logo_bild_original = tkinter.PhotoImage(file=get_resource_path("daten_bilder/logo_image.png"))
-    logo_bild = logo_bild_original.subsample(2, 2)  # Bild halbieren (subsample macht es kleiner)
-    logo_label = tkinter.Label(fenster, image=logo_bild, bg="white")  # Logo in weißen Kasten
-    logo_label.place(x=150, y=350)                  # Position: 150 Pixel von links, 350 von oben
-except:
-    # Falls Logo nicht gefunden wird, zeige Text stattdessen
-    print("Logo nicht gefunden")
-    logo_label = tkinter.Label(fenster, text="MEDIDEPOT", font=("Arial", 16), 
-                              bg="white", fg="lightblue", width=12, height=6)
-    logo_label.place(x=150, y=350)
+# Bis die Bilder geladen sind (siehe bilder_laden), steht hier der Name als Text
+logo_label = tkinter.Label(fenster, text="MEDIDEPOT", font=("Arial", 16),
+                          bg="white", fg="lightblue", width=12, height=6)
+logo_label.place(x=150, y=350)                  # Position: 150 Pixel von links, 350 von oben
 
 
 # LAYOUT KONFIGURIEREN (Für mittige Ausrichtung der Login-Elemente)
@@ -169,6 +240,11 @@ buEnde.grid(row=18, column=1, padx=5, pady=1)                            # Posit
 # PROGRAMM STARTEN
 
 
+# Erst wenn das Login-Fenster zu sehen ist: Bilder laden und das Hauptprogramm vorbereiten
+fenster.after(BILDER_MS, bilder_laden)
+fenster.after(VORBEREITEN_MS, hauptprogramm_vorbereiten)
+diagnose.seit_start("Login-Fenster aufgebaut")
+
 # Fenster anzeigen und auf Benutzer-Aktionen warten
 # mainloop() startet die Ereignisschleife - das Programm läuft bis das Fenster geschlossen wird
 fenster.mainloop()
\ No newline at end of file
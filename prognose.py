@@ -0,0 +1,125 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Verbrauchsprognose und Bestellvorschläge für MediDEPOT (ohne Fenster)
+#Beschreibung: Berechnet aus den Abgängen im Buchungsjournal, wie viel von jedem Artikel pro Tag
+#              verbraucht wird, wann er voraussichtlich leer ist und wie viel nachbestellt werden
+#              sollte. Läuft im Hintergrund (Fenster) oder nachts über die Kommandozeile.
+#
+# Der Verbrauch pro Tag wird exponentiell geglättet: jeder Abgang zählt mit dem Gewicht
+# ALPHA * Q^(Alter in Tagen) - neue Abgänge zählen also mehr als alte. Weil diese Summe
+# einfach weitergerechnet werden kann (alter Wert * Q^Tage + neue Abgänge), muss nie das
+# ganze Journal neu gelesen werden: aktualisieren() rechnet nur die Buchungen seit dem letzten
+# Mal ein - für alle Artikel auf einmal in einem einzigen SQL-Befehl.
+
+import math
+
+import datenbank
+import lager
+
+
+# Glättung über etwa so viele Tage (wie ein gleitender Durchschnitt über GLAETTUNG_TAGE Tage)
+GLAETTUNG_TAGE = 30
+ALPHA = 2 / (GLAETTUNG_TAGE + 1)
+Q = 1 - ALPHA
+
+# Standard für die Bestellvorschläge: so viele Tage dauert eine Lieferung, und für so viele
+# Tage soll eine Bestellung reichen (Kommandozeile: --lieferzeit / --reichweite)
+LIEFERZEIT_TAGE = 7
+REICHWEITE_TAGE = 30
+
+# Weniger Verbrauch pro Tag als das (gerundet 0.00) zählt als "kein Verbrauch" (z.B. nach langer Pause)
+MIN_PRO_TAG = 0.005
+
+# Neue Abgänge seit der letzten Buchung, die schon eingerechnet ist, zum geglätteten Verbrauch
+# dazurechnen. Abgänge mit Datum in der Zukunft zählen wie heute, ältere werden abgewertet.
+# Gezählt werden Abgänge (von Hand, Scan, Sammel-Import) - keine Korrekturen oder Löschungen.
+EINRECHNEN_SQL = """
+    INSERT INTO verbrauch (artikel_id, rate, stand, erster)
+    SELECT artikel_id,
+           :alpha * SUM(-menge * pow(:q, julianday(:heute) - julianday(MIN(IFNULL(datum, :heute), :heute)))),
+           :heute,
+           MIN(MIN(IFNULL(datum, :heute), :heute))
+    FROM buchungen
+    WHERE buchung_id > :von AND buchung_id <= :bis AND art = 'Abgang'
+    GROUP BY artikel_id
+    ON CONFLICT(artikel_id) DO UPDATE SET
+        rate = rate * pow(:q, MAX(0, julianday(:heute) - julianday(stand))) + excluded.rate,
+        stand = MAX(stand, :heute),
+        erster = MIN(erster, excluded.erster)
+"""
+
+# Verbrauch pro Tag für heute: bis heute abgewertet und durch (1 - Q^Tage) geteilt - so wird ein
+# Artikel, der erst seit ein paar Tagen verbraucht wird, nicht unterschätzt.
+# Dazu kommen die Artikel unter dem Mindestbestand ohne Verbrauch (über die Nachbestellliste).
+PROGNOSE_SQL = """
+    SELECT a.artikel_id, a.produktname, a.aktuellerbestand, a.mindestbestand, a.einheit, a.lagerort,
+           v.rate * pow(:q, MAX(0, julianday(:heute) - julianday(v.stand)))
+                  / (1 - pow(:q, MAX(0, julianday(:heute) - julianday(v.erster)) + 1))
+    FROM verbrauch v JOIN artikel a ON a.artikel_id = v.artikel_id
+    UNION ALL
+    SELECT artikel_id, produktname, aktuellerbestand, mindestbestand, einheit, lagerort, 0
+    FROM nachbestellliste WHERE artikel_id NOT IN (SELECT artikel_id FROM verbrauch)
+"""
+
+
+def _einrechnen(cursor, heute):
+    """Rechnet alle noch nicht eingerechneten Buchungen ein. Gibt die Anzahl neuer Buchungen zurück."""
+    von = cursor.execute("SELECT buchung_id FROM verbrauch_stand").fetchone()[0]
+    bis = cursor.execute("SELECT IFNULL(MAX(buchung_id), 0) FROM buchungen").fetchone()[0]
+    if bis <= von:
+        return 0
+    cursor.execute(EINRECHNEN_SQL, {"alpha": ALPHA, "q": Q, "heute": heute, "von": von, "bis": bis})
+    cursor.execute("UPDATE verbrauch_stand SET buchung_id = ?", (bis,))
+    return bis - von
+
+@datenbank.bei_sperre_wiederholen
+def aktualisieren(heute=None):
+    """
+    Rechnet die neuen Buchungen seit dem letzten Aufruf ein (beim ersten Mal das ganze Journal).
+    heute: ISO-Datum, bis zu dem gerechnet wird (Standard: heute).
+    Gibt die Anzahl der neuen Buchungen zurück (0 = war schon aktuell).
+    """
+    with datenbank.transaktion() as cursor:
+        return _einrechnen(cursor, heute or lager.heute())
+
+@datenbank.bei_sperre_wiederholen
+def neu_berechnen(heute=None):
+    """Vergisst den bisherigen Verbrauch und rechnet das ganze Journal neu ein (z.B. nach Änderung von GLAETTUNG_TAGE)."""
+    with datenbank.transaktion() as cursor:
+        cursor.execute("DELETE FROM verbrauch")
+        cursor.execute("UPDATE verbrauch_stand SET buchung_id = 0")
+        return _einrechnen(cursor, heute or lager.heute())
+
+def bestellvorschlaege(lieferzeit=LIEFERZEIT_TAGE, reichweite=REICHWEITE_TAGE, alle=False, heute=None):
+    """
+    Aktualisiert die Prognose und gibt die Artikel zurück, die nachbestellt werden sollten:
+    die, deren Bestand bis zum Eintreffen einer Lieferung (lieferzeit Tage) unter den
+    Mindestbestand fällt - oder schon darunter ist. Mit alle=True alle Artikel mit Verbrauch.
+    Zeilen: (artikel_id, name, bestand, mindestbestand, einheit, lagerort,
+             verbrauch_pro_tag, tage_bis_leer, bestellmenge) - die dringendsten zuerst.
+    tage_bis_leer ist None ohne Verbrauch. Die Bestellmenge reicht für lieferzeit + reichweite
+    Tage, danach ist noch der Mindestbestand da.
+    """
+    heute = heute or lager.heute()
+    aktualisieren(heute)
+
+    vorschlaege = []
+    for *artikel, bestand, mindest, einheit, lagerort, pro_tag in datenbank.abfrage(
+            PROGNOSE_SQL, {"q": Q, "heute": heute}):
+        # Auf 2 Nachkommastellen runden (Rechenungenauigkeit wie 4.0000001 gibt sonst 1 Stück mehr)
+        pro_tag = round(pro_tag, 2) if pro_tag >= MIN_PRO_TAG else 0.0
+        mindest = mindest or 0
+        nachbestellen = bestand - pro_tag * lieferzeit <= mindest
+        if not (nachbestellen or (alle and pro_tag)):
+            continue
+        tage_bis_leer = bestand / pro_tag if pro_tag else None
+        menge = 0
+        if nachbestellen:
+            # Mindestens so viel, dass der Bestand wieder über dem Mindestbestand liegt
+            menge = max(math.ceil(pro_tag * (lieferzeit + reichweite) + mindest - bestand), mindest + 1 - bestand)
+        vorschlaege.append((*artikel, bestand, mindest, einheit, lagerort,
+                            pro_tag, tage_bis_leer, menge))
+
+    # Dringendste zuerst: schon unter dem Mindestbestand, dann nach Tagen bis leer
+    vorschlaege.sort(key=lambda zeile: (zeile[2] > zeile[3], zeile[7] if zeile[7] is not None else math.inf))
+    return vorschlaege
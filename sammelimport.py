@@ -0,0 +1,153 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Sammel-Import von Zugängen und Abgängen für MediDEPOT
+#Beschreibung: Liest eine CSV-Datei im gleichen Format wie der Inventur-Export
+#              und bucht alle Zeilen in einer einzigen Transaktion.
+
+import csv
+
+import datenbank
+import diagnose
+import lager
+
+
+# Spalten wie beim Inventur-Export:
+# ID;Artikelname;Aktueller Bestand;Mindestbestand;Einheit;Lagerort;Kürzel;Hinzugefügt am
+# Beim Import steht in "Aktueller Bestand" die Anzahl, die gebucht werden soll.
+# Die ID wird ignoriert.
+SPALTE_NAME = 1
+SPALTE_ANZAHL = 2
+SPALTE_MINDEST = 3
+SPALTE_EINHEIT = 4
+SPALTE_ORT = 5
+SPALTE_KUERZEL = 6
+SPALTE_DATUM = 7
+
+
+class ImportFehler(Exception):
+    """Eine Zeile der CSV-Datei ist ungültig. Es wird dann gar nichts gebucht."""
+
+    def __init__(self, zeile, text):
+        super().__init__(f"Zeile {zeile}: {text}")
+        self.zeile = zeile
+
+
+def _zeilen(datei):
+    """
+    Liest die CSV-Datei Zeile für Zeile (ohne alles auf einmal zu laden).
+    Gibt (zeilennummer, spalten) zurück. Kopfzeile und leere Zeilen werden übersprungen.
+    """
+    leser = csv.reader(datei, delimiter=';')
+    for spalten in leser:
+        nummer = leser.line_num
+        if not any(feld.strip() for feld in spalten):
+            continue
+        if nummer == 1 and spalten[0].strip() == 'ID':
+            continue  # Kopfzeile vom Inventur-Export
+        yield nummer, [feld.strip() for feld in spalten] + [''] * (8 - len(spalten))
+
+
+def _zahl(text, nummer, feld):
+    try:
+        return int(text)
+    except ValueError:
+        raise ImportFehler(nummer, f"{feld} muss eine Zahl sein ('{text}')")
+
+
+def _datum(text, nummer):
+    """Datum aus der CSV-Datei (TT.MM.JJJJ wie im Export) als ISO-Datum, leer = heute."""
+    if not text:
+        return lager.heute()
+    datum = lager.datum_nach_iso(text)
+    if datum is None:
+        raise ImportFehler(nummer, f"Ungültiges Datum ('{text}'), bitte TT.MM.JJJJ")
+    return datum
+
+
+def _zugaenge(datei, cursor):
+    """
+    Prüft jede Zeile, sucht den Artikel (gleicher Name, Einheit und Lagerort) oder legt ihn
+    mit Bestand 0 an und liefert die Werte für die Zugangs-Buchung ins Journal.
+    """
+    for nummer, spalten in _zeilen(datei):
+        name = spalten[SPALTE_NAME]
+        if not all([name, spalten[SPALTE_ANZAHL], spalten[SPALTE_EINHEIT],
+                    spalten[SPALTE_ORT], spalten[SPALTE_KUERZEL]]):
+            raise ImportFehler(nummer, "Artikelname, Anzahl, Einheit, Lagerort und Kürzel sind Pflicht")
+
+        anzahl = _zahl(spalten[SPALTE_ANZAHL], nummer, "Anzahl")
+        if anzahl <= 0:
+            raise ImportFehler(nummer, "Anzahl muss größer als 0 sein")
+        # Leer = Standard für neue Artikel, vorhandene behalten ihren Mindestbestand
+        mindest = _zahl(spalten[SPALTE_MINDEST], nummer, "Mindestbestand") if spalten[SPALTE_MINDEST] else None
+
+        datum = _datum(spalten[SPALTE_DATUM], nummer)
+        artikel_id = lager.artikel_anlegen_oder_finden(cursor, name, spalten[SPALTE_EINHEIT], spalten[SPALTE_ORT],
+                                                       spalten[SPALTE_KUERZEL], datum, mindest)
+
+        yield artikel_id, anzahl, "Zugang", spalten[SPALTE_KUERZEL], datum
+
+
+def _abgaenge(datei, cursor):
+    """
+    Prüft jede Zeile und liefert die Werte für die Abgangs-Buchung ins Journal.
+    Die Artikel werden wie beim Zugang über Name, Einheit und Lagerort gesucht (leere Einheit
+    oder leerer Lagerort = egal, solange der Name eindeutig ist). Die Suche läuft in derselben
+    Transaktion und sieht deshalb schon die vorherigen Zeilen dieser Datei - mehrere
+    Abgänge vom gleichen Artikel können den Bestand also nie unter 0 bringen.
+    """
+    for nummer, spalten in _zeilen(datei):
+        name = spalten[SPALTE_NAME]
+        if not name or not spalten[SPALTE_ANZAHL]:
+            raise ImportFehler(nummer, "Artikelname und Anzahl sind Pflicht")
+
+        anzahl = _zahl(spalten[SPALTE_ANZAHL], nummer, "Anzahl")
+        if anzahl <= 0:
+            raise ImportFehler(nummer, "Anzahl muss größer als 0 sein")
+
+        try:
+            treffer = lager.artikel_nach_name_suchen(name, spalten[SPALTE_EINHEIT], spalten[SPALTE_ORT], cursor)
+        except lager.BuchungsFehler as e:
+            raise ImportFehler(nummer, str(e))  # gleicher Name mehrmals, Lagerort fehlt
+        if treffer is None:
+            raise ImportFehler(nummer, f"Artikel '{name}' ({spalten[SPALTE_EINHEIT]}, {spalten[SPALTE_ORT]}) "
+                                       f"nicht gefunden")
+
+        artikel_id, bestand = treffer
+        if bestand < anzahl:
+            raise ImportFehler(nummer, f"Nicht genug Bestand für '{name}'! Verfuegbar: {bestand}")
+
+        yield artikel_id, -anzahl, "Abgang", spalten[SPALTE_KUERZEL], _datum(spalten[SPALTE_DATUM], nummer)
+
+
+# Alle Buchungen gehen ins Journal, der Bestand wird dabei vom Trigger fortgeschrieben
+BUCHUNG_SQL = "INSERT INTO buchungen (artikel_id, menge, art, Kürzel, datum) VALUES (?, ?, ?, ?, ?)"
+
+
+@diagnose.gemessen("Import")
+@datenbank.bei_sperre_wiederholen
+def zugaenge_importieren(pfad):
+    """
+    Bucht alle Zeilen der CSV-Datei als neue Zugänge.
+    Alles passiert in einer Transaktion: bei einer ungültigen Zeile wird nichts gespeichert.
+    Gibt die Anzahl der gebuchten Zeilen zurück.
+    """
+    with open(pfad, newline='', encoding='utf-8-sig') as datei:
+        with datenbank.transaktion() as cursor:
+            artikel_cursor = cursor.connection.cursor()  # Eigener Cursor zum Anlegen/Finden der Artikel
+            cursor.executemany(BUCHUNG_SQL, _zugaenge(datei, artikel_cursor))
+            return cursor.rowcount
+
+@diagnose.gemessen("Import")
+@datenbank.bei_sperre_wiederholen
+def abgaenge_importieren(pfad):
+    """
+    Bucht alle Zeilen der CSV-Datei als Abgänge (Bestand wird reduziert).
+    Alles passiert in einer Transaktion: bei einer ungültigen Zeile wird nichts gespeichert.
+    Gibt die Anzahl der gebuchten Zeilen zurück.
+    """
+    with open(pfad, newline='', encoding='utf-8-sig') as datei:
+        with datenbank.transaktion() as cursor:
+            suche = cursor.connection.cursor()  # Eigener Cursor für die Artikelsuche
+            cursor.executemany(BUCHUNG_SQL, _abgaenge(datei, suche))
+            return cursor.rowcount
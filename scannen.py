@@ -0,0 +1,146 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Barcode-Scanner für MediDEPOT (Abgänge per Scan)
+#Beschreibung: Ein USB-Barcode-Scanner "tippt" den Code wie eine Tastatur und drückt danach
+#              Enter. Jeder Scan bucht einen Abgang von 1 Stück. Die Scans werden gesammelt
+#              und in kleinen Paketen (eine Transaktion pro Paket) im Hintergrund gebucht -
+#              so geht auch beim schnellen Scannen vieler Artikel kein Scan verloren.
+#
+# Gespeichert wird jeder Code als GTIN (die Nummer unter dem EAN-Strichcode). Eine PZN
+# (Pharmazentralnummer, als Strichcode "-12345678") wird dafür in ihre GTIN umgerechnet:
+# "4150" + PZN + Prüfziffer. So findet der Scan denselben Artikel, egal ob der PZN-Strichcode
+# oder der EAN/DataMatrix-Code auf der Packung gescannt wird.
+
+
+# So lange (Millisekunden) werden Scans gesammelt, bevor sie gebucht werden
+SAMMELN_MS = 200
+
+# Höchstens so viele Scans pro Transaktion
+MAX_PRO_PAKET = 50
+
+# Anfang der GTIN, in die eine PZN umgerechnet wird (von der IFA für Arzneimittel vergeben)
+PZN_VORSILBE = "4150"
+
+
+class CodeFehler(ValueError):
+    """Der eingegebene oder gescannte Text ist keine gültige GTIN/PZN."""
+
+
+def _gtin_pruefziffer(ziffern):
+    """Prüfziffer einer GTIN (EAN) für die Ziffern ohne Prüfziffer: Gewichte 3 und 1 von rechts."""
+    summe = sum(int(ziffer) * (3 if nummer % 2 == 0 else 1) for nummer, ziffer in enumerate(reversed(ziffern)))
+    return str(-summe % 10)
+
+def _pzn_pruefziffer(ziffern):
+    """Prüfziffer einer PZN (7 Ziffern ohne Prüfziffer): Gewichte 1 bis 7, Rest durch 11 (10 = ungültig)."""
+    rest = sum(int(ziffer) * gewicht for gewicht, ziffer in enumerate(ziffern, start=1)) % 11
+    return None if rest == 10 else str(rest)
+
+def _pzn_nach_gtin(pzn):
+    pzn = pzn.zfill(8)  # alte PZN mit 7 Ziffern: vorne eine 0 (die Prüfziffer bleibt gleich)
+    if _pzn_pruefziffer(pzn[:7]) != pzn[7]:
+        raise CodeFehler(f"Ungültige PZN '{pzn}' (Prüfziffer stimmt nicht)")
+    return PZN_VORSILBE + pzn + _gtin_pruefziffer(PZN_VORSILBE + pzn)
+
+def code_normalisieren(text):
+    """
+    Macht aus einem gescannten oder getippten Code die GTIN, die gespeichert wird.
+    - "-12345678", "PZN 12345678" oder "PZN-1234567" -> PZN, wird in ihre GTIN umgerechnet
+    - 12, 13 oder 14 Ziffern -> GTIN (12 = UPC, 14 mit 0 vorne = GTIN-13)
+    - 8 Ziffern ohne "-": PZN, falls die PZN-Prüfziffer passt, sonst GTIN-8 (EAN-8).
+      In der Praxis sind PZN viel häufiger - wichtig ist nur, dass Zuordnen und Scannen
+      denselben Code gleich umrechnen, dann wird der Artikel immer gefunden.
+    Wirft CodeFehler, wenn es keine gültige GTIN/PZN ist.
+    """
+    code = text.strip().upper().replace(" ", "")
+    if code.startswith("PZN"):
+        code = "-" + code[3:].lstrip("-:")
+    ist_pzn = code.startswith("-")
+    ziffern = code.lstrip("-")
+    if not ziffern.isdigit():
+        raise CodeFehler(f"'{text.strip()}' ist kein gültiger Code (nur Ziffern erlaubt)")
+
+    if ist_pzn or len(ziffern) == 7:
+        if len(ziffern) not in (7, 8):
+            raise CodeFehler(f"Eine PZN hat 8 Ziffern ('{text.strip()}')")
+        return _pzn_nach_gtin(ziffern)
+    if len(ziffern) == 8 and _pzn_pruefziffer(ziffern[:7]) == ziffern[7]:
+        return _pzn_nach_gtin(ziffern)
+
+    if len(ziffern) == 12:
+        ziffern = "0" + ziffern             # UPC (USA) -> GTIN-13
+    elif len(ziffern) == 14 and ziffern.startswith("0"):
+        ziffern = ziffern[1:]               # GTIN-14 mit 0 vorne ist dieselbe GTIN-13
+    if len(ziffern) not in (8, 13, 14):
+        raise CodeFehler(f"'{text.strip()}' ist keine GTIN (8, 12, 13 oder 14 Ziffern)")
+    if _gtin_pruefziffer(ziffern[:-1]) != ziffern[-1]:
+        raise CodeFehler(f"Ungültige GTIN/PZN '{ziffern}' (Prüfziffer stimmt nicht)")
+    return ziffern
+
+def code_anzeigen(gtin):
+    """Gespeicherte GTIN für die Anzeige: zu einer PZN wieder "PZN 12345678", sonst die GTIN."""
+    if not gtin:
+        return ""
+    if len(gtin) == 13 and gtin.startswith(PZN_VORSILBE):
+        return "PZN " + gtin[4:12]
+    return gtin
+
+
+class ScanWarteschlange:
+    """
+    Sammelt Scans im Tk-Thread und bucht sie paketweise über den Hintergrund-Arbeiter.
+
+    - hinzufuegen() merkt sich den Scan nur (kostet fast nichts, das Fenster bleibt flüssig).
+    - Nach SAMMELN_MS (oder sobald MAX_PRO_PAKET Scans da sind) geht ein Paket an buchen().
+    - Es ist immer nur ein Paket unterwegs. Was währenddessen gescannt wird, kommt ins nächste -
+      je schneller gescannt wird, desto größer (und damit effizienter) werden die Pakete.
+    - Schlägt ein Paket ganz fehl (z.B. Datenbank gesperrt), kommen die Scans zurück an den
+      Anfang der Warteschlange und werden später nochmal versucht - verloren geht keiner.
+    """
+
+    def __init__(self, arbeiter, buchen, fertig, fehler=None):
+        self.arbeiter = arbeiter
+        self.buchen = buchen        # Funktion(scans) im Hintergrund, scans = [(code, kuerzel, datum)]
+        self.fertig = fertig        # Funktion(ergebnis von buchen) im Tk-Thread
+        self.fehler = fehler        # Funktion(exception) im Tk-Thread, wenn ein Paket nicht gebucht wurde
+        self._wartend = []
+        self._unterwegs = 0         # Anzahl Scans im Paket, das gerade gebucht wird (0 = keins)
+        self._geplant = None
+
+    def __len__(self):
+        """Anzahl der Scans, die noch nicht gebucht sind (wartend und unterwegs)."""
+        return len(self._wartend) + self._unterwegs
+
+    def hinzufuegen(self, code, kuerzel, datum):
+        self._wartend.append((code, kuerzel, datum))
+        if len(self._wartend) >= MAX_PRO_PAKET:
+            self._senden()
+        elif self._geplant is None:
+            self._geplant = self.arbeiter.fenster.after(SAMMELN_MS, self._senden)
+
+    def _senden(self):
+        if self._geplant is not None:
+            self.arbeiter.fenster.after_cancel(self._geplant)
+            self._geplant = None
+        if self._unterwegs or not self._wartend:
+            return  # das nächste Paket geht los, sobald das jetzige fertig ist
+
+        paket = self._wartend[:MAX_PRO_PAKET]
+        del self._wartend[:MAX_PRO_PAKET]
+        self._unterwegs = len(paket)
+
+        def fertig(ergebnis):
+            self._unterwegs = 0
+            self._senden()          # inzwischen gesammelte Scans gleich weiterbuchen
+            self.fertig(ergebnis)
+
+        def fehler(e):
+            self._unterwegs = 0
+            self._wartend[:0] = paket
+            if self._geplant is not None:
+                self.arbeiter.fenster.after_cancel(self._geplant)
+            self._geplant = self.arbeiter.fenster.after(SAMMELN_MS * 5, self._senden)
+            if self.fehler:
+                self.fehler(e)
+
+        self.arbeiter.auftrag(self.buchen, paket, fertig=fertig, fehler=fehler)
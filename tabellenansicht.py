@@ -0,0 +1,392 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Virtuelle Tabelle für die Lagerbestand-Übersicht
+#Beschreibung: Zeigt im Treeview nur die gerade sichtbaren Artikel an und lädt
+#              die Daten seitenweise aus der Datenbank, während gescrollt wird.
+
+from collections import OrderedDict
+
+import datenbank
+import diagnose
+
+
+# Spalten in der Reihenfolge, in der sie im Treeview angezeigt werden
+SPALTEN_SQL = "artikel_id, produktname, aktuellerbestand, mindestbestand, einheit, lagerort, Kürzel, datum"
+
+# Quelle der angezeigten Artikel-IDs: (tabelle, id_spalte, bedingung, parameter)
+ALLE_ARTIKEL = ("artikel", "artikel_id", "1", [])
+
+# Sortierbare Spalten: Position in der Zeile -> Ausdruck für ORDER BY.
+# Für jede Spalte gibt es einen Index (siehe lager.erstelle_datenbank_falls_nicht_vorhanden),
+# SQLite hängt dort automatisch die artikel_id an - so ist (wert, artikel_id) eindeutig sortiert.
+SORTIER_AUSDRUECKE = {
+    0: "artikel_id",
+    1: "produktname COLLATE NOCASE",    # idx_artikel_produktname
+    2: "aktuellerbestand",              # idx_artikel_bestand
+    3: "mindestbestand",                # idx_artikel_mindestbestand
+    4: "einheit",                       # idx_artikel_einheit
+    5: "lagerort",                      # idx_artikel_lagerort
+    6: "Kürzel",                        # idx_artikel_kuerzel
+    7: "datum",                         # idx_artikel_datum
+}
+
+
+class VirtuelleTabelle:
+    """
+    Verbindet einen Treeview mit der Artikel-Tabelle, ohne alle Artikel zu laden.
+
+    - Die Daten werden in Seiten (z.B. 100 Artikel) aus der Datenbank geholt.
+      Ist die Nachbarseite bekannt, wird per Keyset geladen (artikel_id > letzte ID),
+      sonst wird die Position im Index abgezählt.
+    - Nur die letzten max_seiten Seiten bleiben im Speicher (LRU).
+    - Im Treeview stehen nur die sichtbaren Zeilen. Die Seiten für den
+      Vorlauf ober- und unterhalb werden schon vorher geladen.
+    - Alle Datenbank-Abfragen laufen über den Hintergrund-Arbeiter (hintergrund.py);
+      fehlende Seiten werden angezeigt, sobald sie geladen sind.
+    - Mit filtern() werden nur die Artikel aus einer anderen Quelle angezeigt
+      (z.B. die Treffer aus dem Suchindex). Auch dann wird seitenweise geladen.
+    - Mit sortieren() sortiert SQLite (ORDER BY über einen Index der Spalte);
+      das Keyset ist dann (Spaltenwert, artikel_id) statt nur die ID.
+    """
+
+    def __init__(self, treeview, scrollbar, darstellen, arbeiter, seitengroesse=100, max_seiten=20, vorlauf=20,
+                 gezaehlt=None):
+        self.treeview = treeview
+        self.scrollbar = scrollbar
+        self.darstellen = darstellen        # Funktion: Datenbank-Zeile -> (werte, niedrig)
+        self.arbeiter = arbeiter            # DatenbankArbeiter für alle Abfragen
+        self.seitengroesse = seitengroesse
+        self.max_seiten = max_seiten
+        self.vorlauf = vorlauf
+        self.gezaehlt = gezaehlt            # Funktion(anzahl) nach jedem Zählen (z.B. für die Trefferzahl)
+        self.quelle = ALLE_ARTIKEL          # Welche Artikel angezeigt werden (siehe filtern)
+        self.sortierung = (0, False)        # (Spalte, absteigend) - siehe sortieren
+
+        self.gesamt = 0                     # Anzahl aller Artikel
+        self.erste = 0                      # Position der obersten sichtbaren Zeile
+        self._seiten = OrderedDict()        # Seiten-Nummer -> Liste von Zeilen (LRU)
+        self._angefragt = set()             # Seiten, die gerade geladen werden
+        self._generation = 0                # Wird bei neu_laden() erhöht -> alte Ergebnisse verwerfen
+        self._vollstaendig = False          # Zeigt der Treeview schon alle sichtbaren Zeilen?
+
+        # Scrollbar und Treeview miteinander verbinden
+        self.scrollbar.configure(command=self._scrollbar_bewegt)
+        self.treeview.bind("<MouseWheel>", self._mausrad)                 # Windows / macOS
+        self.treeview.bind("<Button-4>", lambda e: self._scrollen(-3))   # Linux: Rad nach oben
+        self.treeview.bind("<Button-5>", lambda e: self._scrollen(3))    # Linux: Rad nach unten
+        self.treeview.bind("<Up>", lambda e: self._taste(-1))
+        self.treeview.bind("<Down>", lambda e: self._taste(1))
+        self.treeview.bind("<Prior>", lambda e: self._scrollen(-self.sichtbar) or "break")
+        self.treeview.bind("<Next>", lambda e: self._scrollen(self.sichtbar) or "break")
+        self.treeview.bind("<Home>", lambda e: self._springen(0) or "break")
+        self.treeview.bind("<End>", lambda e: self._springen(self.gesamt) or "break")
+
+    @property
+    def sichtbar(self):
+        """Wie viele Zeilen der Treeview gleichzeitig anzeigen kann."""
+        return int(self.treeview.cget("height"))
+
+    # DATEN LADEN (die Abfragen selbst laufen im Hintergrund-Thread)
+
+    @staticmethod
+    def _zaehlen(quelle):
+        tabelle, _, bedingung, parameter = quelle
+        return datenbank.abfrage_eins(f"SELECT COUNT(*) FROM {tabelle} WHERE {bedingung}", parameter)[0]
+
+    @staticmethod
+    def _abfragen_ausfuehren(abfragen):
+        """Läuft im Hintergrund: führt die Seiten-Abfragen aus. Gibt {nr: zeilen} zurück."""
+        ergebnis = {}
+        for nr, (sql, parameter, rueckwaerts) in abfragen.items():
+            zeilen = datenbank.abfrage(sql, parameter)
+            if rueckwaerts:
+                zeilen.reverse()
+            ergebnis[nr] = zeilen
+        return ergebnis
+
+    def _abfrage(self, nr):
+        """
+        Baut die Abfrage für Seite nr. Gibt (sql, parameter, rueckwaerts) zurück.
+        Ist eine Nachbarseite geladen, wird per Keyset weitergelesen (ab dem letzten
+        bzw. ersten Artikel dieser Seite), sonst wird die Position im Index abgezählt.
+        """
+        vorher = self._seiten.get(nr - 1)
+        nachher = self._seiten.get(nr + 1)
+        spalte, absteigend = self.sortierung
+
+        if vorher:
+            grenze, rueckwaerts = vorher[-1], False   # Vorwärts: nach dem letzten Artikel der Seite davor
+        elif nachher:
+            grenze, rueckwaerts = nachher[0], True    # Rückwärts: vor dem ersten Artikel der Seite danach
+        else:
+            grenze, rueckwaerts = None, False
+
+        # Aufsteigend vorwärts oder absteigend rückwärts lesen -> größere Werte holen
+        groesser = absteigend == rueckwaerts
+        vergleich = ">" if groesser else "<"
+        richtung = "" if groesser else " DESC"
+        tabelle, id_spalte, bedingung, parameter = self.quelle
+
+        if spalte == 0:
+            # Nach ID: die IDs der Seite direkt in der Quelle suchen (z.B. im Suchindex),
+            # danach nur diese Artikel über den Primärschlüssel laden
+            ids = f"SELECT {id_spalte} FROM {tabelle} WHERE {bedingung}"
+            werte = list(parameter)
+            if grenze is not None:
+                ids += f" AND {id_spalte} {vergleich} ?"
+                werte.append(grenze[0])
+            ids += f" ORDER BY {id_spalte}{richtung} LIMIT ?"
+            werte.append(self.seitengroesse)
+            if grenze is None:
+                ids += " OFFSET ?"
+                werte.append(nr * self.seitengroesse)
+            return (f"SELECT {SPALTEN_SQL} FROM artikel WHERE artikel_id IN ({ids}) "
+                    f"ORDER BY artikel_id{richtung}", werte, rueckwaerts)
+
+        # Nach einer anderen Spalte: über deren Index lesen, bei gleichen Werten nach ID
+        ausdruck = SORTIER_AUSDRUECKE[spalte]
+        reihenfolge = f"ORDER BY {ausdruck}{richtung}, artikel_id{richtung}"
+        bedingungen, werte = [], []
+        if self.quelle is not ALLE_ARTIKEL:
+            bedingungen.append(f"artikel_id IN (SELECT {id_spalte} FROM {tabelle} WHERE {bedingung})")
+            werte.extend(parameter)
+
+        if grenze is not None:
+            # (wert, id) hinter der Grenze. Leere Werte (NULL) sortiert SQLite vor alle anderen -
+            # sie liegen in einem eigenen Bereich, der extra gelesen wird:
+            # - Grenze hat einen Wert: beim Lesen zu kleineren Werten kommen danach alle NULL
+            # - Grenze ist NULL: erst die übrigen NULL (nach ID), zu größeren Werten dann alle anderen
+            wert = grenze[spalte]
+            if wert is not None:
+                # so geschrieben, dass SQLite im Index springen kann
+                bereiche = [(f"{ausdruck} {vergleich}= ? AND ({ausdruck} {vergleich} ? OR artikel_id {vergleich} ?)",
+                             [wert, wert, grenze[0]])]
+                if not groesser:
+                    bereiche.append((f"{ausdruck} IS NULL", []))
+            else:
+                bereiche = [(f"{ausdruck} IS NULL AND artikel_id {vergleich} ?", [grenze[0]])]
+                if groesser:
+                    bereiche.append((f"{ausdruck} IS NOT NULL", []))
+            abfragen, alle_werte = [], []
+            for bereich, bereich_werte in bereiche:
+                abfragen.append(f"SELECT {SPALTEN_SQL} FROM artikel WHERE {' AND '.join(bedingungen + [bereich])} "
+                                f"{reihenfolge} LIMIT ?")
+                alle_werte.extend([*werte, *bereich_werte, self.seitengroesse])
+            if len(abfragen) == 1:
+                return abfragen[0], alle_werte, rueckwaerts
+            # Jeder Bereich liest höchstens eine Seite über seinen Index, sortiert wird nur das bisschen
+            verbunden = " UNION ALL ".join(f"SELECT * FROM ({abfrage})" for abfrage in abfragen)
+            return (f"SELECT * FROM ({verbunden}) {reihenfolge} LIMIT ?",
+                    [*alle_werte, self.seitengroesse], rueckwaerts)
+
+        # Sprung: Position nur im Index abzählen (ohne die ganzen Zeilen zu lesen)
+        ids = (f"SELECT artikel_id FROM artikel WHERE {' AND '.join(bedingungen) or '1'} "
+               f"{reihenfolge} LIMIT ? OFFSET ?")
+        return (f"SELECT {SPALTEN_SQL} FROM artikel WHERE artikel_id IN ({ids}) {reihenfolge}",
+                [*werte, self.seitengroesse, nr * self.seitengroesse], False)
+
+    def _seiten_anfordern(self, nummern):
+        """
+        Stellt sicher, dass die Seiten geladen werden.
+        Gibt True zurück, wenn noch Seiten fehlen (sie kommen dann später).
+        """
+        fehlend = []
+        for nr in nummern:
+            if nr in self._seiten:
+                self._seiten.move_to_end(nr)   # Zuletzt benutzt -> ans Ende der LRU-Liste
+            elif nr not in self._angefragt:
+                fehlend.append(nr)
+
+        if fehlend:
+            abfragen = {nr: self._abfrage(nr) for nr in fehlend}
+            self._angefragt.update(fehlend)
+            generation = self._generation
+            self.arbeiter.auftrag(self._abfragen_ausfuehren, abfragen,
+                                  fertig=lambda ergebnis: self._seiten_erhalten(generation, ergebnis))
+
+        return any(nr not in self._seiten for nr in nummern)
+
+    def _seiten_erhalten(self, generation, ergebnis):
+        """Läuft im Tk-Thread, wenn Seiten aus dem Hintergrund ankommen."""
+        if generation != self._generation:
+            return  # Inzwischen neu geladen -> Ergebnis ist veraltet
+
+        self._angefragt.difference_update(ergebnis)
+        for nr, zeilen in ergebnis.items():
+            self._seiten[nr] = zeilen
+        while len(self._seiten) > self.max_seiten:
+            self._seiten.popitem(last=False)  # Am längsten nicht benutzte Seite vergessen
+
+        if not self._vollstaendig:
+            self.anzeigen()
+
+    def _seiten_fuer(self, von, bis):
+        """Seiten-Nummern, die die Positionen von..bis-1 enthalten."""
+        if bis <= von:
+            return []
+        return list(range(von // self.seitengroesse, (bis - 1) // self.seitengroesse + 1))
+
+    def _zeilen(self, von, bis):
+        """Gibt die Zeilen an den Positionen von..bis-1 zurück (Seiten müssen geladen sein)."""
+        ergebnis = []
+        for nr in self._seiten_fuer(von, bis):
+            start = nr * self.seitengroesse
+            ergebnis.extend(self._seiten[nr][max(0, von - start):bis - start])
+        return ergebnis
+
+    def _vorladen(self):
+        """Lädt die Seiten für den Vorlauf über und unter dem sichtbaren Bereich."""
+        nummern = []
+        for position in (self.erste - self.vorlauf, self.erste + self.sichtbar + self.vorlauf - 1):
+            if 0 <= position < self.gesamt:
+                nummern.append(position // self.seitengroesse)
+        self._seiten_anfordern(nummern)
+
+    # ANZEIGEN
+
+    def neu_laden(self):
+        """Vergisst alle gespeicherten Seiten, zählt neu und zeigt den aktuellen Bereich an."""
+        self._generation += 1
+        self._seiten.clear()
+        self._angefragt.clear()
+        self._vollstaendig = False
+        generation = self._generation
+        self.arbeiter.auftrag(self._zaehlen, self.quelle, fertig=lambda gesamt: self._gezaehlt(generation, gesamt))
+
+    def _gezaehlt(self, generation, gesamt):
+        if generation != self._generation:
+            return
+        self.gesamt = gesamt
+        self.erste = max(0, min(self.erste, self.gesamt - self.sichtbar))
+        if self.gezaehlt:
+            self.gezaehlt(gesamt)
+        self.anzeigen()
+
+    def filtern(self, quelle=None):
+        """
+        Zeigt nur noch die Artikel aus quelle an und springt nach oben.
+        quelle = (tabelle, id_spalte, bedingung, parameter), None = wieder alle Artikel.
+        Beispiel: ("artikel_suche", "rowid", "artikel_suche MATCH ?", ['"pflaster"'])
+        """
+        self.quelle = quelle or ALLE_ARTIKEL
+        self.erste = 0
+        self.neu_laden()
+
+    def sortieren(self, spalte):
+        """
+        Sortiert nach der Spalte (Position in der Zeile, 0 = ID) und springt nach oben.
+        Wird dieselbe Spalte nochmal gewählt, wird die Reihenfolge umgedreht.
+        """
+        absteigend = self.sortierung == (spalte, False)
+        self.sortierung = (spalte, absteigend)
+        self.erste = 0
+        self.neu_laden()
+
+    @diagnose.gemessen("Tk")
+    def anzeigen(self):
+        """
+        Ersetzt die Zeilen im Treeview durch die gerade sichtbaren Artikel.
+        Fehlen noch Seiten, bleibt die alte Anzeige stehen bis sie geladen sind.
+        """
+        bis = min(self.gesamt, self.erste + self.sichtbar)
+        self._scrollbar_setzen()
+
+        self._vollstaendig = False
+        if self._seiten_anfordern(self._seiten_fuer(self.erste, bis)):
+            return
+
+        zeilen = self._zeilen(self.erste, bis)
+        auswahl = self.treeview.selection()
+
+        self.treeview.delete(*self.treeview.get_children())
+        for eintrag in zeilen:
+            werte, _ = self.darstellen(eintrag)
+            self.treeview.insert('', 'end', iid=str(eintrag[0]), values=werte)
+
+        # Auswahl behalten, falls der Artikel noch sichtbar ist
+        noch_da = [iid for iid in auswahl if self.treeview.exists(iid)]
+        if noch_da:
+            self.treeview.selection_set(noch_da)
+
+        self._vollstaendig = True
+        self._vorladen()
+
+    @diagnose.gemessen("Tk")
+    def zeilen_aktualisieren(self, daten, artikel_ids):
+        """
+        Übernimmt geänderte Artikel (daten = {artikel_id: zeile}).
+        Sind alle Artikel schon geladen und noch vorhanden, werden nur ihre Zeilen ersetzt.
+        Kommen Artikel dazu, fallen weg oder ändert sich der Wert in der Sortier-Spalte,
+        verschieben sich die Seiten - dann wird nur der sichtbare Bereich neu geladen.
+        """
+        bekannt = {}
+        for nr, seite in self._seiten.items():
+            for i, eintrag in enumerate(seite):
+                bekannt[eintrag[0]] = (nr, i)
+
+        ids = [int(a) for a in artikel_ids]
+        if not all(a in daten and a in bekannt for a in ids):
+            self.neu_laden()
+            return
+
+        # Hat sich der Wert der Sortier-Spalte geändert, steht der Artikel jetzt woanders
+        spalte = self.sortierung[0]
+        if any(self._seiten[bekannt[a][0]][bekannt[a][1]][spalte] != daten[a][spalte] for a in ids):
+            self.neu_laden()
+            return
+
+        for a in ids:
+            nr, i = bekannt[a]
+            self._seiten[nr][i] = daten[a]
+            if self.treeview.exists(str(a)):
+                werte, _ = self.darstellen(daten[a])
+                self.treeview.item(str(a), values=werte)
+
+    # SCROLLEN
+
+    def _scrollbar_setzen(self):
+        if self.gesamt == 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.erste / self.gesamt,
+                               min(1, (self.erste + self.sichtbar) / self.gesamt))
+
+    def _springen(self, position):
+        neu = max(0, min(position, self.gesamt - self.sichtbar))
+        if neu != self.erste:
+            self.erste = neu
+            self.anzeigen()
+
+    def _scrollen(self, zeilen):
+        self._springen(self.erste + zeilen)
+
+    def _scrollbar_bewegt(self, aktion, wert, einheit=None):
+        """Wird von der Scrollbar aufgerufen ("moveto" oder "scroll")."""
+        if aktion == "moveto":
+            self._springen(int(float(wert) * self.gesamt))
+        elif aktion == "scroll":
+            schritt = self.sichtbar if einheit == "pages" else 1
+            self._scrollen(int(wert) * schritt)
+
+    def _mausrad(self, event):
+        self._scrollen(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _taste(self, richtung):
+        """Pfeiltasten: Auswahl bewegen und am Rand weiterscrollen."""
+        kinder = self.treeview.get_children()
+        if not kinder:
+            return "break"
+        auswahl = self.treeview.selection()
+        position = kinder.index(auswahl[0]) + richtung if auswahl and auswahl[0] in kinder else 0
+
+        if not 0 <= position < len(kinder):
+            # Am Rand angekommen -> eine Zeile weiterscrollen
+            self._scrollen(richtung)
+            kinder = self.treeview.get_children()
+            position = len(kinder) - 1 if richtung > 0 else 0
+
+        if kinder:
+            self.treeview.selection_set(kinder[position])
+            self.treeview.focus(kinder[position])
+        return "break"
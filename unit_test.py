@@ -1,42 +1,90 @@
-# Unit Test für Login
+# Unit Test für Login (Benutzer aus der Datenbank, siehe benutzer.py)
+import os
+import tempfile
 import unittest
 
-# Die Login-Funktion
-def login_pruefen(benutzername, passwort):
-    """Prüft ob Login-Daten korrekt sind"""
-    if benutzername == "Praxis" and passwort == "malzacher1234":
-        return True
-    else:
-        return False
+import benutzer
+import datenbank
+import lager
+
 
-# Unit Tests
 class TestLogin(unittest.TestCase):
-    
+
+    def setUp(self):
+        """Jeder Test bekommt eine eigene Datenbank mit dem Benutzer Praxis (Kürzel EG)"""
+        self.ordner = tempfile.TemporaryDirectory()
+        datenbank.schliessen()
+        self.alte_datei = datenbank.DB_DATEI
+        datenbank.DB_DATEI = os.path.join(self.ordner.name, "test.db")
+        # Kleine Kosten, damit die Tests schnell bleiben
+        self.altes_verfahren = benutzer.VERFAHREN
+        benutzer.VERFAHREN = "scrypt:1024:8:1"
+        lager.erstelle_datenbank_falls_nicht_vorhanden()
+        benutzer.benutzer_anlegen("Praxis", "malzacher1234", "EG")
+
+    def tearDown(self):
+        benutzer.VERFAHREN = self.altes_verfahren
+        datenbank.schliessen()
+        datenbank.DB_DATEI = self.alte_datei
+        self.ordner.cleanup()
+
     def test_korrekter_login(self):
-        """Test: Praxis + malzacher1234 = erfolgreich"""
-        result = login_pruefen("Praxis", "malzacher1234")
-        self.assertTrue(result)
+        """Test: Praxis + malzacher1234 = erfolgreich, mit Kürzel"""
+        self.assertEqual(benutzer.anmelden("Praxis", "malzacher1234"), "EG")
+        self.assertEqual(benutzer.anmelden("praxis", "malzacher1234"), "EG")  # Groß/klein egal
         print("Korrekter Login funktioniert")
-    
+
     def test_falscher_benutzername(self):
         """Test: falscher Benutzername"""
-        result = login_pruefen("admin", "malzacher1234")
-        self.assertFalse(result)
+        self.assertIsNone(benutzer.anmelden("admin", "malzacher1234"))
         print("Falscher Benutzername wird abgelehnt")
-    
+
     def test_falsches_passwort(self):
         """Test: falsches Passwort"""
-        result = login_pruefen("Praxis", "123456")
-        self.assertFalse(result)
+        self.assertIsNone(benutzer.anmelden("Praxis", "123456"))
         print("Falsches Passwort wird abgelehnt")
-    
+
     def test_leere_eingaben(self):
         """Test: leere Eingaben"""
-        result = login_pruefen("", "")
-        self.assertFalse(result)
+        self.assertIsNone(benutzer.anmelden("", ""))
         print("Leere Eingaben werden abgelehnt")
 
+    def test_kein_klartext(self):
+        """Test: gespeichert sind nur Salz und Hash, jeder Benutzer mit eigenem Salz"""
+        benutzer.benutzer_anlegen("Labor", "malzacher1234", "AB")
+        zeilen = datenbank.abfrage("SELECT salz, hash FROM benutzer WHERE benutzername IN ('Praxis', 'Labor')")
+        self.assertNotEqual(zeilen[0], zeilen[1])
+        self.assertNotIn(b"malzacher1234", b"".join(zeilen[0] + zeilen[1]))
+        print("Passwörter werden nur als Hash gespeichert")
+
+    def test_demo_konto(self):
+        """Test: nach dem Update gibt es das alte Demo-Konto (ohne Kürzel), löschen geht"""
+        self.assertEqual(benutzer.anmelden("demo", "demo123"), "")
+        benutzer.benutzer_loeschen("demo")
+        self.assertIsNone(benutzer.anmelden("demo", "demo123"))
+        print("Demo-Konto funktioniert")
+
+    def test_verwalten(self):
+        """Test: doppelter Name und zu kurzes Passwort werden abgelehnt, Passwort ändern"""
+        with self.assertRaises(benutzer.BenutzerFehler):
+            benutzer.benutzer_anlegen("PRAXIS", "anderes-passwort", "XY")
+        with self.assertRaises(benutzer.BenutzerFehler):
+            benutzer.benutzer_anlegen("Neu", "kurz", "XY")
+        benutzer.passwort_aendern("Praxis", "neues-passwort")
+        self.assertIsNone(benutzer.anmelden("Praxis", "malzacher1234"))
+        self.assertEqual(benutzer.anmelden("Praxis", "neues-passwort"), "EG")
+        print("Benutzer verwalten funktioniert")
+
+    def test_neues_verfahren(self):
+        """Test: alter Hash wird beim Login auf das aktuelle Verfahren umgestellt"""
+        benutzer.VERFAHREN = "scrypt:2048:8:1"
+        self.assertEqual(benutzer.anmelden("Praxis", "malzacher1234"), "EG")
+        verfahren = datenbank.abfrage_eins("SELECT verfahren FROM benutzer WHERE benutzername = 'Praxis'")[0]
+        self.assertEqual(verfahren, "scrypt:2048:8:1")
+        self.assertEqual(benutzer.anmelden("Praxis", "malzacher1234"), "EG")
+        print("Hash wird auf neues Verfahren umgestellt")
+
 # Tests ausführen
 if __name__ == "__main__":
     print("Login Tests werden ausgeführt...")
-    unittest.main(verbosity=2)
\ No newline at end of file
+    unittest.main(verbosity=2)
@@ -0,0 +1,224 @@
+#Autor: Esra Güler
+#Datum: 28.05.25
+#Inhalt: Vorschläge beim Tippen von Artikelnamen
+#Beschreibung: Beim Tippen in "Artikelname" (Zugang und Abgang) erscheint eine Liste mit
+#              passenden Artikeln. Die Namen liegen sortiert im Speicher (NamensIndex) -
+#              pro Tastendruck wird nur binär gesucht, die Datenbank wird nicht gefragt.
+#              Wählt man einen Vorschlag, werden auch Einheit und Lagerort eingetragen.
+
+import sys
+import tkinter
+from array import array
+
+import datenbank
+
+
+# So viele Vorschläge werden höchstens angezeigt
+MAX_VORSCHLAEGE = 8
+
+# So lange (Millisekunden) bleibt die Liste nach dem Verlassen des Feldes noch offen -
+# sonst wäre sie schon weg, bevor ein Mausklick auf einen Vorschlag ankommt
+SCHLIESSEN_MS = 150
+
+# Für NamensIndex._geaendert: Artikel wurde seit dem Laden nicht geändert
+_UNVERAENDERT = object()
+
+
+class NamensIndex:
+    """
+    Alle Artikel nach Namen sortiert im Speicher (Groß-/Kleinschreibung egal, über casefold()).
+
+    - Gespeichert wird in vier gleich langen Listen (Name, ID, Einheit, Lagerort) statt einer
+      Liste von Tupeln - das braucht bei sehr vielen Artikeln nur etwa halb so viel Speicher.
+      Einheit und Lagerort gibt es nur wenige verschiedene, sie werden geteilt (sys.intern).
+    - vorschlaege() sucht den Anfang binär und liest dann nur die passenden Einträge.
+    - aktualisieren() übernimmt einzelne geänderte Artikel (neu, geändert, gelöscht), ohne neu
+      zu laden. Der alte Eintrag eines Artikels, der seit dem Laden geändert wurde, ist nicht
+      immer bekannt (z.B. bei Änderungen von anderen Arbeitsplätzen) - er bleibt dann liegen und
+      wird über _geaendert beim Suchen übersprungen, bis zum nächsten laden().
+    """
+
+    def __init__(self, zeilen=()):
+        """zeilen: (artikel_id, name, einheit, lagerort) - beliebige Reihenfolge."""
+        # Erst nach ID (schon sortiert geht das fast ohne Aufwand), dann nur die Nummern nach dem
+        # Namen sortieren - sorted() ist stabil, gleiche Namen bleiben also nach ID geordnet.
+        # Das ist deutlich schneller, als ganze Tupel (Name, ID, ...) miteinander zu vergleichen.
+        zeilen = sorted(zeilen)
+        schluessel = [(zeile[1] or "").casefold() for zeile in zeilen]
+        zeilen = [zeilen[nummer] for nummer in sorted(range(len(zeilen)), key=schluessel.__getitem__)]
+        self._namen = [zeile[1] or "" for zeile in zeilen]
+        self._ids = array("q", (zeile[0] for zeile in zeilen))
+        self._einheiten = [sys.intern(zeile[2] or "") for zeile in zeilen]
+        self._orte = [sys.intern(zeile[3] or "") for zeile in zeilen]
+        self._geaendert = {}    # artikel_id -> (name, einheit, lagerort) oder None (gelöscht)
+
+    @classmethod
+    def laden(cls):
+        """Liest alle Artikel aus der Datenbank (im Hintergrund-Thread aufrufen)."""
+        return cls(datenbank.abfrage("SELECT artikel_id, produktname, einheit, lagerort FROM artikel "
+                                     "ORDER BY artikel_id"))
+
+    def __len__(self):
+        return len(self._namen)
+
+    def _position(self, schluessel, artikel_id=0):
+        """Binäre Suche: erste Position, deren (Name, ID) nicht kleiner als (schluessel, artikel_id) ist."""
+        links, rechts = 0, len(self._namen)
+        while links < rechts:
+            mitte = (links + rechts) // 2
+            if (self._namen[mitte].casefold(), self._ids[mitte]) < (schluessel, artikel_id):
+                links = mitte + 1
+            else:
+                rechts = mitte
+        return links
+
+    def _gueltig(self, artikel_id, name, einheit, lagerort):
+        aktuell = self._geaendert.get(artikel_id, _UNVERAENDERT)
+        return aktuell is _UNVERAENDERT or aktuell == (name, einheit, lagerort)
+
+    def vorschlaege(self, text, anzahl=MAX_VORSCHLAEGE):
+        """Höchstens anzahl Artikel, deren Name mit text beginnt: [(artikel_id, name, einheit, lagerort)]."""
+        praefix = text.casefold()
+        if not praefix.strip():
+            return []
+
+        ergebnis = []
+        position = self._position(praefix)
+        while position < len(self._namen) and len(ergebnis) < anzahl:
+            name = self._namen[position]
+            if not name.casefold().startswith(praefix):
+                break  # sortiert: danach passt keiner mehr
+            eintrag = (self._ids[position], name, self._einheiten[position], self._orte[position])
+            if self._gueltig(*eintrag):
+                ergebnis.append(eintrag)
+            position += 1
+        return ergebnis
+
+    def aktualisieren(self, daten, artikel_ids):
+        """
+        Übernimmt geänderte Artikel. daten wie aus lager.artikel_zeilen_laden ({artikel_id: zeile}),
+        artikel_ids sind alle geänderten IDs - fehlt eine in daten, wurde der Artikel gelöscht.
+        """
+        for artikel_id in artikel_ids:
+            zeile = daten.get(artikel_id)
+            neu = None if zeile is None else (zeile[1] or "", sys.intern(zeile[4] or ""), sys.intern(zeile[5] or ""))
+            alt = self._geaendert.get(artikel_id)
+            if alt is not None and alt != neu:
+                self._entfernen(artikel_id, alt[0])
+            self._geaendert[artikel_id] = neu
+            if neu is not None:
+                self._eintragen(artikel_id, *neu)
+
+    def _entfernen(self, artikel_id, name):
+        position = self._position(name.casefold(), artikel_id)
+        if position < len(self._namen) and self._ids[position] == artikel_id \
+                and self._namen[position].casefold() == name.casefold():
+            del self._namen[position], self._ids[position], self._einheiten[position], self._orte[position]
+
+    def _eintragen(self, artikel_id, name, einheit, lagerort):
+        position = self._position(name.casefold(), artikel_id)
+        if position < len(self._namen) and self._ids[position] == artikel_id \
+                and self._namen[position].casefold() == name.casefold():
+            # Gibt es schon (z.B. nur Einheit geändert) - an derselben Stelle überschreiben
+            self._namen[position], self._einheiten[position], self._orte[position] = name, einheit, lagerort
+            return
+        self._namen.insert(position, name)
+        self._ids.insert(position, artikel_id)
+        self._einheiten.insert(position, einheit)
+        self._orte.insert(position, lagerort)
+
+
+class Vorschlagsliste:
+    """
+    Liste mit Vorschlägen direkt unter einem Eingabefeld (Entry).
+    Tippen zeigt die passenden Artikel, Pfeil hoch/runter wählt, Enter oder Mausklick übernimmt,
+    Escape schließt. Die Liste wird mit place() über das Fenster gelegt, der Fokus bleibt im Feld.
+    """
+
+    def __init__(self, feld, index, ausgewaehlt):
+        self.feld = feld
+        self.index = index                  # Funktion, die den aktuellen NamensIndex liefert
+        self.ausgewaehlt = ausgewaehlt      # Funktion(artikel_id, name, einheit, lagerort)
+        self._vorschlaege = []
+        self._text = None                   # Text, zu dem die Vorschläge gerade passen
+        self._schliessen_geplant = None
+
+        self.liste = tkinter.Listbox(feld.winfo_toplevel(), height=MAX_VORSCHLAEGE, width=45, takefocus=0,
+                                     activestyle="none", exportselection=False)
+        self.liste.bind("<ButtonRelease-1>", self._geklickt)
+
+        feld.bind("<KeyRelease>", self._getippt, add="+")
+        feld.bind("<Down>", lambda e: self._blaettern(1))
+        feld.bind("<Up>", lambda e: self._blaettern(-1))
+        feld.bind("<Return>", self._enter)
+        feld.bind("<Escape>", lambda e: self.schliessen())
+        feld.bind("<FocusOut>", self._fokus_weg)
+        feld.bind("<FocusIn>", self._fokus_da)
+
+    @property
+    def offen(self):
+        return bool(self._vorschlaege)
+
+    def _getippt(self, event=None):
+        text = self.feld.get()
+        if text == self._text:
+            return  # z.B. Pfeiltasten oder Shift - am Text hat sich nichts geändert
+        self._text = text
+        self._vorschlaege = self.index().vorschlaege(text)
+        if not self._vorschlaege:
+            self.schliessen()
+            return
+
+        self.liste.delete(0, tkinter.END)
+        for _, name, einheit, lagerort in self._vorschlaege:
+            self.liste.insert(tkinter.END, f"{name}   ({einheit}, {lagerort})")
+        self.liste.configure(height=len(self._vorschlaege))
+        self.liste.place(in_=self.feld, x=0, rely=1)
+        self.liste.lift()
+
+    def _blaettern(self, richtung):
+        if not self.offen:
+            self._text = None
+            self._getippt()
+            return "break"
+        auswahl = self.liste.curselection()
+        neu = (auswahl[0] + richtung) if auswahl else (0 if richtung > 0 else len(self._vorschlaege) - 1)
+        neu = max(0, min(neu, len(self._vorschlaege) - 1))
+        self.liste.selection_clear(0, tkinter.END)
+        self.liste.selection_set(neu)
+        self.liste.see(neu)
+        return "break"
+
+    def _enter(self, event=None):
+        auswahl = self.liste.curselection()
+        if self.offen and auswahl:
+            self.uebernehmen(auswahl[0])
+            return "break"
+        self.schliessen()
+
+    def _geklickt(self, event):
+        if self.offen:
+            self.uebernehmen(self.liste.nearest(event.y))
+            self.feld.focus_set()
+
+    def uebernehmen(self, nummer):
+        """Schreibt den gewählten Namen ins Feld und meldet den Artikel an ausgewaehlt()."""
+        artikel_id, name, einheit, lagerort = self._vorschlaege[nummer]
+        self.feld.delete(0, tkinter.END)
+        self.feld.insert(0, name)
+        self.schliessen()
+        self._text = name
+        self.ausgewaehlt(artikel_id, name, einheit, lagerort)
+
+    def schliessen(self):
+        self._vorschlaege = []
+        self._text = None
+        self.liste.place_forget()
+
+    def _fokus_weg(self, event=None):
+        self._schliessen_geplant = self.feld.after(SCHLIESSEN_MS, self.schliessen)
+
+    def _fokus_da(self, event=None):
+        if self._schliessen_geplant:
+            self.feld.after_cancel(self._schliessen_geplant)
+            self._schliessen_geplant = None